@@ -17,6 +17,10 @@ Setup:
 
     python integration-patterns/alert_webhook_claude.py
 
+Production (multi-worker, shared dedup/cache/rate-limit state):
+    pip install gunicorn
+    gunicorn -c integration-patterns/gunicorn.conf.py
+
 Configure Parseable to send alert webhooks to http://<this-host>:5001/webhook
 
 Parseable Alert Webhook Payload (example):
@@ -32,8 +36,11 @@ Parseable Alert Webhook Payload (example):
 import json
 import logging
 import os
+import signal
 import sys
 import textwrap
+import threading
+import time
 from datetime import datetime, timezone
 
 try:
@@ -45,6 +52,9 @@ except ImportError as e:
     print("Install with: pip install flask anthropic httpx")
     sys.exit(1)
 
+from slack_delivery import SlackDeliverer, SlackOutbox
+from webhook_state import SharedState, alert_fingerprint
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
@@ -57,10 +67,68 @@ CONTEXT_WINDOW_MINUTES = int(os.environ.get("CONTEXT_WINDOW_MINUTES", "10"))
 CONTEXT_LOG_LIMIT = int(os.environ.get("CONTEXT_LOG_LIMIT", "100"))
 CLAUDE_MODEL = os.environ.get("CLAUDE_MODEL", "claude-opus-4-6")
 
+# Shared state (dedup, context cache, rate limits, in-flight journal).
+# All workers on a host must point at the same file.
+STATE_DB = os.environ.get("WEBHOOK_STATE_DB", ".state/webhook_state.db")
+DEDUP_TTL_SECONDS = int(os.environ.get("DEDUP_TTL_SECONDS", "300"))
+CONTEXT_CACHE_SECONDS = int(os.environ.get("CONTEXT_CACHE_SECONDS", "30"))
+STREAM_RATE_LIMIT = int(os.environ.get("STREAM_RATE_LIMIT", "6"))
+STREAM_RATE_WINDOW_SECONDS = int(os.environ.get("STREAM_RATE_WINDOW_SECONDS", "60"))
+DRAIN_TIMEOUT_SECONDS = int(os.environ.get("DRAIN_TIMEOUT_SECONDS", "120"))
+# How often a worker deletes expired dedup/cache rows and old rate events.
+STATE_PURGE_SECONDS = int(os.environ.get("STATE_PURGE_SECONDS", "300"))
+
+# Outbound Slack queue (shared by all workers; one message/sec per channel)
+SLACK_OUTBOX_DB = os.environ.get("SLACK_OUTBOX_DB", ".state/slack_outbox.db")
+SLACK_RATE_PER_SECOND = float(os.environ.get("SLACK_RATE_PER_SECOND", "1"))
+
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
+state = SharedState(STATE_DB)
+
+# Per-process clients, reused across requests for connection pooling.
+_http_client: httpx.Client | None = None
+_claude_client: anthropic.Anthropic | None = None
+_slack_deliverer: SlackDeliverer | None = None
+_client_lock = threading.Lock()
+
+# Graceful drain: once set, new alerts are refused while in-flight ones finish.
+_draining = threading.Event()
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+_last_purge = time.monotonic()
+_purge_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    with _client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(timeout=30)
+        return _http_client
+
+
+def _get_claude_client() -> anthropic.Anthropic:
+    global _claude_client
+    with _client_lock:
+        if _claude_client is None:
+            _claude_client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        return _claude_client
+
+
+def _get_slack_deliverer() -> SlackDeliverer:
+    """Return this process's Slack deliverer, starting its background thread."""
+    global _slack_deliverer
+    with _client_lock:
+        if _slack_deliverer is None:
+            outbox = SlackOutbox(SLACK_OUTBOX_DB, rate_per_second=SLACK_RATE_PER_SECOND)
+            _slack_deliverer = SlackDeliverer(outbox)
+            _slack_deliverer.start()
+        return _slack_deliverer
+
 
 # ---------------------------------------------------------------------------
 # Parseable helpers
@@ -80,14 +148,23 @@ def query_parseable(sql: str, start_time: str, end_time: str) -> list[dict]:
         "startTime": start_time,
         "endTime": end_time,
     }
-    with httpx.Client(timeout=30) as client:
-        resp = client.post(
-            f"{PARSEABLE_URL}/api/v1/query",
-            json=payload,
-            auth=auth,
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = _get_http_client().post(
+        f"{PARSEABLE_URL}/api/v1/query",
+        json=payload,
+        auth=auth,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _cached(key: str, fetch) -> list[dict]:
+    """Return a shared cached result for key, fetching and storing it on a miss."""
+    value = state.cache_get(key)
+    if value is None:
+        value = fetch()
+        if value:
+            state.cache_put(key, value, CONTEXT_CACHE_SECONDS)
+    return value
 
 
 def fetch_context_logs(stream: str, minutes: int = CONTEXT_WINDOW_MINUTES) -> list[dict]:
@@ -139,7 +216,7 @@ def analyze_with_claude(alert: dict, context_logs: list[dict], error_summary: li
     if not ANTHROPIC_API_KEY:
         return "(ANTHROPIC_API_KEY not set -- skipping Claude analysis)"
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    client = _get_claude_client()
 
     prompt = textwrap.dedent(f"""\
         You are an expert SRE. An alert has fired from our observability platform (Parseable).
@@ -187,7 +264,7 @@ def analyze_with_claude(alert: dict, context_logs: list[dict], error_summary: li
 # ---------------------------------------------------------------------------
 
 def post_to_slack(alert: dict, analysis: str) -> bool:
-    """Post the analysis to a Slack incoming webhook."""
+    """Queue the analysis for delivery to a Slack incoming webhook."""
     if not SLACK_WEBHOOK_URL:
         logger.warning("SLACK_WEBHOOK_URL not set -- skipping Slack notification")
         return False
@@ -229,36 +306,28 @@ def post_to_slack(alert: dict, analysis: str) -> bool:
         ],
     }
 
-    try:
-        with httpx.Client(timeout=10) as client:
-            resp = client.post(SLACK_WEBHOOK_URL, json=slack_payload)
-            resp.raise_for_status()
-            logger.info("Slack notification sent successfully")
-            return True
-    except Exception as exc:
-        logger.error("Failed to post to Slack: %s", exc)
-        return False
+    deliverer = _get_slack_deliverer()
+    deliverer.outbox.enqueue(SLACK_WEBHOOK_URL, slack_payload)
+    deliverer.notify()
+    logger.info("Slack notification queued")
+    return True
 
 
 # ---------------------------------------------------------------------------
 # Flask routes
 # ---------------------------------------------------------------------------
 
-@app.route("/webhook", methods=["POST"])
-def handle_webhook():
-    """Receive a Parseable alert webhook, analyze with Claude, post to Slack."""
-    alert = request.get_json(force=True)
-    logger.info("Received alert webhook: %s", json.dumps(alert, default=str))
-
+def process_alert(alert: dict) -> dict:
+    """Gather context, analyze with Claude and post to Slack for one alert."""
     stream = alert.get("stream", "")
     if not stream:
         logger.warning("Alert has no 'stream' field -- using 'otel-logs' as default")
         stream = "otel-logs"
 
-    # Gather context from Parseable
+    # Gather context from Parseable (shared across workers for a short TTL)
     logger.info("Fetching context logs from stream '%s'...", stream)
-    context_logs = fetch_context_logs(stream)
-    error_summary = fetch_error_summary(stream)
+    context_logs = _cached(f"logs:{stream}", lambda: fetch_context_logs(stream))
+    error_summary = _cached(f"errors:{stream}", lambda: fetch_error_summary(stream))
     logger.info(
         "Context: %d log entries, %d error groups",
         len(context_logs),
@@ -273,20 +342,122 @@ def handle_webhook():
     # Post to Slack
     post_to_slack(alert, analysis)
 
-    return jsonify({
+    return {
         "status": "processed",
         "alert_name": alert.get("alert_name", ""),
         "analysis_length": len(analysis),
         "context_logs_count": len(context_logs),
-    })
+    }
+
+
+def _run_journaled(job_id: int, alert: dict) -> dict:
+    """Process an alert while tracking it as in flight.
+
+    The journal entry is cleared when processing returns or raises; only a
+    worker that dies mid-analysis leaves it behind for recovery. A failed
+    alert's fingerprint is dropped so Parseable's retry is processed.
+    """
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+    try:
+        result = process_alert(alert)
+        state.finish_job(job_id)
+        return result
+    except Exception:
+        logger.exception("Alert job %d failed", job_id)
+        state.finish_job(job_id)
+        state.forget(alert_fingerprint(alert))
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+def recover_orphaned_jobs() -> int:
+    """Re-run alerts left in the journal by workers that died mid-analysis."""
+    jobs = state.claim_orphaned_jobs()
+    for job_id, alert in jobs:
+        logger.info("Recovering orphaned alert job %d (%s)", job_id, alert.get("alert_name", ""))
+        try:
+            _run_journaled(job_id, alert)
+        except Exception as exc:
+            logger.error("Recovered job %d failed: %s", job_id, exc)
+    return len(jobs)
+
+
+def begin_draining(timeout: float = DRAIN_TIMEOUT_SECONDS) -> bool:
+    """Stop accepting alerts and wait for this process's in-flight analyses.
+
+    Returns True if everything finished within the timeout. Anything still
+    running stays in the journal and is picked up by the next worker.
+    """
+    _draining.set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with _in_flight_lock:
+            if _in_flight == 0:
+                return True
+        time.sleep(0.2)
+    return False
+
+
+def _maybe_purge_state() -> None:
+    """Purge expired shared state at most once per STATE_PURGE_SECONDS per worker."""
+    global _last_purge
+    with _purge_lock:
+        if time.monotonic() - _last_purge < STATE_PURGE_SECONDS:
+            return
+        _last_purge = time.monotonic()
+    try:
+        state.purge_expired(rate_horizon_seconds=max(STREAM_RATE_WINDOW_SECONDS, 3600))
+    except Exception as exc:
+        logger.warning("Shared state purge failed: %s", exc)
+
+
+@app.route("/webhook", methods=["POST"])
+def handle_webhook():
+    """Receive a Parseable alert webhook, analyze with Claude, post to Slack."""
+    if _draining.is_set():
+        return jsonify({"status": "draining"}), 503
+
+    _maybe_purge_state()
+    alert = request.get_json(force=True)
+    logger.info("Received alert webhook: %s", json.dumps(alert, default=str))
+
+    fingerprint = alert_fingerprint(alert)
+    if state.seen_recently(fingerprint, DEDUP_TTL_SECONDS):
+        logger.info("Duplicate alert within %ds -- skipping", DEDUP_TTL_SECONDS)
+        return jsonify({"status": "duplicate", "alert_name": alert.get("alert_name", "")})
+
+    stream = alert.get("stream", "") or "otel-logs"
+    if not state.allow(f"stream:{stream}", STREAM_RATE_LIMIT, STREAM_RATE_WINDOW_SECONDS):
+        # Not accepted: let Parseable's retry through instead of deduping it.
+        state.forget(fingerprint)
+        logger.warning("Rate limit reached for stream '%s' -- skipping analysis", stream)
+        return jsonify({"status": "rate_limited", "stream": stream}), 429
+
+    job_id = state.begin_job(alert)
+    return jsonify(_run_journaled(job_id, alert))
 
 
 @app.route("/health", methods=["GET"])
 def health():
-    """Simple health check endpoint."""
+    """Simple health check endpoint (503 while draining)."""
+    if _draining.is_set():
+        return jsonify({"status": "draining"}), 503
     return jsonify({"status": "ok"})
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Delivery and in-flight metrics for this host."""
+    data = {"in_flight_jobs": state.in_flight(), "draining": _draining.is_set()}
+    if SLACK_WEBHOOK_URL:
+        data["slack"] = _get_slack_deliverer().metrics()
+    return jsonify(data)
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -307,4 +478,19 @@ if __name__ == "__main__":
     logger.info("Starting alert webhook server on port %d", port)
     logger.info("Parseable URL: %s", PARSEABLE_URL)
     logger.info("Claude model: %s", CLAUDE_MODEL)
-    app.run(host="0.0.0.0", port=port, debug=False)
+    logger.info(
+        "Development server (single process). For production use: "
+        "gunicorn -c integration-patterns/gunicorn.conf.py"
+    )
+
+    def _on_sigterm(signum, frame):
+        logger.info("SIGTERM received -- draining in-flight analyses...")
+        if not begin_draining():
+            logger.warning("Drain timed out; unfinished alerts remain journaled")
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    threading.Thread(target=recover_orphaned_jobs, daemon=True).start()
+    if SLACK_WEBHOOK_URL:
+        _get_slack_deliverer()
+    app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
@@ -0,0 +1,401 @@
+"""
+Local anomaly detection gate for periodic health summaries
+
+Decides, per stream, whether a health cycle is interesting enough to send
+to Claude. The checks run on the `error_rate` (per-minute total/errors)
+and `service_health` query results:
+
+- EWMA baselines of per-minute volume and error ratio, per stream and per
+  service, persisted across runs in a JSON file
+- z-score of the window against the baseline once it has warmed up
+- robust (median/MAD) z-score of the latest minute within the window
+- mean-shift change-point detection over the window's error ratio
+- services that appear with errors or vanish compared to their baseline
+
+Streams with no findings get a deterministic templated summary; Claude is
+only called for anomalous streams, plus each stream on a slow heartbeat
+(tracked per stream, so groups on different schedules don't starve each
+other's heartbeats).
+
+Usage:
+    from anomaly_gate import AnomalyGate
+
+    gate = AnomalyGate(".state/health_baselines.json")
+    verdict = gate.evaluate("otel-logs", stream_results)
+    if verdict.anomalous or gate.heartbeat_due("otel-logs"):
+        ...  # ask Claude
+        gate.mark_llm_call(["otel-logs"])
+    else:
+        text = render_healthy_summary("otel-logs", stream_results, verdict)
+    gate.save()
+
+    # Check: a flat stream sampled on boundary-aligned ticks stays quiet
+    python integration-patterns/anomaly_gate.py --simulate --ticks 20
+
+Requires:
+    pip install numpy
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is required: pip install numpy")
+
+
+@dataclass
+class StreamVerdict:
+    """Outcome of the anomaly pre-pass for one stream."""
+
+    stream: str
+    anomalous: bool = False
+    reasons: list[str] = field(default_factory=list)
+    metrics: dict = field(default_factory=dict)
+
+
+def ewma_update(
+    mean: float,
+    mean_sq: float,
+    values: "np.ndarray",
+    alpha: float,
+) -> tuple[float, float]:
+    """Fold a series into EWMA first/second moments in one vectorized step.
+
+    Equivalent to applying m <- (1 - alpha) * m + alpha * x for each value
+    in order.
+    """
+    n = len(values)
+    if n == 0:
+        return mean, mean_sq
+    decay = (1 - alpha) ** np.arange(n - 1, -1, -1)
+    carry = (1 - alpha) ** n
+    new_mean = carry * mean + alpha * float(np.dot(decay, values))
+    new_mean_sq = carry * mean_sq + alpha * float(np.dot(decay, values * values))
+    return new_mean, new_mean_sq
+
+
+def robust_z(values: "np.ndarray") -> "np.ndarray":
+    """Median/MAD z-scores (0.6745 scales MAD to a normal sigma)."""
+    if len(values) == 0:
+        return values
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad == 0:
+        return np.zeros_like(values, dtype=float)
+    return 0.6745 * (values - median) / mad
+
+
+def mean_shift(values: "np.ndarray", min_segment: int = 3) -> tuple[int, float]:
+    """Best single change point by standardized difference of segment means.
+
+    Returns (index, score); index is where the second segment starts. A
+    score of 0 means the window is too short or flat.
+    """
+    n = len(values)
+    if n < 2 * min_segment:
+        return -1, 0.0
+    sigma = float(np.std(values))
+    if sigma == 0:
+        return -1, 0.0
+    csum = np.cumsum(values)
+    total = csum[-1]
+    k = np.arange(min_segment, n - min_segment + 1)
+    left = csum[k - 1] / k
+    right = (total - csum[k - 1]) / (n - k)
+    scores = np.abs(right - left) / (sigma * np.sqrt(1.0 / k + 1.0 / (n - k)))
+    best = int(np.argmax(scores))
+    return int(k[best]), float(scores[best])
+
+
+class AnomalyGate:
+    """Per-stream/per-service baselines and the skip-Claude decision."""
+
+    def __init__(
+        self,
+        state_path: str,
+        alpha: float = 0.05,
+        z_threshold: float = 4.0,
+        change_threshold: float = 4.0,
+        min_samples: int = 30,
+        heartbeat_minutes: float = 60,
+        min_error_ratio_delta: float = 0.01,
+    ):
+        self.state_path = state_path
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.change_threshold = change_threshold
+        self.min_samples = min_samples
+        self.heartbeat_minutes = heartbeat_minutes
+        self.min_error_ratio_delta = min_error_ratio_delta
+        self._lock = threading.Lock()
+        self.state = {"baselines": {}, "last_llm_at": {}}
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                self.state.update(json.load(f))
+        if not isinstance(self.state["last_llm_at"], dict):  # pre per-stream state file
+            self.state["last_llm_at"] = {}
+
+    # -----------------------------------------------------------------
+    # Baselines
+    # -----------------------------------------------------------------
+
+    def _baseline(self, key: str) -> dict:
+        return self.state["baselines"].setdefault(key, {"mean": 0.0, "mean_sq": 0.0, "n": 0})
+
+    def _z_vs_baseline(self, key: str, value: float) -> float | None:
+        base = self.state["baselines"].get(key)
+        if not base or base["n"] < self.min_samples:
+            return None
+        var = max(base["mean_sq"] - base["mean"] ** 2, 0.0)
+        # Floor the spread so a perfectly flat baseline doesn't make any wobble infinite.
+        sigma = max(np.sqrt(var), 0.05 * abs(base["mean"]), 1e-3)
+        return (value - base["mean"]) / sigma
+
+    def _material(self, metric: str, delta: float) -> bool:
+        """Ignore statistically large but tiny error-ratio moves (e.g. 0.01% -> 0.03%)."""
+        return metric == "volume" or abs(delta) >= self.min_error_ratio_delta
+
+    def _update(self, key: str, values: "np.ndarray") -> None:
+        base = self._baseline(key)
+        if base["n"] == 0 and len(values):
+            base["mean"] = float(values[0])
+            base["mean_sq"] = float(values[0] ** 2)
+        base["mean"], base["mean_sq"] = ewma_update(
+            base["mean"], base["mean_sq"], values, self.alpha
+        )
+        base["n"] += len(values)
+
+    # -----------------------------------------------------------------
+    # Evaluation
+    # -----------------------------------------------------------------
+
+    def evaluate(self, stream: str, results: dict[str, dict]) -> StreamVerdict:
+        """Check one stream's health query results and update its baselines."""
+        with self._lock:
+            return self._evaluate(stream, results)
+
+    def _evaluate(self, stream: str, results: dict[str, dict]) -> StreamVerdict:
+        verdict = StreamVerdict(stream=stream)
+        for name, result in results.items():
+            if result.get("error"):
+                verdict.reasons.append(f"query '{name}' failed: {result['error']}")
+
+        rate_rows = results.get("error_rate", {}).get("data", [])
+        # n minute buckets with partial first/last ones cover about n - 1 minutes.
+        window_minutes = max(len(rate_rows) - 1, 1)
+        totals = np.array([float(r.get("total", 0) or 0) for r in rate_rows])
+        errors = np.array([float(r.get("errors", 0) or 0) for r in rate_rows])
+
+        if len(totals):
+            verdict.metrics = {
+                "records": int(totals.sum()),
+                "errors": int(errors.sum()),
+                "error_ratio": float(errors.sum() / max(totals.sum(), 1.0)),
+            }
+            # The window is relative to NOW(), so its first and last minute
+            # buckets are only partly filled. Score and learn from whole
+            # minutes only, or the in-progress minute looks like a volume drop.
+            rate_rows = rate_rows[1:-1]
+            totals, errors = totals[1:-1], errors[1:-1]
+        ratio = errors / np.maximum(totals, 1.0)
+
+        if len(totals):
+            for metric, series in (("volume", totals), ("error_ratio", ratio)):
+                key = f"{stream}|{metric}"
+                base_mean = self._baseline(key)["mean"]
+                z = self._z_vs_baseline(key, float(series.mean()))
+                if (
+                    z is not None
+                    and abs(z) >= self.z_threshold
+                    and self._material(metric, series.mean() - base_mean)
+                ):
+                    unit = "/min" if metric == "volume" else ""
+                    verdict.reasons.append(
+                        f"{metric} {series.mean():.4g}{unit} vs baseline "
+                        f"{base_mean:.4g}{unit} (z={z:+.1f})"
+                    )
+                rz = robust_z(series)
+                if (
+                    len(rz) >= 5
+                    and abs(rz[-1]) >= self.z_threshold
+                    and self._material(metric, series[-1] - np.median(series))
+                ):
+                    verdict.reasons.append(
+                        f"latest-minute {metric} {series[-1]:.4g} is an outlier "
+                        f"in this window (robust z={rz[-1]:+.1f})"
+                    )
+                self._update(key, series)
+
+            idx, score = mean_shift(ratio)
+            shift = abs(ratio[idx:].mean() - ratio[:idx].mean()) if idx > 0 else 0.0
+            if score >= self.change_threshold and shift >= self.min_error_ratio_delta:
+                bucket = rate_rows[idx].get("minute_bucket", idx)
+                verdict.reasons.append(
+                    f"error ratio shifted from {ratio[:idx].mean():.2%} to "
+                    f"{ratio[idx:].mean():.2%} at {bucket}"
+                )
+        elif not verdict.metrics and self._baseline(f"{stream}|volume")["n"] >= self.min_samples:
+            verdict.reasons.append("no records in window (stream went silent)")
+
+        self._evaluate_services(stream, results, window_minutes, verdict)
+        verdict.anomalous = bool(verdict.reasons)
+        return verdict
+
+    def _evaluate_services(
+        self,
+        stream: str,
+        results: dict[str, dict],
+        minutes: int,
+        verdict: StreamVerdict,
+    ) -> None:
+        totals: dict[str, float] = {}
+        errs: dict[str, float] = {}
+        for row in results.get("service_health", {}).get("data", []):
+            service = row.get("service_name")
+            if service is None:
+                continue
+            count = float(row.get("count", 0) or 0)
+            totals[service] = totals.get(service, 0.0) + count
+            if row.get("level") in ("error", "ERROR", "Error"):
+                errs[service] = errs.get(service, 0.0) + count
+
+        prefix = f"{stream}|svc|"
+        known = {
+            k[len(prefix):].rsplit("|", 1)[0]
+            for k, b in self.state["baselines"].items()
+            if k.startswith(prefix) and b["n"] >= self.min_samples
+        }
+        for service in sorted(known - set(totals)):
+            base = self.state["baselines"].get(f"{prefix}{service}|volume", {})
+            if base.get("mean", 0) >= 1.0:
+                verdict.reasons.append(f"service '{service}' stopped logging")
+
+        for service, total in sorted(totals.items()):
+            volume = np.array([total / minutes])
+            ratio = np.array([errs.get(service, 0.0) / max(total, 1.0)])
+            warmed_up = self._baseline(f"{stream}|volume")["n"] >= self.min_samples
+            if service not in known and warmed_up and ratio[0] >= 0.05:
+                verdict.reasons.append(
+                    f"new service '{service}' with {ratio[0]:.1%} errors"
+                )
+            for metric, series in (("volume", volume), ("error_ratio", ratio)):
+                key = f"{prefix}{service}|{metric}"
+                base_mean = self._baseline(key)["mean"]
+                z = self._z_vs_baseline(key, float(series[0]))
+                if (
+                    z is not None
+                    and abs(z) >= self.z_threshold
+                    and self._material(metric, series[0] - base_mean)
+                ):
+                    verdict.reasons.append(
+                        f"service '{service}' {metric} {series[0]:.4g} vs baseline "
+                        f"{base_mean:.4g} (z={z:+.1f})"
+                    )
+                # One observation per cycle, weighted as if it covered the whole window.
+                self._update(key, np.repeat(series, minutes))
+
+    # -----------------------------------------------------------------
+    # Heartbeat and persistence
+    # -----------------------------------------------------------------
+
+    def heartbeat_due(self, stream: str, now: float | None = None) -> bool:
+        """True if stream has not been sent to Claude for heartbeat_minutes."""
+        now = time.time() if now is None else now
+        with self._lock:
+            last = self.state["last_llm_at"].get(stream, 0.0)
+        return now - last >= self.heartbeat_minutes * 60
+
+    def mark_llm_call(self, streams, now: float | None = None) -> None:
+        """Record that these streams were just summarized by Claude."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for stream in streams:
+                self.state["last_llm_at"][stream] = now
+
+    def save(self) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.state_path)
+
+
+def render_healthy_summary(stream: str, results: dict[str, dict], verdict: StreamVerdict) -> str:
+    """Deterministic Markdown section for a stream the gate found unremarkable."""
+    metrics = verdict.metrics
+    lines = [f"## Stream: {stream}\n", "**Overall Status**: Healthy (no anomalies vs baseline)\n"]
+    if metrics:
+        lines.append(
+            f"- Records: {metrics['records']:,}, errors: {metrics['errors']:,} "
+            f"({metrics['error_ratio']:.2%})"
+        )
+    top = results.get("top_errors", {}).get("data", [])
+    if top:
+        lines.append(
+            f"- Most frequent error: \"{top[0].get('message', '')}\" "
+            f"({top[0].get('count', 0)}x)"
+        )
+    services = {r.get("service_name") for r in results.get("service_health", {}).get("data", [])}
+    services.discard(None)
+    if services:
+        lines.append(f"- Services reporting: {len(services)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def simulated_results(
+    rng: "np.random.Generator",
+    minutes: int = 5,
+    per_minute: float = 1000,
+    error_ratio: float = 0.01,
+    offset_seconds: float = 5,
+) -> dict[str, dict]:
+    """Health results for a flat stream queried offset_seconds after a boundary.
+
+    Like the real NOW()-relative window, the first and last minute buckets
+    are partial.
+    """
+    fractions = [1 - offset_seconds / 60] + [1.0] * (minutes - 1) + [offset_seconds / 60]
+    totals = [int(rng.poisson(per_minute * f)) for f in fractions]
+    rows = [
+        {"minute_bucket": i, "total": total, "errors": int(rng.binomial(total, error_ratio))}
+        for i, total in enumerate(totals)
+    ]
+    return {
+        "error_rate": {"data": rows},
+        "service_health": {"data": [{"service_name": "svc", "level": "INFO", "count": sum(totals)}]},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Anomaly gate checks.")
+    parser.add_argument("--simulate", action="store_true", required=True,
+                        help="Feed a flat stream through the gate on boundary-aligned ticks")
+    parser.add_argument("--ticks", type=int, default=20, help="Cycles to simulate (default: 20)")
+    parser.add_argument("--offset", type=float, default=5, help="Seconds past the boundary (default: 5)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        gate = AnomalyGate(os.path.join(tmp, "baselines.json"))
+        flagged = 0
+        for tick in range(args.ticks):
+            verdict = gate.evaluate("flat", simulated_results(rng, offset_seconds=args.offset))
+            if verdict.anomalous:
+                flagged += 1
+                print(f"tick {tick}: anomalous -- {'; '.join(verdict.reasons)}")
+    print(f"Flat stream flagged on {flagged} of {args.ticks} ticks")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
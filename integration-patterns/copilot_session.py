@@ -0,0 +1,953 @@
+#!/usr/bin/env python3
+"""
+Stateful on-call copilot sessions (experiment 09, interactively)
+
+Experiment 09 is a multi-turn conversation, but run_experiment.py sends it
+as one shot and every follow-up would re-run the diagnostic SQL and resend
+all prior context. A CopilotSession keeps the conversation and the data
+between turns:
+
+- Claude queries Parseable through a run_sql tool. Results go into a
+  per-session QueryResultStore keyed by normalized SQL (case, whitespace
+  and a relative `p_timestamp > NOW() - INTERVAL ...` predicate removed;
+  the interval becomes the query window)
+- Asking the same query again is answered from the store. Asking it over
+  a wider window only queries the missing head/tail of the window and
+  merges: plain row queries are concatenated (re-sorted and re-limited
+  when ORDER BY / LIMIT are simple), GROUP BY queries whose aggregates
+  are all aliased COUNT / SUM / MIN / MAX are merged per group. Anything
+  else (AVG, ratios, DISTINCT, joins) is reused only for the same window
+- The system prompt and the conversation prefix carry prompt-cache
+  breakpoints, so each follow-up only pays full price for the new turn
+- Once the history passes the token budget, tool results of older turns
+  are replaced by stubs (the rows stay in the store) and, if that is not
+  enough, the oldest turns are folded into a short written summary
+- Responses are streamed, and sessions can be saved and resumed
+
+Usage:
+    from parseable_context_builder import ParseableContext
+    from copilot_session import CopilotSession
+
+    session = CopilotSession(ParseableContext(), streams=["astronomy-shop-logs"])
+    reply = session.ask("CheckoutDBPoolExhausted just fired. What do I check first?")
+    reply = session.ask("Does the payment service show the same pattern?")
+    print(reply.text, reply.queries)
+
+    rows = session.run_query('SELECT COUNT(*) AS n FROM "astronomy-shop-logs"', minutes=60).rows
+
+    python integration-patterns/copilot_session.py --streams astronomy-shop-logs
+    python integration-patterns/copilot_session.py --replay experiments/09-runbook-copilot/prompt.md \\
+        --end 2025-01-25T03:45:00Z
+    python integration-patterns/copilot_session.py --session .state/copilot/inc-42.json   # resume
+    python integration-patterns/copilot_session.py --replay experiments/09-runbook-copilot/prompt.md --dry-run
+
+Requires:
+    pip install anthropic httpx
+
+Environment variables:
+    PARSEABLE_URL       - Parseable base URL (default: http://localhost:8000)
+    PARSEABLE_AUTH      - user:password  (default: parseable:parseable)
+    ANTHROPIC_API_KEY   - Claude API key
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    import anthropic
+
+    from parseable_context_builder import ParseableContext
+
+DEFAULT_MODEL = "claude-opus-4-6"
+MAX_TOKENS = 4096
+DEFAULT_WINDOW_MINUTES = 60
+# Estimated history size that triggers compaction, and the size it compacts to.
+DEFAULT_TOKEN_BUDGET = 60_000
+COMPACT_TARGET = 0.5
+KEEP_RECENT_TURNS = 2
+# Same rough chars-per-token ratio as scripts/prompt_budget.py.
+CHARS_PER_TOKEN = 3.2
+# Rows of a result shown to Claude; the full result stays in the store.
+RESULT_ROWS_TO_CLAUDE = 100
+# Window edges closer than this to a stored result's edges count as covered.
+FRESH_SECONDS = 30
+# Results larger than this are returned but not kept.
+MAX_STORED_ROWS = 50_000
+MAX_TOOL_ROUNDS = 8
+EPHEMERAL = {"type": "ephemeral"}
+
+SYSTEM_PROMPT = (
+    "You are an expert SRE on-call copilot. You help engineers diagnose and resolve production "
+    "incidents by combining log analysis (using Parseable SQL queries), infrastructure commands, "
+    "and operational knowledge.\n\n"
+    "You can query Parseable yourself with the run_sql tool (PostgreSQL-compatible SQL executed by "
+    "DataFusion; quote stream and dotted column names with double quotes). Give the time window "
+    "with the tool's `minutes` argument instead of filtering on p_timestamp. Query results are kept "
+    "for the whole session: re-running an earlier query, or the same query over a longer window, is "
+    "cheap, so prefer reusing and widening earlier queries over writing new variants. Keep answers "
+    "short and actionable; the engineer is in the middle of an incident."
+)
+
+RUN_SQL_TOOL = {
+    "name": "run_sql",
+    "description": (
+        "Run a SQL query against Parseable and return the result rows as JSON. Large results are "
+        f"truncated to the first {RESULT_ROWS_TO_CLAUDE} rows; the total row count is reported."
+    ),
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "sql": {"type": "string", "description": "DataFusion SQL over one or more log streams"},
+            "minutes": {
+                "type": "integer",
+                "description": "Look-back window ending now (default: the session window)",
+            },
+        },
+        "required": ["sql"],
+    },
+}
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _parse_time(value: str) -> datetime:
+    return _utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+# ---------------------------------------------------------------------------
+# SQL normalization and shape
+# ---------------------------------------------------------------------------
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_RELATIVE = r"p_timestamp\s*>=?\s*now\(\)\s*-\s*interval\s*'(\d+)\s*(minute|hour|day)s?'"
+_UNIT_MINUTES = {"minute": 1, "hour": 60, "day": 1440}
+_CLAUSE = re.compile(
+    r"\b(select|from|where|group\s+by|having|order\s+by|limit|offset|union|intersect|except|join|with)\b"
+)
+_AGGREGATE_CALL = re.compile(
+    r"\b(count|sum|min|max|avg|mean|median|stddev\w*|var\w*|approx_\w+|array_agg|string_agg|"
+    r"bool_and|bool_or|first_value|last_value)\s*\("
+)
+_IDENTIFIER = r'"(?:[^"]|"")*"|[A-Za-z_][A-Za-z0-9_]*'
+_ALIAS = re.compile(rf"\s+as\s+({_IDENTIFIER})\s*$", re.I)
+_ORDER_ITEM = re.compile(rf"({_IDENTIFIER})(?:\s+(asc|desc))?(?:\s+nulls\s+(?:first|last))?", re.I)
+
+
+def _mask(sql: str) -> str:
+    """sql with string literals and quoted identifiers blanked, same length."""
+    return _LITERAL.sub(lambda m: m.group()[0] + "_" * (len(m.group()) - 2) + m.group()[-1], sql)
+
+
+def _unquote(identifier: str) -> str:
+    if identifier.startswith('"'):
+        return identifier[1:-1].replace('""', '"')
+    return identifier.lower()
+
+
+def _split_top_level(text: str, masked: str) -> list[str]:
+    parts, depth, last = [], 0, 0
+    for index, char in enumerate(masked):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[last:index].strip())
+            last = index + 1
+    parts.append(text[last:].strip())
+    return parts
+
+
+def strip_relative_window(sql: str) -> tuple[str, int | None]:
+    """Remove a single `p_timestamp > NOW() - INTERVAL 'N unit'` predicate.
+
+    Returns (sql without it, N in minutes), or (sql, None) when there is
+    no such predicate or removing it could change the query's meaning.
+    """
+    if len(re.findall(_RELATIVE, sql, re.I)) != 1 or re.search(r"\bor\b", _mask(sql), re.I):
+        return sql, None
+    for pattern in (
+        rf"\s+and\s+{_RELATIVE}",
+        rf"{_RELATIVE}\s+and\s+",
+        rf"\s*\bwhere\s+{_RELATIVE}(?=\s*(?:group\s+by|order\s+by|having|limit|;|$))",
+    ):
+        match = re.search(pattern, sql, re.I)
+        if match:
+            minutes = int(match.group(1)) * _UNIT_MINUTES[match.group(2).lower()]
+            return (sql[: match.start()] + " " + sql[match.end():]).strip(), minutes
+    return sql, None
+
+
+def normalize_sql(sql: str) -> str:
+    """Store key: lowercased, whitespace collapsed and spaces around operators dropped outside quotes."""
+
+    def squash(text: str) -> str:
+        return re.sub(r"\s*([(),=<>+*/])\s*", r"\1", re.sub(r"\s+", " ", text.lower()))
+
+    parts, last = [], 0
+    for match in _LITERAL.finditer(sql):
+        parts.append(squash(sql[last: match.start()]))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(squash(sql[last:]))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+@dataclass
+class QueryShape:
+    """How results of one query over adjacent windows can be combined.
+
+    kind is "rows" (concatenate), "aggregate" (merge per group) or
+    "opaque" (only reusable for the same window).
+    """
+
+    kind: str
+    aggregates: dict[str, str] = field(default_factory=dict)
+    order: list[tuple[str, bool]] = field(default_factory=list)
+    limit: int | None = None
+    columns: set[str] = field(default_factory=set)
+
+    @classmethod
+    def of(cls, sql: str) -> "QueryShape":
+        opaque = cls("opaque")
+        sql = sql.strip().rstrip(";")
+        masked = _mask(sql)
+        lower = masked.lower()
+        depth, clauses = 0, []
+        depths = []
+        for char in lower:
+            depth += char == "("
+            depth -= char == ")"
+            depths.append(depth)
+        for match in _CLAUSE.finditer(lower):
+            keyword = " ".join(match.group(1).split())
+            if depths[match.start()] > 0:
+                if keyword == "select":
+                    return opaque
+                continue
+            clauses.append((keyword, match.start(), match.end()))
+        if re.search(r"\bover\s*\(", lower):
+            return opaque
+        keywords = [keyword for keyword, _, _ in clauses]
+        if (
+            not keywords
+            or keywords[0] != "select"
+            or keywords.count("select") != 1
+            or {"union", "intersect", "except", "join", "with", "having", "offset"} & set(keywords)
+        ):
+            return opaque
+        text = {}
+        for index, (keyword, _, end) in enumerate(clauses):
+            stop = clauses[index + 1][1] if index + 1 < len(clauses) else len(sql)
+            text[keyword] = (sql[end:stop].strip(), masked[end:stop].strip())
+
+        select, select_masked = text["select"]
+        if select_masked.lower().startswith("distinct"):
+            return opaque
+        shape = cls("rows")
+        wildcard = False
+        for item, item_masked in zip(
+            _split_top_level(select, select_masked), _split_top_level(select_masked, select_masked)
+        ):
+            alias_match = _ALIAS.search(item)
+            expr_masked = item_masked[: alias_match.start()] if alias_match else item_masked
+            alias = _unquote(alias_match.group(1)) if alias_match else None
+            if alias is None and re.fullmatch(_IDENTIFIER, item):
+                alias = _unquote(item)
+            if item == "*":
+                wildcard = True
+                continue
+            if not _AGGREGATE_CALL.search(expr_masked.lower()):
+                if alias:
+                    shape.columns.add(alias)
+                continue
+            func = cls._mergeable_aggregate(expr_masked.strip().lower())
+            if func is None or alias is None:
+                return opaque
+            shape.aggregates[alias] = func
+            shape.columns.add(alias)
+        if shape.aggregates or "group by" in text:
+            if not shape.aggregates or "limit" in text:
+                return opaque
+            shape.kind = "aggregate"
+
+        if "order by" in text:
+            order, order_masked = text["order by"]
+            for item in _split_top_level(order, order_masked):
+                match = _ORDER_ITEM.fullmatch(item)
+                if not match:
+                    return opaque
+                column = _unquote(match.group(1))
+                if column not in shape.columns and not wildcard:
+                    return opaque
+                shape.order.append((column, (match.group(2) or "").lower() == "desc"))
+        if "limit" in text:
+            if not text["limit"][0].isdigit():
+                return opaque
+            shape.limit = int(text["limit"][0])
+        return shape
+
+    @staticmethod
+    def _mergeable_aggregate(expr: str) -> str | None:
+        """Function name if expr is exactly COUNT/SUM/MIN/MAX(...) [FILTER (WHERE ...)]."""
+        match = re.match(r"(count|sum|min|max)\s*\(", expr)
+        if not match:
+            return None
+        depth = 0
+        for index in range(match.end() - 1, len(expr)):
+            depth += expr[index] == "("
+            depth -= expr[index] == ")"
+            if depth == 0:
+                break
+        args, rest = expr[match.end(): index], expr[index + 1:].strip()
+        if "distinct" in args or _AGGREGATE_CALL.search(args):
+            return None
+        if rest and not re.fullmatch(r"filter\s*\(\s*where\s.*\)", rest, re.S):
+            return None
+        return match.group(1)
+
+    def merge(self, parts: list[list[dict]]) -> list[dict]:
+        """Combine results of the same query over disjoint windows."""
+        if self.kind == "aggregate":
+            groups: dict[str, dict] = {}
+            for part in parts:
+                for row in part:
+                    key = json.dumps(
+                        {k: v for k, v in row.items() if k not in self.aggregates}, sort_keys=True, default=str
+                    )
+                    current = groups.get(key)
+                    if current is None:
+                        groups[key] = dict(row)
+                        continue
+                    for alias, func in self.aggregates.items():
+                        a, b = current.get(alias), row.get(alias)
+                        if a is None or b is None:
+                            current[alias] = b if a is None else a
+                        elif func in ("count", "sum"):
+                            current[alias] = a + b
+                        else:
+                            current[alias] = min(a, b) if func == "min" else max(a, b)
+            rows = list(groups.values())
+        else:
+            rows = [row for part in parts for row in part]
+        for column, descending in reversed(self.order):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=descending)
+        return rows if self.limit is None else rows[: self.limit]
+
+
+def _row_time(row: dict) -> float | None:
+    value = row.get("p_timestamp")
+    if not isinstance(value, str):
+        return None
+    try:
+        return _parse_time(value).timestamp()
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Query result store
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class StoredResult:
+    query_id: str
+    sql: str
+    start: float
+    end: float
+    rows: list[dict]
+    fetched_at: float
+    hits: int = 0
+
+
+@dataclass
+class QueryResult:
+    query_id: str
+    sql: str
+    start: float
+    end: float
+    rows: list[dict]
+    # "cache" (no query), "extended" (only the missing window queried) or "parseable"
+    source: str
+    elapsed_ms: float
+    queried_seconds: float = 0.0
+
+    def window_text(self) -> str:
+        start = datetime.fromtimestamp(self.start, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        return f"{start} UTC +{(self.end - self.start) / 60:.0f}m"
+
+
+class QueryResultStore:
+    """Per-session results of executed queries, keyed by normalized SQL."""
+
+    def __init__(self, fresh_seconds: float = FRESH_SECONDS, max_rows: int = MAX_STORED_ROWS):
+        self.fresh_seconds = fresh_seconds
+        self.max_rows = max_rows
+        self.entries: dict[str, StoredResult] = {}
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _query_id(self, key: str) -> str:
+        entry = self.entries.get(key)
+        return entry.query_id if entry else f"q{len(self.entries) + 1}"
+
+    def _fetch(self, ctx: ParseableContext, sql: str, start: float, end: float) -> list[dict]:
+        return ctx.query(
+            sql,
+            ctx.format_time(datetime.fromtimestamp(start, timezone.utc)),
+            ctx.format_time(datetime.fromtimestamp(end, timezone.utc)),
+        )
+
+    def run(self, ctx: ParseableContext, sql: str, start: float, end: float) -> QueryResult:
+        """Rows of sql over [start, end), reusing and extending stored results."""
+        started = time.perf_counter()
+        start, end = float(int(start)), float(int(end))
+        key = normalize_sql(sql)
+        shape = QueryShape.of(sql)
+        tolerance = self.fresh_seconds
+        with self._lock:
+            entry = self.entries.get(key)
+            query_id = self._query_id(key)
+
+        rows = None
+        source = "parseable"
+        queried = 0.0
+        if entry is not None:
+            covers_start = entry.start <= start + tolerance
+            covers_end = entry.end >= end - tolerance
+            exact_start = abs(entry.start - start) <= tolerance
+            if covers_start and covers_end:
+                rows = self._narrow(entry, shape, start, end)
+                if rows is not None:
+                    source = "cache"
+                    entry.hits += 1
+            extendable = shape.kind != "opaque" and (
+                exact_start or not covers_start or (shape.kind == "rows" and shape.limit is None)
+            )
+            if rows is None and extendable and not (covers_start and covers_end):
+                # Query only the part of the window the entry lacks.
+                head = [] if covers_start else self._fetch(ctx, sql, start, entry.start)
+                tail = [] if covers_end else self._fetch(ctx, sql, entry.end, end)
+                queried = (0 if covers_start else entry.start - start) + (0 if covers_end else end - entry.end)
+                merged = StoredResult(
+                    query_id,
+                    sql,
+                    min(start, entry.start),
+                    max(end, entry.end),
+                    shape.merge([head, entry.rows, tail]),
+                    time.time(),
+                    entry.hits,
+                )
+                rows = self._narrow(merged, shape, start, end)
+                if rows is not None:
+                    source = "extended"
+                    self._keep(key, merged)
+
+        if rows is None:
+            rows = self._fetch(ctx, sql, start, end)
+            queried += end - start
+            self._keep(key, StoredResult(query_id, sql, start, end, rows, time.time()))
+
+        with self._lock:
+            self.stats[source] += 1
+        return QueryResult(
+            query_id=query_id,
+            sql=sql,
+            start=start,
+            end=end,
+            rows=rows,
+            source=source,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            queried_seconds=queried,
+        )
+
+    def _keep(self, key: str, entry: StoredResult) -> None:
+        if len(entry.rows) <= self.max_rows:
+            with self._lock:
+                self.entries[key] = entry
+
+    def _narrow(self, entry: StoredResult, shape: QueryShape, start: float, end: float) -> list[dict] | None:
+        """The entry's rows restricted to [start, end), or None if that can't be derived."""
+        if abs(entry.start - start) <= self.fresh_seconds and entry.end <= end + self.fresh_seconds:
+            return entry.rows
+        if shape.kind != "rows" or shape.limit is not None:
+            return None
+        times = [_row_time(row) for row in entry.rows]
+        if any(t is None for t in times):
+            return None
+        return [row for row, t in zip(entry.rows, times) if start <= t < end]
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                key: {
+                    "query_id": e.query_id,
+                    "sql": e.sql,
+                    "start": e.start,
+                    "end": e.end,
+                    "rows": e.rows,
+                    "fetched_at": e.fetched_at,
+                    "hits": e.hits,
+                }
+                for key, e in self.entries.items()
+            }
+
+    def load_dict(self, data: dict) -> None:
+        with self._lock:
+            self.entries = {key: StoredResult(**value) for key, value in data.items()}
+
+
+# ---------------------------------------------------------------------------
+# Session
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class TurnResult:
+    text: str
+    queries: list[QueryResult]
+    seconds: float
+    usage: dict
+
+    def stats_line(self) -> str:
+        sources = Counter(q.source for q in self.queries)
+        query_ms = sum(q.elapsed_ms for q in self.queries)
+        return (
+            f"{self.seconds:.1f}s, {len(self.queries)} queries "
+            f"({sources['cache']} cached, {sources['extended']} extended, {sources['parseable']} new; "
+            f"{query_ms:.0f} ms), tokens: {self.usage.get('input_tokens', 0)} in, "
+            f"{self.usage.get('cache_read_input_tokens', 0)} cache read, "
+            f"{self.usage.get('cache_creation_input_tokens', 0)} cache write, "
+            f"{self.usage.get('output_tokens', 0)} out"
+        )
+
+
+class CopilotSession:
+    """A multi-turn copilot conversation with its own query result store."""
+
+    def __init__(
+        self,
+        ctx: ParseableContext,
+        streams: list[str] | None = None,
+        model: str = DEFAULT_MODEL,
+        window_minutes: int = DEFAULT_WINDOW_MINUTES,
+        end_time: datetime | None = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        max_tokens: int = MAX_TOKENS,
+        client: anthropic.Anthropic | None = None,
+        store: QueryResultStore | None = None,
+        system: str = SYSTEM_PROMPT,
+    ):
+        self.ctx = ctx
+        self.model = model
+        self.window_minutes = window_minutes
+        self.end_time = _utc(end_time) if end_time else None
+        self.token_budget = token_budget
+        self.max_tokens = max_tokens
+        self.store = store or QueryResultStore()
+        self.system = system
+        if streams:
+            self.system += "\n\nLog streams: " + ", ".join(streams)
+        self.messages: list[dict] = []
+        self.summary: list[str] = []
+        self.turns = 0
+        self.usage: Counter = Counter()
+        # tool_use_id -> (query_id, row count), for stubbing compacted results
+        self._tool_results: dict[str, tuple[str, int]] = {}
+        # Index of the message carrying the previous request's cache breakpoint.
+        self._breakpoint = -1
+        self._client = client
+
+    def client(self) -> anthropic.Anthropic:
+        if self._client is None:
+            if not os.environ.get("ANTHROPIC_API_KEY"):
+                raise RuntimeError("ANTHROPIC_API_KEY is not set")
+            try:
+                import anthropic
+            except ImportError:
+                raise ImportError("anthropic is required: pip install anthropic")
+            self._client = anthropic.Anthropic()
+        return self._client
+
+    def now(self) -> datetime:
+        return self.end_time or datetime.now(timezone.utc)
+
+    # -----------------------------------------------------------------
+    # Queries
+    # -----------------------------------------------------------------
+
+    def run_query(self, sql: str, minutes: int | None = None) -> QueryResult:
+        """Run sql over the last `minutes` (or its own relative predicate) via the store."""
+        stripped, relative = strip_relative_window(sql)
+        windows = [m for m in (minutes, relative) if m]
+        window = min(windows) if windows else self.window_minutes
+        end = self.now()
+        return self.store.run(self.ctx, stripped, (end - timedelta(minutes=window)).timestamp(), end.timestamp())
+
+    def _tool_result(self, block: dict) -> tuple[dict, QueryResult | None]:
+        params = block["input"]
+        try:
+            result = self.run_query(params["sql"], params.get("minutes"))
+        except Exception as exc:
+            return {
+                "type": "tool_result",
+                "tool_use_id": block["id"],
+                "content": f"Query failed: {exc}",
+                "is_error": True,
+            }, None
+        self._tool_results[block["id"]] = (result.query_id, len(result.rows))
+        payload = {
+            "query_id": result.query_id,
+            "window": result.window_text(),
+            "row_count": len(result.rows),
+            "rows": result.rows[:RESULT_ROWS_TO_CLAUDE],
+        }
+        if len(result.rows) > RESULT_ROWS_TO_CLAUDE:
+            payload["truncated"] = True
+        return {
+            "type": "tool_result",
+            "tool_use_id": block["id"],
+            "content": json.dumps(payload, default=str, separators=(",", ":")),
+        }, result
+
+    # -----------------------------------------------------------------
+    # Conversation
+    # -----------------------------------------------------------------
+
+    def _summary_block(self) -> dict:
+        return {
+            "type": "text",
+            "text": "Earlier in this session (older turns compacted):\n" + "\n".join(self.summary),
+        }
+
+    def request_params(self) -> dict:
+        """messages.create arguments with cache breakpoints on the stable prefix."""
+        messages = [dict(message, content=list(message["content"])) for message in self.messages]
+        if self.summary and messages:
+            messages[0]["content"].insert(0, self._summary_block())
+        # The previous request's breakpoint is read back from the cache; the
+        # newest one is written for the next request.
+        for index in {self._breakpoint, len(messages) - 1}:
+            if 0 <= index < len(messages):
+                block = dict(messages[index]["content"][-1], cache_control=EPHEMERAL)
+                messages[index]["content"][-1] = block
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "system": [{"type": "text", "text": self.system, "cache_control": EPHEMERAL}],
+            "tools": [RUN_SQL_TOOL],
+            "messages": messages,
+        }
+
+    def estimate_tokens(self) -> int:
+        chars = len(self.system) + sum(len(line) for line in self.summary)
+        chars += len(json.dumps(self.messages, default=str))
+        return int(chars / CHARS_PER_TOKEN)
+
+    def _turn_starts(self) -> list[int]:
+        return [
+            index
+            for index, message in enumerate(self.messages)
+            if message["role"] == "user" and any(block.get("type") == "text" for block in message["content"])
+        ]
+
+    def compact(self, target: int | None = None) -> bool:
+        """Shrink the history to about target tokens; True if anything changed."""
+        target = target if target is not None else int(self.token_budget * COMPACT_TARGET)
+        starts = self._turn_starts()
+        if len(starts) < 2 or self.estimate_tokens() <= target:
+            return False
+        # 1. Tool results of all but the latest turn become stubs; the rows stay in the store.
+        for message in self.messages[: starts[-1]]:
+            for index, block in enumerate(message["content"]):
+                if block.get("type") == "tool_result" and not block.get("is_error"):
+                    query_id, count = self._tool_results.get(block["tool_use_id"], ("?", 0))
+                    message["content"][index] = dict(
+                        block,
+                        content=f"[{count} rows, {query_id}: compacted; run the same query again to see them]",
+                    )
+        # 2. Fold the oldest turns into the written summary.
+        keep = starts[-KEEP_RECENT_TURNS] if len(starts) >= KEEP_RECENT_TURNS else starts[0]
+        if self.estimate_tokens() > target and keep > 0:
+            folded, self.messages = self.messages[:keep], self.messages[keep:]
+            self.summary.extend(self._summarize(folded))
+        self._breakpoint = -1
+        return True
+
+    def _summarize(self, messages: list[dict]) -> list[str]:
+        lines = []
+        for message in messages:
+            for block in message["content"]:
+                kind = block.get("type")
+                if kind == "text" and message["role"] == "user":
+                    lines.append(f"- Engineer: {_clip(block['text'], 400)}")
+                elif kind == "text":
+                    lines.append(f"- Copilot: {_clip(block['text'], 1200)}")
+                elif kind == "tool_use":
+                    query_id, count = self._tool_results.get(block["id"], ("?", 0))
+                    lines.append(f"- Copilot ran {query_id} ({count} rows): {_clip(block['input'].get('sql', ''), 300)}")
+        return lines
+
+    def _call(self, on_text: Callable[[str], None] | None):
+        params = self.request_params()
+        client = self.client()
+        if on_text is None:
+            response = client.messages.create(**params)
+        else:
+            with client.messages.stream(**params) as stream:
+                for text in stream.text_stream:
+                    on_text(text)
+                response = stream.get_final_message()
+        self._breakpoint = len(self.messages) - 1
+        return response
+
+    def ask(self, text: str, on_text: Callable[[str], None] | None = None) -> TurnResult:
+        """Send one engineer message; run any queries Claude asks for; return the reply."""
+        started = time.perf_counter()
+        if self.estimate_tokens() > self.token_budget:
+            self.compact()
+        mark = len(self.messages)
+        self.messages.append({"role": "user", "content": [{"type": "text", "text": text}]})
+        queries: list[QueryResult] = []
+        usage: Counter = Counter()
+        reply = []
+        try:
+            for _ in range(MAX_TOOL_ROUNDS):
+                response = self._call(on_text)
+                for name in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+                    usage[name] += getattr(response.usage, name, 0) or 0
+                content = []
+                for block in response.content:
+                    if block.type == "text":
+                        content.append({"type": "text", "text": block.text})
+                        reply.append(block.text)
+                    elif block.type == "tool_use":
+                        content.append({"type": "tool_use", "id": block.id, "name": block.name, "input": block.input})
+                self.messages.append({"role": "assistant", "content": content})
+                tool_uses = [block for block in content if block["type"] == "tool_use"]
+                if response.stop_reason != "tool_use" or not tool_uses:
+                    break
+                with ThreadPoolExecutor(max_workers=len(tool_uses)) as pool:
+                    results = list(pool.map(self._tool_result, tool_uses))
+                queries.extend(result for _, result in results if result is not None)
+                self.messages.append({"role": "user", "content": [block for block, _ in results]})
+                if on_text:
+                    on_text("\n")
+        except Exception:
+            # Drop the failed turn so the history still alternates user/assistant.
+            del self.messages[mark:]
+            self._breakpoint = min(self._breakpoint, mark - 1)
+            raise
+        self.turns += 1
+        self.usage.update(usage)
+        return TurnResult("\n".join(reply), queries, time.perf_counter() - started, dict(usage))
+
+    # -----------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {
+            "model": self.model,
+            "window_minutes": self.window_minutes,
+            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "system": self.system,
+            "summary": self.summary,
+            "messages": self.messages,
+            "turns": self.turns,
+            "tool_results": self._tool_results,
+            "store": self.store.to_dict(),
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, default=str)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, ctx: ParseableContext, **kwargs) -> "CopilotSession":
+        with open(path) as f:
+            state = json.load(f)
+        kwargs.setdefault("model", state["model"])
+        kwargs.setdefault("window_minutes", state["window_minutes"])
+        if state.get("end_time"):
+            kwargs.setdefault("end_time", _parse_time(state["end_time"]))
+        session = cls(ctx, system=state["system"], **kwargs)
+        session.summary = state["summary"]
+        session.messages = state["messages"]
+        session.turns = state["turns"]
+        session._tool_results = {key: tuple(value) for key, value in state["tool_results"].items()}
+        session.store.load_dict(state["store"])
+        return session
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def load_experiment_turns(path: str) -> list[str]:
+    """Engineer messages of a multi-turn prompt.md (experiment 09 format)."""
+    with open(path) as f:
+        text = f.read()
+    turns = []
+    for section in re.split(r"^## Turn \d+\s*$", text, flags=re.M)[1:]:
+        parts = []
+        alert = re.search(r"\*\*Alert Context:\*\*\s*```\w*\n(.*?)```", section, re.S)
+        if alert:
+            parts.append(alert.group(1).strip())
+        message = re.search(r"\*\*User Message:\*\*\s*(.*?)(?:\n---|\Z)", section, re.S)
+        if message:
+            parts.append(message.group(1).strip().strip('"'))
+        turns.append("\n\n".join(parts))
+    return turns
+
+
+def _print_result(result: QueryResult) -> None:
+    print(json.dumps(result.rows[:20], indent=2, default=str))
+    print(
+        f"[{result.query_id}: {len(result.rows)} rows, {result.source}, {result.elapsed_ms:.0f} ms, "
+        f"{result.queried_seconds / 60:.0f} min queried]",
+        file=sys.stderr,
+    )
+
+
+def _handle_command(session: CopilotSession, line: str) -> bool:
+    """REPL slash commands; False to quit."""
+    command, _, rest = line.partition(" ")
+    if command in ("/quit", "/exit"):
+        return False
+    if command == "/sql":
+        try:
+            _print_result(session.run_query(rest))
+        except Exception as exc:
+            print(f"Query failed: {exc}", file=sys.stderr)
+    elif command == "/compact":
+        changed = session.compact(target=0)
+        print(f"{'Compacted' if changed else 'Nothing to compact'}; ~{session.estimate_tokens()} tokens", file=sys.stderr)
+    elif command == "/stats":
+        print(
+            f"{session.turns} turns, ~{session.estimate_tokens()} tokens of history, "
+            f"{len(session.store.entries)} stored results, store {dict(session.store.stats)}, "
+            f"usage {dict(session.usage)}",
+            file=sys.stderr,
+        )
+    else:
+        print("Commands: /sql <query>, /stats, /compact, /quit", file=sys.stderr)
+    return True
+
+
+def _ask(session: CopilotSession, text: str, session_path: str | None) -> None:
+    result = session.ask(text, on_text=lambda chunk: print(chunk, end="", flush=True))
+    print()
+    print(f"[turn {session.turns}: {result.stats_line()}]", file=sys.stderr)
+    if session_path:
+        session.save(session_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Interactive on-call copilot over Parseable.")
+    parser.add_argument("--streams", default="", help="Comma-separated log streams to tell Claude about")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"Claude model (default: {DEFAULT_MODEL})")
+    parser.add_argument(
+        "--minutes",
+        type=int,
+        default=DEFAULT_WINDOW_MINUTES,
+        help=f"Default query window in minutes (default: {DEFAULT_WINDOW_MINUTES})",
+    )
+    parser.add_argument("--end", help="Pin 'now' to this ISO timestamp (replaying a past incident)")
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f"Estimated history tokens before older turns are compacted (default: {DEFAULT_TOKEN_BUDGET})",
+    )
+    parser.add_argument("--session", help="Session file to resume from and save to after every turn")
+    parser.add_argument("--replay", help="Send the engineer turns of a multi-turn prompt.md, then exit")
+    parser.add_argument("--dry-run", action="store_true", help="Print the replay turns and request layout only")
+    args = parser.parse_args()
+
+    from parseable_context_builder import ParseableContext
+
+    ctx = ParseableContext()
+    options = {
+        "streams": [s.strip() for s in args.streams.split(",") if s.strip()],
+        "model": args.model,
+        "window_minutes": args.minutes,
+        "end_time": _parse_time(args.end) if args.end else None,
+        "token_budget": args.token_budget,
+    }
+    if args.session and os.path.exists(args.session):
+        session = CopilotSession.load(args.session, ctx, token_budget=args.token_budget)
+        print(f"Resumed {args.session}: {session.turns} turns, {len(session.store.entries)} stored results", file=sys.stderr)
+    else:
+        session = CopilotSession(ctx, **options)
+
+    turns = load_experiment_turns(args.replay) if args.replay else []
+    if args.dry_run:
+        for number, text in enumerate(turns, 1):
+            session.messages.append({"role": "user", "content": [{"type": "text", "text": text}]})
+            session.messages.append({"role": "assistant", "content": [{"type": "text", "text": "..."}]})
+            print(f"--- Turn {number} ({len(text)} chars)\n{text}\n")
+        session.messages = session.messages[:-1]
+        params = session.request_params()
+        marked = [i for i, m in enumerate(params["messages"]) if "cache_control" in m["content"][-1]]
+        print(
+            f"Model {params['model']}, system prompt {len(session.system)} chars (cached), "
+            f"{len(params['messages'])} messages, cache breakpoints on messages {marked}, "
+            f"~{session.estimate_tokens()} tokens of history"
+        )
+        return
+
+    try:
+        if turns:
+            for text in turns:
+                print(f"\n>>> {_clip(text, 200)}\n")
+                _ask(session, text, args.session)
+            return
+        print("Copilot ready. Ask a question, or /sql <query>, /stats, /compact, /quit.", file=sys.stderr)
+        while True:
+            try:
+                line = input("> ").strip()
+            except EOFError:
+                break
+            if not line:
+                continue
+            if line.startswith("/"):
+                if not _handle_command(session, line):
+                    break
+                continue
+            try:
+                _ask(session, line, args.session)
+            except RuntimeError as exc:
+                # /sql keeps working without an API key
+                print(f"Error: {exc}", file=sys.stderr)
+    except (RuntimeError, ImportError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        ctx.close()
+
+
+if __name__ == "__main__":
+    main()
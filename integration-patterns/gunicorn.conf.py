@@ -0,0 +1,69 @@
+"""
+Gunicorn configuration for the alert webhook (Pattern 1) in production.
+
+Runs alert_webhook_claude:app under several worker processes so one slow
+Claude analysis no longer blocks the whole service. Workers share dedup,
+context-cache, rate-limit and in-flight state through the SQLite WAL file
+at WEBHOOK_STATE_DB.
+
+Usage (from the repository root):
+    pip install gunicorn
+    gunicorn -c integration-patterns/gunicorn.conf.py
+
+Environment variables:
+    PORT                   - listen port (default: 5001)
+    WEB_CONCURRENCY        - worker processes (default: CPU count)
+    WEBHOOK_THREADS        - threads per worker (default: 4)
+    DRAIN_TIMEOUT_SECONDS  - graceful shutdown window (default: 120)
+"""
+
+import multiprocessing
+import os
+import threading
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+wsgi_app = "alert_webhook_claude:app"
+pythonpath = _HERE
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("WEBHOOK_THREADS", "4"))
+
+# Claude analyses can take a minute or more; don't let the arbiter kill them.
+timeout = 300
+# On SIGTERM gunicorn stops accepting connections and waits this long for
+# in-flight requests. Anything still running after that stays journaled in
+# the shared state DB and is recovered by the next worker that boots.
+graceful_timeout = int(os.environ.get("DRAIN_TIMEOUT_SECONDS", "120"))
+
+accesslog = "-"
+
+
+def post_worker_init(worker):
+    """Pick up orphaned alerts and start this worker's Slack deliverer."""
+    import alert_webhook_claude
+
+    threading.Thread(
+        target=alert_webhook_claude.recover_orphaned_jobs,
+        daemon=True,
+    ).start()
+    if alert_webhook_claude.SLACK_WEBHOOK_URL:
+        # Drain any Slack messages queued before a restart.
+        alert_webhook_claude._get_slack_deliverer()
+
+
+def worker_int(worker):
+    """Refuse new alerts while the worker finishes what it has (SIGINT/SIGQUIT)."""
+    import alert_webhook_claude
+
+    alert_webhook_claude.begin_draining(timeout=graceful_timeout)
+
+
+def worker_exit(server, worker):
+    """Give queued Slack messages a last chance before the worker goes away."""
+    import alert_webhook_claude
+
+    if alert_webhook_claude._slack_deliverer is not None:
+        alert_webhook_claude._slack_deliverer.flush(timeout=10)
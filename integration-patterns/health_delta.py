@@ -0,0 +1,236 @@
+"""
+Delta-only health summaries against persisted previous state
+
+Instead of sending every cycle's full query results to Claude, keep a
+compact aggregate of the previous cycle per stream (plus a digest of the
+previous summary) and send only what changed: new, resolved and
+dropped-out-of-top-N error messages, error-rate and volume movement, and services that appeared or
+vanished. Claude gets trend context across cycles and a much smaller
+prompt.
+
+Usage:
+    from health_delta import DeltaTracker
+
+    tracker = DeltaTracker(".state/health_previous.json")
+    payload = tracker.delta_payload(all_stream_results)   # None on first run
+    # Streams without previous state are sent in full ("new_stream": True).
+    ...
+    tracker.record(all_stream_results, summary_text)
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+ERROR_LEVELS = ("error", "ERROR", "Error")
+# Relative change below which a count is reported as unchanged.
+CHANGE_THRESHOLD = 0.25
+MAX_LISTED = 10
+# Rows returned by the top_errors / slow_operations health queries.
+TOP_MESSAGES = 10
+
+
+def aggregate_stream(results: dict[str, dict]) -> dict:
+    """Reduce one stream's health query results to a compact comparable form."""
+    volume = {
+        str(r.get("level")): int(r.get("count", 0) or 0)
+        for r in results.get("log_volume", {}).get("data", [])
+    }
+    rate_rows = results.get("error_rate", {}).get("data", [])
+    total = sum(int(r.get("total", 0) or 0) for r in rate_rows)
+    errors = sum(int(r.get("errors", 0) or 0) for r in rate_rows)
+    services: dict[str, dict] = {}
+    for r in results.get("service_health", {}).get("data", []):
+        svc = r.get("service_name")
+        if svc is None:
+            continue
+        entry = services.setdefault(svc, {"total": 0, "errors": 0})
+        entry["total"] += int(r.get("count", 0) or 0)
+        if r.get("level") in ERROR_LEVELS:
+            entry["errors"] += int(r.get("count", 0) or 0)
+    return {
+        "volume_by_level": volume,
+        "total": total,
+        "errors": errors,
+        "error_ratio": round(errors / total, 6) if total else 0.0,
+        "minutes": len(rate_rows),
+        "top_errors": {
+            str(r.get("message")): int(r.get("count", 0) or 0)
+            for r in results.get("top_errors", {}).get("data", [])
+        },
+        "top_warnings": {
+            str(r.get("message")): int(r.get("count", 0) or 0)
+            for r in results.get("slow_operations", {}).get("data", [])
+        },
+        "services": services,
+        "failed_queries": sorted(n for n, r in results.items() if r.get("error")),
+    }
+
+
+def _pct_change(before: float, after: float) -> float | None:
+    if before == 0:
+        return None if after == 0 else float("inf")
+    return (after - before) / before
+
+
+def _fmt_change(before: float, after: float) -> str:
+    change = _pct_change(before, after)
+    if change is None:
+        return "unchanged (0)"
+    if change == float("inf"):
+        return f"new ({after:g})"
+    return f"{before:g} -> {after:g} ({change:+.0%})"
+
+
+def _message_deltas(before: dict[str, int], after: dict[str, int]) -> dict:
+    changed = {}
+    for msg in set(before) & set(after):
+        change = _pct_change(before[msg], after[msg])
+        if change is not None and abs(change) >= CHANGE_THRESHOLD:
+            changed[msg] = _fmt_change(before[msg], after[msg])
+    new = sorted(set(after) - set(before), key=lambda m: -after[m])[:MAX_LISTED]
+    gone = sorted(set(before) - set(after))[:MAX_LISTED]
+    # Only a short list is complete; a message missing from a full top-N list
+    # may still be occurring below the cut-off.
+    complete = len(after) < TOP_MESSAGES
+    return {
+        "new": {m: after[m] for m in new},
+        "resolved": gone if complete else [],
+        "dropped_out_of_top": [] if complete else gone,
+        "changed": dict(list(changed.items())[:MAX_LISTED]),
+    }
+
+
+def compute_stream_delta(prev: dict, curr: dict) -> dict:
+    """Structured changes between two aggregate_stream() results."""
+    delta: dict = {
+        "records": _fmt_change(prev["total"], curr["total"]),
+        "error_ratio": f"{prev['error_ratio']:.2%} -> {curr['error_ratio']:.2%}",
+    }
+    levels = {}
+    for level in sorted(set(prev["volume_by_level"]) | set(curr["volume_by_level"])):
+        before = prev["volume_by_level"].get(level, 0)
+        after = curr["volume_by_level"].get(level, 0)
+        change = _pct_change(before, after)
+        if change is not None and abs(change) >= CHANGE_THRESHOLD:
+            levels[level] = _fmt_change(before, after)
+    if levels:
+        delta["volume_by_level"] = levels
+
+    errors = _message_deltas(prev["top_errors"], curr["top_errors"])
+    if any(errors.values()):
+        delta["error_messages"] = errors
+    warnings = _message_deltas(prev["top_warnings"], curr["top_warnings"])
+    if any(warnings.values()):
+        delta["warning_messages"] = warnings
+
+    appeared = sorted(set(curr["services"]) - set(prev["services"]))
+    vanished = sorted(set(prev["services"]) - set(curr["services"]))
+    if appeared:
+        delta["services_appeared"] = appeared
+    if vanished:
+        delta["services_vanished"] = vanished
+    svc_changes = {}
+    for svc in sorted(set(prev["services"]) & set(curr["services"])):
+        p, c = prev["services"][svc], curr["services"][svc]
+        p_ratio = p["errors"] / p["total"] if p["total"] else 0.0
+        c_ratio = c["errors"] / c["total"] if c["total"] else 0.0
+        if abs(c_ratio - p_ratio) >= 0.01:
+            svc_changes[svc] = f"error ratio {p_ratio:.1%} -> {c_ratio:.1%}"
+    if svc_changes:
+        delta["service_error_changes"] = svc_changes
+    if curr["failed_queries"]:
+        delta["failed_queries"] = curr["failed_queries"]
+    return delta
+
+
+def summary_digest(summary: str, max_chars: int = 800) -> str:
+    """Compact digest of a previous summary: headings and status lines."""
+    keep = [
+        line.strip()
+        for line in summary.splitlines()
+        if re.match(r"\s*(#|.*\*\*(Overall Status|Status|Alerts?)\*\*)", line)
+    ]
+    digest = "\n".join(keep) if keep else summary.strip()
+    return digest[:max_chars]
+
+
+class DeltaTracker:
+    """Persists per-stream aggregates and summary digests between cycles."""
+
+    def __init__(self, state_path: str):
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self.state: dict = {"streams": {}, "summaries": {}}
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                self.state.update(json.load(f))
+
+    @staticmethod
+    def _group_key(streams) -> str:
+        return ",".join(sorted(streams))
+
+    def _digest_for(self, streams) -> dict:
+        """Digest recorded for exactly these streams, else the latest covering any of them."""
+        summaries = self.state["summaries"]
+        exact = summaries.get(self._group_key(streams))
+        if exact:
+            return exact
+        overlapping = [
+            entry
+            for key, entry in summaries.items()
+            if set(key.split(",")) & set(streams)
+        ]
+        return max(overlapping, key=lambda e: e["recorded_at"], default={})
+
+    def delta_payload(self, all_stream_results: dict[str, dict[str, dict]]) -> dict | None:
+        """Build the Claude payload of deltas, or None if there is no previous state."""
+        with self._lock:
+            previous = self.state["streams"]
+            if not any(s in previous for s in all_stream_results):
+                return None
+            streams = {}
+            for stream, results in all_stream_results.items():
+                curr = aggregate_stream(results)
+                prev = previous.get(stream)
+                current = {
+                    "records": curr["total"],
+                    "error_ratio": f"{curr['error_ratio']:.2%}",
+                    "top_error": next(iter(curr["top_errors"]), None),
+                }
+                if prev is None:
+                    # Nothing to diff against: send the stream's full results.
+                    streams[stream] = {"new_stream": True, "results": results}
+                else:
+                    streams[stream] = {
+                        "since": prev["recorded_at"],
+                        "current": current,
+                        "changes": compute_stream_delta(prev["aggregate"], curr),
+                    }
+            digest = self._digest_for(all_stream_results)
+            return {
+                "previous_summary_at": digest.get("recorded_at"),
+                "previous_summary_digest": digest.get("digest", ""),
+                "streams": streams,
+            }
+
+    def record(self, all_stream_results: dict[str, dict[str, dict]], summary: str) -> None:
+        """Persist this cycle's aggregates and summary digest."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            for stream, results in all_stream_results.items():
+                self.state["streams"][stream] = {
+                    "recorded_at": now,
+                    "aggregate": aggregate_stream(results),
+                }
+            self.state["summaries"][self._group_key(all_stream_results)] = {
+                "recorded_at": now,
+                "digest": summary_digest(summary),
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.state_path)
@@ -0,0 +1,228 @@
+"""
+Drift-free, fixed-rate scheduler for periodic health summaries
+
+Ticks are aligned to wall-clock boundaries (a 15-minute group fires at
+:00, :15, :30, :45 plus a small per-group offset), so a cycle's own run
+time never pushes the next one later. Every group also runs once at
+startup, so the first summary doesn't wait for a boundary. Each group of streams has its own
+interval, a tick that arrives while the group's previous run is still
+going is skipped rather than queued, and the scheduler records missed
+ticks and start lag per group.
+
+Usage:
+    from health_scheduler import FixedRateScheduler, ScheduleGroup
+
+    groups = [
+        ScheduleGroup("critical", interval_minutes=1, streams=["payments"]),
+        ScheduleGroup("default", interval_minutes=15, streams=["otel-logs", "traces"]),
+    ]
+    scheduler = FixedRateScheduler(groups, run_group=lambda g: run_once(g.streams, ...))
+    scheduler.run_forever()
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduleGroup:
+    """A set of streams summarized together on one interval."""
+
+    name: str
+    interval_minutes: int
+    streams: list[str] = field(default_factory=list)
+    # Upper bound of the stable per-group start offset after each boundary.
+    jitter_seconds: float = 10.0
+
+    # Runtime state, maintained by the scheduler.
+    next_tick: float = 0.0
+    running: bool = False
+    runs: int = 0
+    failures: int = 0
+    missed_ticks: int = 0
+    last_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
+    last_duration_seconds: float = 0.0
+
+    def __post_init__(self):
+        if self.interval_minutes < 1:
+            raise ValueError(
+                f"Schedule group '{self.name}' interval must be at least 1 minute, "
+                f"got {self.interval_minutes}"
+            )
+
+    @property
+    def interval_seconds(self) -> float:
+        return self.interval_minutes * 60.0
+
+    @property
+    def offset_seconds(self) -> float:
+        """Deterministic jitter so groups sharing a boundary don't fire together."""
+        if self.jitter_seconds <= 0:
+            return 0.0
+        digest = hashlib.sha256(self.name.encode("utf-8")).digest()
+        fraction = int.from_bytes(digest[:4], "big") / 2**32
+        return min(self.jitter_seconds, self.interval_seconds / 2) * fraction
+
+
+def parse_schedule(
+    spec: str,
+    streams: list[str],
+    default_interval: int,
+    jitter_seconds: float = 10.0,
+) -> list[ScheduleGroup]:
+    """Build schedule groups from a "stream=minutes,..." override spec.
+
+    Streams without an override use default_interval. Streams sharing an
+    interval are grouped so they get one combined summary per tick.
+    """
+    overrides: dict[str, int] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        stream, _, minutes = item.partition("=")
+        if not minutes:
+            raise ValueError(f"Invalid schedule entry '{item}' (expected stream=minutes)")
+        try:
+            overrides[stream.strip()] = int(minutes)
+        except ValueError:
+            raise ValueError(f"Invalid schedule entry '{item}' (minutes must be an integer)") from None
+        if overrides[stream.strip()] < 1:
+            raise ValueError(f"Invalid schedule entry '{item}' (minutes must be at least 1)")
+
+    by_interval: dict[int, list[str]] = {}
+    for stream in list(streams) + [s for s in overrides if s not in streams]:
+        by_interval.setdefault(overrides.get(stream, default_interval), []).append(stream)
+
+    return [
+        ScheduleGroup(
+            name=f"every-{interval}m",
+            interval_minutes=interval,
+            streams=group_streams,
+            jitter_seconds=jitter_seconds,
+        )
+        for interval, group_streams in sorted(by_interval.items())
+    ]
+
+
+class FixedRateScheduler:
+    """Runs each ScheduleGroup on wall-clock-aligned ticks without overlap."""
+
+    def __init__(
+        self,
+        groups: list[ScheduleGroup],
+        run_group: Callable[[ScheduleGroup], None],
+        clock: Callable[[], float] = time.time,
+        on_cycle_complete: Callable[[dict], None] | None = None,
+        run_at_start: bool = True,
+    ):
+        self.groups = groups
+        self.run_group = run_group
+        self.clock = clock
+        self.on_cycle_complete = on_cycle_complete
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, len(groups)),
+            thread_name_prefix="health-group",
+        )
+        now = self.clock()
+        for group in groups:
+            if run_at_start:
+                # Due right away; tick() then realigns it to the boundaries.
+                group.next_tick = now - group.offset_seconds
+            else:
+                group.next_tick = self._next_boundary(now - group.offset_seconds, group)
+
+    @staticmethod
+    def _next_boundary(now: float, group: ScheduleGroup) -> float:
+        """First interval boundary strictly after now."""
+        interval = group.interval_seconds
+        return (math.floor(now / interval) + 1) * interval
+
+    def due_at(self, group: ScheduleGroup) -> float:
+        return group.next_tick + group.offset_seconds
+
+    def tick(self) -> float:
+        """Fire every group that is due; return seconds until the next due group."""
+        now = self.clock()
+        for group in self.groups:
+            due = self.due_at(group)
+            if now < due:
+                continue
+
+            # Ticks that passed entirely while we were not looking count as missed.
+            behind = math.floor((now - due) / group.interval_seconds)
+            with self._lock:
+                if group.running:
+                    group.missed_ticks += 1 + behind
+                    logger.warning(
+                        "Group '%s' still running at its %s tick -- skipping",
+                        group.name,
+                        time.strftime("%H:%M:%S", time.gmtime(due)),
+                    )
+                else:
+                    group.missed_ticks += behind
+                    group.running = True
+                    group.last_lag_seconds = now - due
+                    group.max_lag_seconds = max(group.max_lag_seconds, now - due)
+                    self._pool.submit(self._run, group)
+            group.next_tick = self._next_boundary(now - group.offset_seconds, group)
+
+        next_due = min(self.due_at(g) for g in self.groups)
+        return max(0.0, next_due - self.clock())
+
+    def _run(self, group: ScheduleGroup) -> None:
+        start = time.monotonic()
+        try:
+            self.run_group(group)
+        except Exception as exc:
+            group.failures += 1
+            logger.error("Health summary cycle for group '%s' failed: %s", group.name, exc)
+        finally:
+            with self._lock:
+                group.runs += 1
+                group.last_duration_seconds = time.monotonic() - start
+                group.running = False
+            metrics = self.metrics()
+            logger.info("Scheduler metrics: %s", metrics[group.name])
+            if self.on_cycle_complete:
+                self.on_cycle_complete(metrics)
+
+    def run_forever(self) -> None:
+        """Tick until stop() is called, then wait for running groups to finish."""
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(timeout=self.tick())
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def metrics(self) -> dict[str, dict]:
+        """Per-group run counts, missed ticks, start lag and last duration."""
+        with self._lock:
+            return {
+                group.name: {
+                    "interval_minutes": group.interval_minutes,
+                    "streams": list(group.streams),
+                    "runs": group.runs,
+                    "failures": group.failures,
+                    "missed_ticks": group.missed_ticks,
+                    "running": group.running,
+                    "last_lag_seconds": round(group.last_lag_seconds, 3),
+                    "max_lag_seconds": round(group.max_lag_seconds, 3),
+                    "last_duration_seconds": round(group.last_duration_seconds, 3),
+                    "next_run_at": time.strftime(
+                        "%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.due_at(group))
+                    ),
+                }
+                for group in self.groups
+            }
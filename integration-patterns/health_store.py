@@ -0,0 +1,285 @@
+"""
+Embedded time-series store for health metrics history
+
+Persists the numbers behind each health summary in a local SQLite file so
+multi-day trend questions are a local read instead of a wide Parseable
+scan:
+
+- per-minute records and error counts per stream (from `error_rate`)
+- per-cycle volume by level and per-service totals/errors
+- rollups 1m -> 1h -> 1d, and retention per resolution
+
+Usage:
+    from health_store import HealthStore
+
+    store = HealthStore(".state/health_history.db")
+    store.record_cycle("otel-logs", stream_results, window_minutes=15)
+    store.rollup()
+    store.apply_retention()
+
+    store.query("otel-logs", "errors", since_hours=48, resolution="1h")
+    store.trend_digest("otel-logs", days=7)
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from sqlite_conn import ThreadConnections
+
+RESOLUTION_SECONDS = {"1m": 60, "1h": 3600, "1d": 86400}
+# Retention per resolution in days.
+DEFAULT_RETENTION_DAYS = {"1m": 2, "1h": 30, "1d": 400}
+CYCLE_RETENTION_DAYS = 30
+# Windows of successive cycles closer than this are treated as adjacent.
+SEAM_TOLERANCE_SECONDS = 10
+ERROR_LEVELS = ("error", "ERROR", "Error")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    resolution TEXT    NOT NULL,
+    stream     TEXT    NOT NULL,
+    metric     TEXT    NOT NULL,
+    bucket     INTEGER NOT NULL,
+    value      REAL    NOT NULL,
+    PRIMARY KEY (resolution, stream, metric, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cycles (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    stream         TEXT    NOT NULL,
+    recorded_at    INTEGER NOT NULL,
+    window_minutes INTEGER NOT NULL,
+    records        INTEGER NOT NULL,
+    errors         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cycles_stream_at ON cycles (stream, recorded_at);
+CREATE TABLE IF NOT EXISTS cycle_counts (
+    cycle_id INTEGER NOT NULL REFERENCES cycles (id) ON DELETE CASCADE,
+    kind     TEXT    NOT NULL,  -- 'level' | 'service' | 'service_errors'
+    dim      TEXT    NOT NULL,
+    count    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cycle_counts_cycle ON cycle_counts (cycle_id);
+"""
+
+
+def parse_bucket(value) -> int | None:
+    """Parse a Parseable minute_bucket value into epoch seconds (UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        # Epoch seconds or milliseconds
+        return int(value / 1000 if value > 1e11 else value)
+    text = str(value).strip().replace(" ", "T")
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class HealthStore:
+    """SQLite-backed history of health metrics with rollups and retention."""
+
+    def __init__(self, path: str, retention_days: dict[str, int] | None = None):
+        self.path = path
+        self.retention_days = {**DEFAULT_RETENTION_DAYS, **(retention_days or {})}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = ThreadConnections(path, busy_timeout_ms=10_000, pragmas=("foreign_keys=ON",))
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        return self._db.get()
+
+    # -----------------------------------------------------------------
+    # Writes
+    # -----------------------------------------------------------------
+
+    def record_cycle(
+        self,
+        stream: str,
+        results: dict[str, dict],
+        window_minutes: int,
+        recorded_at: float | None = None,
+    ) -> int:
+        """Persist one stream's health query results; returns the cycle id.
+
+        Per-minute samples are merged with what earlier cycles stored. When
+        this window starts where the previous cycle's ended, the minute
+        they share holds two partial counts, which are added. Minutes
+        covered by overlapping windows keep the larger count instead of
+        being doubled.
+        """
+        recorded_at = int(time.time() if recorded_at is None else recorded_at)
+        window_start = recorded_at - window_minutes * 60
+        minute_rows = []
+        records = errors = 0
+        for row in results.get("error_rate", {}).get("data", []):
+            bucket = parse_bucket(row.get("minute_bucket"))
+            if bucket is None:
+                continue
+            total = int(row.get("total", 0) or 0)
+            errs = int(row.get("errors", 0) or 0)
+            records += total
+            errors += errs
+            minute_rows.append(("1m", stream, "records", bucket, total))
+            minute_rows.append(("1m", stream, "errors", bucket, errs))
+
+        counts = []
+        for row in results.get("log_volume", {}).get("data", []):
+            counts.append(("level", str(row.get("level")), int(row.get("count", 0) or 0)))
+        for row in results.get("service_health", {}).get("data", []):
+            service = row.get("service_name")
+            if service is None:
+                continue
+            count = int(row.get("count", 0) or 0)
+            counts.append(("service", service, count))
+            if row.get("level") in ERROR_LEVELS:
+                counts.append(("service_errors", service, count))
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (previous_end,) = conn.execute(
+                "SELECT MAX(recorded_at) FROM cycles WHERE stream = ?", (stream,)
+            ).fetchone()
+            adjacent = (
+                previous_end is not None
+                and previous_end <= window_start + SEAM_TOLERANCE_SECONDS
+            )
+            seam = window_start // 60 * 60 if adjacent else None
+            conn.executemany(
+                "INSERT INTO samples (resolution, stream, metric, bucket, value) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (resolution, stream, metric, bucket) DO UPDATE SET value = "
+                "CASE WHEN excluded.bucket IS ? THEN value + excluded.value "
+                "ELSE MAX(value, excluded.value) END",
+                [(*row, seam) for row in minute_rows],
+            )
+            cycle_id = conn.execute(
+                "INSERT INTO cycles (stream, recorded_at, window_minutes, records, errors) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (stream, recorded_at, window_minutes, records, errors),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO cycle_counts (cycle_id, kind, dim, count) VALUES (?, ?, ?, ?)",
+                [(cycle_id, kind, dim, count) for kind, dim, count in counts],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return int(cycle_id)
+
+    def rollup(self, now: float | None = None) -> None:
+        """Recompute recent 1h buckets from 1m and 1d buckets from 1h.
+
+        Only buckets that may still be changing are recomputed, so this is
+        cheap enough to run after every cycle.
+        """
+        now = int(time.time() if now is None else now)
+        conn = self._conn()
+        for source, target, lookback in (("1m", "1h", 2 * 3600), ("1h", "1d", 2 * 86400)):
+            size = RESOLUTION_SECONDS[target]
+            since = (now - lookback) // size * size
+            conn.execute(
+                "INSERT OR REPLACE INTO samples (resolution, stream, metric, bucket, value) "
+                "SELECT ?, stream, metric, (bucket / ?) * ?, SUM(value) "
+                "FROM samples WHERE resolution = ? AND bucket >= ? "
+                "GROUP BY stream, metric, (bucket / ?) * ?",
+                (target, size, size, source, since, size, size),
+            )
+
+    def apply_retention(self, now: float | None = None) -> int:
+        """Delete samples and cycles past their retention; returns rows removed."""
+        now = int(time.time() if now is None else now)
+        conn = self._conn()
+        removed = 0
+        for resolution, days in self.retention_days.items():
+            removed += conn.execute(
+                "DELETE FROM samples WHERE resolution = ? AND bucket < ?",
+                (resolution, now - days * 86400),
+            ).rowcount
+        removed += conn.execute(
+            "DELETE FROM cycles WHERE recorded_at < ?",
+            (now - CYCLE_RETENTION_DAYS * 86400,),
+        ).rowcount
+        return removed
+
+    # -----------------------------------------------------------------
+    # Reads
+    # -----------------------------------------------------------------
+
+    def query(
+        self,
+        stream: str,
+        metric: str,
+        since_hours: float = 24,
+        resolution: str = "auto",
+        until: float | None = None,
+    ) -> list[dict]:
+        """Return [{"bucket": iso, "value": n}] for a stream metric.
+
+        resolution="auto" picks 1m up to 6 hours, 1h up to 7 days, else 1d.
+        """
+        until = int(time.time() if until is None else until)
+        if resolution == "auto":
+            resolution = "1m" if since_hours <= 6 else "1h" if since_hours <= 168 else "1d"
+        if resolution not in RESOLUTION_SECONDS:
+            raise ValueError(f"Unknown resolution '{resolution}'")
+        rows = self._conn().execute(
+            "SELECT bucket, value FROM samples "
+            "WHERE resolution = ? AND stream = ? AND metric = ? AND bucket >= ? AND bucket <= ? "
+            "ORDER BY bucket",
+            (resolution, stream, metric, int(until - since_hours * 3600), until),
+        ).fetchall()
+        return [{"bucket": _iso(b), "value": v} for b, v in rows]
+
+    def cycle_totals(self, stream: str, since_hours: float = 24) -> dict[str, dict[str, int]]:
+        """Summed per-cycle counts by kind ('level', 'service', 'service_errors')."""
+        rows = self._conn().execute(
+            "SELECT cc.kind, cc.dim, SUM(cc.count) FROM cycle_counts cc "
+            "JOIN cycles c ON c.id = cc.cycle_id "
+            "WHERE c.stream = ? AND c.recorded_at >= ? "
+            "GROUP BY cc.kind, cc.dim",
+            (stream, int(time.time() - since_hours * 3600)),
+        ).fetchall()
+        totals: dict[str, dict[str, int]] = {}
+        for kind, dim, count in rows:
+            totals.setdefault(kind, {})[dim] = int(count)
+        return totals
+
+    def trend_digest(self, stream: str, days: int = 7) -> dict:
+        """Compact multi-day trend for prompts: daily and last-24h hourly error ratios."""
+        def series(metric: str, resolution: str, since_hours: float) -> dict[str, float]:
+            rows = self.query(stream, metric, since_hours, resolution)
+            return {r["bucket"]: r["value"] for r in rows}
+
+        def ratios(resolution: str, since_hours: float) -> list[dict]:
+            records = series("records", resolution, since_hours)
+            errors = series("errors", resolution, since_hours)
+            return [
+                {
+                    "bucket": bucket,
+                    "records": int(total),
+                    "error_ratio": round(errors.get(bucket, 0) / total, 4) if total else 0.0,
+                }
+                for bucket, total in sorted(records.items())
+            ]
+
+        return {
+            "stream": stream,
+            "daily": ratios("1d", days * 24),
+            "hourly_last_24h": ratios("1h", 24),
+        }
@@ -10,33 +10,64 @@ Usage:
     python integration-patterns/health_summary.py
     python integration-patterns/health_summary.py --interval 30 --once
     python integration-patterns/health_summary.py --streams otel-logs,traces --slack
+    python integration-patterns/health_summary.py --concurrency 16 --per-stream-concurrency 3
+    python integration-patterns/health_summary.py --interval 15 --schedule payments=1,checkout=1
+    python integration-patterns/health_summary.py --combined
+    python integration-patterns/health_summary.py --interval 1 --gate --heartbeat 60
+    python integration-patterns/health_summary.py --delta
+    python integration-patterns/health_summary.py --history-db .state/health_history.db --history-days 7
+    python integration-patterns/health_summary.py --once --dry-run
+    python integration-patterns/health_summary.py --serve --gate --delta &   # warm daemon for cron
+    python integration-patterns/health_summary.py --interval 1 --shard-db /shared/health_shards.db
+    python integration-patterns/health_summary.py --slo-file experiments/08-schema-slo/slo_definitions.json
+
+With --shard-db, several workers (on one or more hosts sharing the
+database) split the streams between them by consistent hashing and
+stream leases; each queries only its own streams, and the worker holding
+the leader lease merges all shards' results into one summary. See
+shard_coordinator.py.
+
+anthropic and httpx are imported on first use, so --help and --dry-run
+start quickly. While a daemon started with --serve is listening on
+.state/health_summary.sock (HEALTH_SUMMARY_SOCKET), --once runs (e.g. from
+cron) are forwarded to it and reuse its HTTP/Claude clients, Slack queue
+and loaded baselines; --no-daemon runs in-process regardless.
 
 Requires:
     pip install anthropic httpx
+    pip install numpy          # only for --gate / --slo-file
 
 Environment variables:
     PARSEABLE_URL       - Parseable base URL (default: http://localhost:8000)
     PARSEABLE_AUTH      - user:password  (default: parseable:parseable)
     ANTHROPIC_API_KEY   - Claude API key
     SLACK_WEBHOOK_URL   - Slack incoming webhook URL (optional)
+    SLACK_OUTBOX_DB     - Persistent Slack queue (default: .state/slack_outbox.db)
 """
 
+from __future__ import annotations
+
 import argparse
+import atexit
 import json
 import logging
 import os
 import sys
 import textwrap
+import threading
 import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
 
-try:
+from health_scheduler import FixedRateScheduler, ScheduleGroup, parse_schedule
+
+if TYPE_CHECKING:
     import anthropic
     import httpx
-except ImportError as e:
-    print(f"Missing dependency: {e}")
-    print("Install with: pip install anthropic httpx")
-    sys.exit(1)
+
+    from slack_delivery import SlackDeliverer
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -46,11 +77,17 @@ PARSEABLE_URL = os.environ.get("PARSEABLE_URL", "http://localhost:8000")
 PARSEABLE_AUTH = os.environ.get("PARSEABLE_AUTH", "parseable:parseable")
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 SLACK_WEBHOOK_URL = os.environ.get("SLACK_WEBHOOK_URL", "")
+SLACK_OUTBOX_DB = os.environ.get("SLACK_OUTBOX_DB", ".state/slack_outbox.db")
+DAEMON_SOCKET = os.environ.get("HEALTH_SUMMARY_SOCKET", ".state/health_summary.sock")
 
 # Use Sonnet 4.5 for cost efficiency on periodic summaries
 DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
 DEFAULT_INTERVAL_MINUTES = 15
 DEFAULT_STREAMS = ["otel-logs", "traces"]
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_STREAM_CONCURRENCY = 2
+DEFAULT_QUERY_TIMEOUT_SECONDS = 30
+DEFAULT_MERGE_TIMEOUT_SECONDS = 30
 
 logging.basicConfig(
     level=logging.INFO,
@@ -58,6 +95,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_slack_deliverer: SlackDeliverer | None = None
+_http_client: httpx.Client | None = None
+_http_client_lock = threading.Lock()
+_anthropic_client: anthropic.Anthropic | None = None
+# Gate / tracker / store instances, kept across --once runs in a daemon.
+_cycle_state: dict[tuple, object] = {}
+# SLO statuses of the latest scheduler tick, shared by the groups it fires.
+_slo_tick: tuple[int, list] | None = None
+_slo_tick_lock = threading.Lock()
+
+
+def _require(module: str):
+    """Import a third-party dependency on first use (keeps --help and --dry-run fast)."""
+    try:
+        return __import__(module)
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        print("Install with: pip install anthropic httpx")
+        sys.exit(1)
+
 
 # ---------------------------------------------------------------------------
 # Parseable queries
@@ -75,7 +132,24 @@ def _time_range(minutes: int) -> tuple[str, str]:
     return start.strftime(fmt), now.strftime(fmt)
 
 
-def query_parseable(sql: str, minutes: int) -> list[dict]:
+def _get_http_client() -> httpx.Client:
+    """Shared, thread-safe client so parallel queries reuse pooled connections."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            httpx = _require("httpx")
+            _http_client = httpx.Client(
+                timeout=DEFAULT_QUERY_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+            )
+        return _http_client
+
+
+def query_parseable(
+    sql: str,
+    minutes: int,
+    timeout: float = DEFAULT_QUERY_TIMEOUT_SECONDS,
+) -> list[dict]:
     """Execute a DataFusion SQL query against Parseable."""
     start_time, end_time = _time_range(minutes)
     payload = {
@@ -83,14 +157,14 @@ def query_parseable(sql: str, minutes: int) -> list[dict]:
         "startTime": start_time,
         "endTime": end_time,
     }
-    with httpx.Client(timeout=30) as client:
-        resp = client.post(
-            f"{PARSEABLE_URL}/api/v1/query",
-            json=payload,
-            auth=_auth_tuple(),
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = _get_http_client().post(
+        f"{PARSEABLE_URL}/api/v1/query",
+        json=payload,
+        auth=_auth_tuple(),
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 
 # Saved health-check SQL queries (PostgreSQL-compatible, using p_timestamp)
@@ -148,29 +222,290 @@ HEALTH_QUERIES = {
 }
 
 
+# Single-scan alternative to HEALTH_QUERIES: one grouped aggregation per stream
+# from which all five result sets are derived locally. Messages are only kept
+# for error/warning rows (the only ones top_errors/slow_operations need), and
+# only for the COMBINED_TOP_MESSAGES most frequent ones per class; the rest are
+# folded into a message-less remainder row. That keeps the row count bounded by
+# minutes x levels x services x (COMBINED_TOP_MESSAGES + 1) even during storms.
+ERROR_LEVELS_RATE = ("error", "ERROR")
+ERROR_LEVELS_TOP = ("error", "ERROR", "Error")
+WARN_LEVELS = ("warn", "WARN", "warning", "WARNING")
+COMBINED_TOP_MESSAGES = 10
+COMBINED_ROW_LIMIT = 20000
+
+
+def _sql_in(values: tuple[str, ...]) -> str:
+    return ", ".join(f"'{v}'" for v in values)
+
+
+COMBINED_HEALTH_SQL = (
+    "SELECT minute_bucket, level, service_name, issue_message, SUM(hits) AS count "
+    "FROM ("
+    "SELECT minute_bucket, level, service_name, hits, "
+    "CASE WHEN DENSE_RANK() OVER "
+    "(PARTITION BY issue_class ORDER BY message_total DESC, message_key ASC) "
+    f"<= {COMBINED_TOP_MESSAGES} THEN message_key END AS issue_message "
+    "FROM ("
+    "SELECT *, SUM(hits) OVER (PARTITION BY issue_class, message_key) AS message_total "
+    "FROM ("
+    "SELECT DATE_TRUNC('minute', p_timestamp) AS minute_bucket, "
+    "level, service_name, "
+    f"CASE WHEN level IN ({_sql_in(ERROR_LEVELS_TOP)}) THEN 'error' "
+    f"WHEN level IN ({_sql_in(WARN_LEVELS)}) THEN 'warn' END AS issue_class, "
+    f"CASE WHEN level IN ({_sql_in(ERROR_LEVELS_TOP + WARN_LEVELS)}) "
+    "THEN message END AS message_key, "
+    "COUNT(*) AS hits "
+    'FROM "{stream}" '
+    "WHERE p_timestamp > NOW() - INTERVAL '{minutes} minutes' "
+    "GROUP BY minute_bucket, level, service_name, issue_class, message_key"
+    "))) "
+    "GROUP BY minute_bucket, level, service_name, issue_message "
+    "LIMIT {limit}"
+)
+
+
+def _top(counter: Counter, key: str, limit: int | None = None) -> list[dict]:
+    """Counter -> [{key: value, "count": n}] sorted by count desc (ties by key)."""
+    ordered = sorted(counter.items(), key=lambda kv: (-kv[1], str(kv[0])))
+    if limit is not None:
+        ordered = ordered[:limit]
+    return [{key: value, "count": count} for value, count in ordered]
+
+
+def derive_health_results(rows: list[dict]) -> dict[str, list[dict]]:
+    """Derive the five HEALTH_QUERIES result sets from combined-scan rows.
+
+    Output rows have the same columns and ordering as the individual queries.
+    """
+    by_level: Counter = Counter()
+    per_minute_total: Counter = Counter()
+    per_minute_errors: Counter = Counter()
+    error_messages: Counter = Counter()
+    warn_messages: Counter = Counter()
+    by_service_level: Counter = Counter()
+
+    for row in rows:
+        count = int(row.get("count", 0))
+        level = row.get("level")
+        minute = row.get("minute_bucket")
+        service = row.get("service_name")
+        message = row.get("issue_message")
+
+        by_level[level] += count
+        per_minute_total[minute] += count
+        if level in ERROR_LEVELS_RATE:
+            per_minute_errors[minute] += count
+        if level in ERROR_LEVELS_TOP and message is not None:
+            error_messages[message] += count
+        if level in WARN_LEVELS and message is not None:
+            warn_messages[message] += count
+        if service is not None:
+            by_service_level[(service, level)] += count
+
+    service_health = [
+        {"service_name": service, "level": level, "count": count}
+        for (service, level), count in sorted(
+            by_service_level.items(), key=lambda kv: (-kv[1], str(kv[0]))
+        )
+    ]
+    return {
+        "log_volume": _top(by_level, "level"),
+        "error_rate": [
+            {
+                "minute_bucket": minute,
+                "total": per_minute_total[minute],
+                "errors": per_minute_errors.get(minute, 0),
+            }
+            for minute in sorted(per_minute_total, key=str)
+        ],
+        "top_errors": _top(error_messages, "message", 10),
+        "slow_operations": _top(warn_messages, "message", 10),
+        "service_health": service_health,
+    }
+
+
+def _run_health_query(
+    stream: str,
+    name: str,
+    minutes: int,
+    query_timeout: float,
+) -> dict:
+    """Run one health query and return its result entry.
+
+    Timing is logged rather than returned: result entries go into the
+    Claude prompt, which should only see the data.
+    """
+    qdef = HEALTH_QUERIES[name]
+    sql = qdef["sql"].format(stream=stream, minutes=minutes)
+    start = time.monotonic()
+    try:
+        rows = query_parseable(sql, minutes, timeout=query_timeout)
+        logger.debug(
+            "Query '%s' for stream '%s': %d rows in %.1f ms",
+            name,
+            stream,
+            len(rows),
+            (time.monotonic() - start) * 1000,
+        )
+        return {
+            "description": qdef["description"],
+            "data": rows,
+            "record_count": len(rows),
+        }
+    except Exception as exc:
+        logger.warning(
+            "Query '%s' failed for stream '%s' after %.1f ms: %s",
+            name,
+            stream,
+            (time.monotonic() - start) * 1000,
+            exc,
+        )
+        return {
+            "description": qdef["description"],
+            "data": [],
+            "error": str(exc),
+        }
+
+
+def _run_combined_health_queries(
+    stream: str,
+    minutes: int,
+    query_timeout: float,
+) -> dict[str, dict] | None:
+    """Run the single-scan aggregate for a stream and derive all HEALTH_QUERIES.
+
+    Returns None if the scan hits COMBINED_ROW_LIMIT (the derived counts
+    would otherwise be incomplete) or fails outright; the caller then runs
+    the individual queries for that stream.
+    """
+    sql = COMBINED_HEALTH_SQL.format(stream=stream, minutes=minutes, limit=COMBINED_ROW_LIMIT)
+    start = time.monotonic()
+    try:
+        rows = query_parseable(sql, minutes, timeout=query_timeout)
+    except Exception as exc:
+        logger.warning(
+            "Combined health scan failed for stream '%s' (%s); using individual queries",
+            stream,
+            exc,
+        )
+        rows = None
+    if rows is not None and len(rows) >= COMBINED_ROW_LIMIT:
+        logger.warning(
+            "Combined health scan for '%s' hit %d rows; using individual queries",
+            stream,
+            COMBINED_ROW_LIMIT,
+        )
+        rows = None
+    if rows is None:
+        return None
+
+    logger.debug(
+        "Combined health scan for stream '%s': %d rows in %.1f ms",
+        stream,
+        len(rows),
+        (time.monotonic() - start) * 1000,
+    )
+    derived = derive_health_results(rows)
+    return {
+        name: {
+            "description": qdef["description"],
+            "data": derived[name],
+            "record_count": len(derived[name]),
+        }
+        for name, qdef in HEALTH_QUERIES.items()
+    }
+
+
+def run_all_health_queries(
+    streams: list[str],
+    minutes: int,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_stream_concurrency: int = DEFAULT_PER_STREAM_CONCURRENCY,
+    query_timeout: float = DEFAULT_QUERY_TIMEOUT_SECONDS,
+    combined: bool = False,
+) -> dict[str, dict[str, dict]]:
+    """Run every health query for every stream in parallel.
+
+    At most `concurrency` queries are in flight overall and at most
+    `per_stream_concurrency` against any one stream. Queries are dispatched
+    round-robin across streams so one stream's backlog doesn't starve the
+    rest. Results keep the HEALTH_QUERIES order within each stream.
+
+    With combined=True each stream gets one grouped scan instead of five
+    and the individual result sets are derived locally. Streams whose scan
+    fails fall back to the individual queries, dispatched as above.
+    """
+    if combined:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {
+                stream: pool.submit(
+                    _run_combined_health_queries, stream, minutes, query_timeout
+                )
+                for stream in streams
+            }
+            scanned = {stream: future.result() for stream, future in futures.items()}
+        fallback = [stream for stream, result in scanned.items() if result is None]
+        if fallback:
+            scanned.update(
+                run_all_health_queries(
+                    fallback,
+                    minutes,
+                    concurrency=concurrency,
+                    per_stream_concurrency=per_stream_concurrency,
+                    query_timeout=query_timeout,
+                )
+            )
+        return {stream: scanned[stream] for stream in streams}
+
+    concurrency = max(1, concurrency)
+    per_stream_concurrency = max(1, per_stream_concurrency)
+    pending = {stream: list(HEALTH_QUERIES) for stream in streams}
+    active = {stream: 0 for stream in streams}
+    results: dict[str, dict[str, dict]] = {stream: {} for stream in streams}
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while any(pending.values()) or futures:
+            dispatched = True
+            while dispatched and len(futures) < concurrency:
+                dispatched = False
+                for stream in streams:
+                    if len(futures) >= concurrency:
+                        break
+                    if pending[stream] and active[stream] < per_stream_concurrency:
+                        name = pending[stream].pop(0)
+                        future = pool.submit(
+                            _run_health_query, stream, name, minutes, query_timeout
+                        )
+                        futures[future] = (stream, name)
+                        active[stream] += 1
+                        dispatched = True
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                stream, name = futures.pop(future)
+                active[stream] -= 1
+                results[stream][name] = future.result()
+
+    return {
+        stream: {name: results[stream][name] for name in HEALTH_QUERIES}
+        for stream in streams
+    }
+
+
 def run_health_queries(
     stream: str,
     minutes: int,
+    query_timeout: float = DEFAULT_QUERY_TIMEOUT_SECONDS,
 ) -> dict[str, dict]:
     """Run all health queries for a stream and return results keyed by query name."""
-    results = {}
-    for name, qdef in HEALTH_QUERIES.items():
-        sql = qdef["sql"].format(stream=stream, minutes=minutes)
-        try:
-            rows = query_parseable(sql, minutes)
-            results[name] = {
-                "description": qdef["description"],
-                "data": rows,
-                "record_count": len(rows),
-            }
-        except Exception as exc:
-            logger.warning("Query '%s' failed for stream '%s': %s", name, stream, exc)
-            results[name] = {
-                "description": qdef["description"],
-                "data": [],
-                "error": str(exc),
-            }
-    return results
+    return run_all_health_queries(
+        [stream],
+        minutes,
+        concurrency=DEFAULT_PER_STREAM_CONCURRENCY,
+        query_timeout=query_timeout,
+    )[stream]
 
 
 # ---------------------------------------------------------------------------
@@ -181,14 +516,68 @@ def generate_health_summary(
     all_stream_results: dict[str, dict[str, dict]],
     minutes: int,
     model: str = DEFAULT_MODEL,
+    extra_sections: dict[str, object] | None = None,
+    tracker=None,
 ) -> str:
-    """Send health query results to Claude and get a markdown summary."""
+    """Send health query results to Claude and get a markdown summary.
+
+    `extra_sections` maps a heading to JSON-serializable context (anomaly
+    gate findings, multi-day history) appended to the prompt. With a
+    DeltaTracker that holds previous state, only the changes since the last
+    cycle and a digest of the last summary are sent.
+    """
     if not ANTHROPIC_API_KEY:
         return _fallback_summary(all_stream_results, minutes)
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    global _anthropic_client
+    if _anthropic_client is None:
+        _anthropic_client = _require("anthropic").Anthropic(api_key=ANTHROPIC_API_KEY)
+    client = _anthropic_client
 
-    prompt = textwrap.dedent(f"""\
+    delta = tracker.delta_payload(all_stream_results) if tracker is not None else None
+    if delta is not None:
+        prompt = _delta_prompt(delta, minutes)
+    else:
+        prompt = _full_prompt(all_stream_results, minutes)
+    for heading, payload in (extra_sections or {}).items():
+        if payload:
+            prompt += (
+                f"\n## {heading}\n\n```json\n"
+                + json.dumps(payload, indent=2, default=str)
+                + "\n```\n"
+            )
+
+    response = client.messages.create(
+        model=model,
+        max_tokens=1500,
+        messages=[{"role": "user", "content": prompt}],
+    )
+
+    text = ""
+    for block in response.content:
+        if block.type == "text":
+            text += block.text
+
+    logger.info(
+        "Claude summary generated: %d chars, %d input tokens, %d output tokens%s",
+        len(text),
+        response.usage.input_tokens,
+        response.usage.output_tokens,
+        " (delta prompt)" if delta is not None else "",
+    )
+    return text
+
+
+def _strip_title(summary: str) -> str:
+    """Drop a leading title and "Generated at" line from a nested summary."""
+    lines = summary.lstrip().splitlines()
+    while lines and (not lines[0].strip() or lines[0].startswith(("# ", "_Generated at"))):
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _full_prompt(all_stream_results: dict[str, dict[str, dict]], minutes: int) -> str:
+    return textwrap.dedent(f"""\
         You are an SRE producing a periodic health summary for our platform.
         Below are the results of automated health queries run against our Parseable
         log streams for the last {minutes} minutes.
@@ -210,24 +599,32 @@ def generate_health_summary(
         ```
     """)
 
-    response = client.messages.create(
-        model=model,
-        max_tokens=1500,
-        messages=[{"role": "user", "content": prompt}],
-    )
 
-    text = ""
-    for block in response.content:
-        if block.type == "text":
-            text += block.text
+def _delta_prompt(delta: dict, minutes: int) -> str:
+    return textwrap.dedent(f"""\
+        You are an SRE producing a periodic health summary for our platform.
+        Below are the CHANGES in our Parseable log streams since the previous
+        {minutes}-minute health check, together with a digest of the previous summary.
+        Streams and metrics not listed under "changes" are unchanged. Streams
+        marked "new_stream" have no previous check; their full health query
+        results are included instead.
 
-    logger.info(
-        "Claude summary generated: %d chars, %d input tokens, %d output tokens",
-        len(text),
-        response.usage.input_tokens,
-        response.usage.output_tokens,
-    )
-    return text
+        For each stream, produce a concise health report in Markdown.
+        Include:
+        1. **Overall Status**: Healthy / Degraded / Critical (with a one-line reason)
+        2. **Key Metrics**: Log volume, error rate percentage, top errors
+        3. **Trends**: How things moved relative to the previous summary
+        4. **Alerts**: Anything that needs immediate attention
+        5. **Recommendations**: Brief, actionable next steps if any issues are found
+
+        Keep the summary concise (under 500 words total).
+
+        ## Changes Since Previous Check
+
+        ```json
+        {json.dumps(delta, indent=2, default=str)}
+        ```
+    """)
 
 
 def _fallback_summary(
@@ -252,12 +649,86 @@ def _fallback_summary(
     return "\n".join(lines)
 
 
+ANOMALIES_HEADING = "Anomalies Flagged by Local Baseline Checks"
+HISTORY_HEADING = "Multi-Day Trend (local history)"
+SHARD_GAPS_HEADING = "Streams Missing From This Cycle (shard results not received)"
+SLO_BREACHES_HEADING = "SLO Burn-Rate Breaches (computed locally)"
+
+
+def generate_gated_summary(
+    all_stream_results: dict[str, dict[str, dict]],
+    minutes: int,
+    model: str,
+    gate,
+    tracker=None,
+    extra_sections: dict[str, object] | None = None,
+    forced_streams: list[str] | None = None,
+) -> str:
+    """Summarize via Claude only the streams the anomaly gate flags.
+
+    A stream goes to Claude when its heartbeat is due; otherwise healthy
+    streams get a deterministic templated section and no LLM call is made
+    at all when nothing is anomalous. forced_streams (e.g. streams with
+    SLO breaches) go to Claude regardless of the gate.
+    """
+    from anomaly_gate import render_healthy_summary
+
+    verdicts = {
+        stream: gate.evaluate(stream, results)
+        for stream, results in all_stream_results.items()
+    }
+    heartbeat = [s for s in all_stream_results if gate.heartbeat_due(s)]
+    flagged = [s for s, v in verdicts.items() if v.anomalous]
+    forced = set(forced_streams or ())
+    to_claude = [
+        s for s in all_stream_results if s in forced or verdicts[s].anomalous or s in heartbeat
+    ]
+
+    lines = [f"# Health Summary (last {minutes} minutes)\n"]
+    lines.append(f"_Generated at {datetime.now(timezone.utc).isoformat()}_\n")
+    if flagged:
+        lines.append(f"_Anomalies detected in: {', '.join(flagged)}_\n")
+    sections = ["\n".join(lines)]
+
+    if to_claude:
+        logger.info(
+            "Anomaly gate: sending %d/%d streams to Claude (%d on heartbeat)",
+            len(to_claude),
+            len(all_stream_results),
+            len(heartbeat),
+        )
+        summary = generate_health_summary(
+            {s: all_stream_results[s] for s in to_claude},
+            minutes,
+            model,
+            extra_sections={
+                **(extra_sections or {}),
+                ANOMALIES_HEADING: {
+                    s: verdicts[s].reasons for s in to_claude if verdicts[s].reasons
+                },
+            },
+            tracker=tracker,
+        )
+        sections.append(_strip_title(summary))
+        if ANTHROPIC_API_KEY:
+            gate.mark_llm_call(to_claude)
+    else:
+        logger.info("Anomaly gate: all %d streams healthy -- skipping Claude", len(verdicts))
+
+    for stream, results in all_stream_results.items():
+        if stream not in to_claude:
+            sections.append(render_healthy_summary(stream, results, verdicts[stream]))
+
+    gate.save()
+    return "\n".join(sections)
+
+
 # ---------------------------------------------------------------------------
 # Slack posting
 # ---------------------------------------------------------------------------
 
 def post_summary_to_slack(summary: str) -> bool:
-    """Post the health summary to Slack."""
+    """Queue the health summary for delivery to Slack."""
     if not SLACK_WEBHOOK_URL:
         logger.info("SLACK_WEBHOOK_URL not set -- skipping Slack post")
         return False
@@ -281,26 +752,47 @@ def post_summary_to_slack(summary: str) -> bool:
         ],
     }
 
-    try:
-        with httpx.Client(timeout=10) as client:
-            resp = client.post(SLACK_WEBHOOK_URL, json=payload)
-            resp.raise_for_status()
-            logger.info("Health summary posted to Slack")
-            return True
-    except Exception as exc:
-        logger.error("Failed to post to Slack: %s", exc)
-        return False
+    deliverer = _get_slack_deliverer()
+    deliverer.outbox.enqueue(SLACK_WEBHOOK_URL, payload)
+    deliverer.notify()
+    logger.info("Health summary queued for Slack")
+    return True
+
+
+def _get_slack_deliverer() -> SlackDeliverer:
+    """Return the process-wide Slack deliverer, starting it on first use."""
+    global _slack_deliverer
+    if _slack_deliverer is None:
+        from slack_delivery import SlackDeliverer, SlackOutbox
+
+        _slack_deliverer = SlackDeliverer(SlackOutbox(SLACK_OUTBOX_DB))
+        _slack_deliverer.start()
+    return _slack_deliverer
+
+
+def flush_slack(timeout: float = 60) -> None:
+    """Wait for queued Slack messages to be delivered and log delivery metrics."""
+    if _slack_deliverer is None:
+        return
+    if not _slack_deliverer.flush(timeout=timeout):
+        logger.warning("Slack queue not empty after %ds; messages stay queued", timeout)
+    logger.info("Slack delivery: %s", json.dumps(_slack_deliverer.metrics()))
 
 
 # ---------------------------------------------------------------------------
 # Output
 # ---------------------------------------------------------------------------
 
-def save_summary(summary: str, output_dir: str = "results/health-summaries") -> str:
+def save_summary(
+    summary: str,
+    output_dir: str = "results/health-summaries",
+    label: str | None = None,
+) -> str:
     """Save the summary to a markdown file and return the file path."""
     os.makedirs(output_dir, exist_ok=True)
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    filepath = os.path.join(output_dir, f"health_{timestamp}.md")
+    name = f"health_{label}_{timestamp}.md" if label else f"health_{timestamp}.md"
+    filepath = os.path.join(output_dir, name)
     with open(filepath, "w", encoding="utf-8") as f:
         f.write(summary)
     return filepath
@@ -315,8 +807,26 @@ def run_once(
     minutes: int,
     model: str,
     post_slack: bool,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_stream_concurrency: int = DEFAULT_PER_STREAM_CONCURRENCY,
+    query_timeout: float = DEFAULT_QUERY_TIMEOUT_SECONDS,
+    combined: bool = False,
+    label: str | None = None,
+    gate=None,
+    tracker=None,
+    store=None,
+    history_days: int = 0,
+    slo_engine=None,
+    slo_tick: int | None = None,
 ) -> str:
-    """Run one cycle of health queries + Claude summary."""
+    """Run one cycle of health queries + Claude summary.
+
+    With an AnomalyGate, Claude is only consulted for anomalous streams
+    (or on the gate's heartbeat). With a DeltaTracker, Claude receives
+    only what changed since the previous cycle. With a HealthStore, each
+    cycle's numbers are kept locally and history_days of trend are added
+    to the prompt from that store.
+    """
     logger.info(
         "Running health check: streams=%s, window=%d min, model=%s",
         streams,
@@ -324,15 +834,128 @@ def run_once(
         model,
     )
 
-    all_results: dict[str, dict[str, dict]] = {}
-    for stream in streams:
-        logger.info("Querying stream '%s'...", stream)
-        all_results[stream] = run_health_queries(stream, minutes)
+    start = time.monotonic()
+    all_results = run_all_health_queries(
+        streams,
+        minutes,
+        concurrency=concurrency,
+        per_stream_concurrency=per_stream_concurrency,
+        query_timeout=query_timeout,
+        combined=combined,
+    )
+    logger.info(
+        "Ran %d queries across %d streams in %.2fs",
+        len(streams) * (1 if combined else len(HEALTH_QUERIES)),
+        len(streams),
+        time.monotonic() - start,
+    )
+    return summarize_cycle(
+        all_results,
+        minutes,
+        model,
+        post_slack,
+        label=label,
+        gate=gate,
+        tracker=tracker,
+        store=store,
+        history_days=history_days,
+        slo_engine=slo_engine,
+        slo_tick=slo_tick,
+    )
+
+
+def _evaluate_slos(slo_engine, tick: int | None = None) -> tuple[list, bool]:
+    """Pull new SLO counts from Parseable and evaluate every SLO locally.
+
+    Groups fired by the same scheduler tick share one evaluation: returns
+    (statuses, first) where first is True only for the caller that ran it
+    (always True without a tick).
+    """
+    global _slo_tick
+    from parseable_context_builder import ParseableContext
+
+    with _slo_tick_lock:
+        if tick is not None and _slo_tick is not None and _slo_tick[0] == tick:
+            return _slo_tick[1], False
+        ctx = _cached_state(
+            "parseable", PARSEABLE_URL, lambda: ParseableContext(PARSEABLE_URL, _auth_tuple())
+        )
+        try:
+            slo_engine.update(ctx)
+        except Exception as exc:
+            logger.warning("SLO counter update failed (%s); evaluating stored counters", exc)
+        statuses = slo_engine.evaluate()
+        if tick is not None:
+            _slo_tick = (tick, statuses)
+        return statuses, True
+
+
+def summarize_cycle(
+    all_results: dict[str, dict[str, dict]],
+    minutes: int,
+    model: str,
+    post_slack: bool,
+    label: str | None = None,
+    gate=None,
+    tracker=None,
+    store=None,
+    history_days: int = 0,
+    extra_sections: dict[str, object] | None = None,
+    slo_engine=None,
+    slo_tick: int | None = None,
+) -> str:
+    """Turn one cycle's query results into a saved (and posted) summary.
 
-    logger.info("Generating health summary with Claude...")
-    summary = generate_health_summary(all_results, minutes, model)
+    With an SLOEngine, burn rates are computed locally; only breaching SLOs
+    reach Claude's prompt, and the full SLO table is appended as-is. Groups
+    sharing a slo_tick evaluate SLOs once: the first one reports every
+    breach and the table, the others only breaches on their own streams.
+    """
+    extra_sections = dict(extra_sections or {})
+    slo_statuses, slo_owner = (
+        _evaluate_slos(slo_engine, slo_tick) if slo_engine is not None else ([], False)
+    )
+    breaches = [
+        status
+        for status in slo_statuses
+        if status.breached and (slo_owner or status.stream in all_results)
+    ]
+    if breaches:
+        logger.warning("SLO breaches: %s", ", ".join(status.name for status in breaches))
+        extra_sections[SLO_BREACHES_HEADING] = [status.to_dict() for status in breaches]
+    if store is not None:
+        for stream, results in all_results.items():
+            store.record_cycle(stream, results, minutes)
+        store.rollup()
+        store.apply_retention()
+        if history_days:
+            extra_sections[HISTORY_HEADING] = [
+                store.trend_digest(stream, days=history_days) for stream in all_results
+            ]
+
+    if gate is not None:
+        summary = generate_gated_summary(
+            all_results,
+            minutes,
+            model,
+            gate,
+            tracker=tracker,
+            extra_sections=extra_sections,
+            forced_streams=[status.stream for status in breaches],
+        )
+    else:
+        logger.info("Generating health summary with Claude...")
+        summary = generate_health_summary(
+            all_results, minutes, model, extra_sections=extra_sections, tracker=tracker
+        )
+    if tracker is not None:
+        tracker.record(all_results, summary)
+    if slo_statuses and slo_owner:
+        from slo_engine import render_slo_status
+
+        summary = summary.rstrip("\n") + "\n\n" + render_slo_status(slo_statuses)
 
-    filepath = save_summary(summary)
+    filepath = save_summary(summary, label=label)
     logger.info("Summary saved to %s", filepath)
 
     if post_slack:
@@ -342,13 +965,157 @@ def run_once(
     return summary
 
 
-def main() -> None:
+def run_sharded_once(
+    coordinator,
+    streams: list[str],
+    minutes: int,
+    model: str,
+    post_slack: bool,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_stream_concurrency: int = DEFAULT_PER_STREAM_CONCURRENCY,
+    query_timeout: float = DEFAULT_QUERY_TIMEOUT_SECONDS,
+    combined: bool = False,
+    merge_timeout: float = DEFAULT_MERGE_TIMEOUT_SECONDS,
+    label: str | None = None,
+    **summary_options,
+) -> str | None:
+    """Run one cycle as a shard of a ShardCoordinator.
+
+    Queries only the streams this worker holds leases for and publishes
+    their results under the cycle's wall-clock boundary. If this worker is
+    the leader, it then waits up to merge_timeout for the other shards and
+    summarizes all streams together; other workers return None.
+    """
+    boundary = int(time.time() // (minutes * 60) * minutes * 60)
+    cycle = f"{label or 'all'}:{boundary}"
+    owned = coordinator.assign(streams)
+    leader = coordinator.is_leader()
+    logger.info(
+        "Shard %s: %d of %d streams for cycle %s%s",
+        coordinator.worker_id,
+        len(owned),
+        len(streams),
+        cycle,
+        " (leader)" if leader else "",
+    )
+    try:
+        if owned:
+            start = time.monotonic()
+            results = run_all_health_queries(
+                owned,
+                minutes,
+                concurrency=concurrency,
+                per_stream_concurrency=per_stream_concurrency,
+                query_timeout=query_timeout,
+                combined=combined,
+            )
+            coordinator.publish(cycle, results)
+            logger.info("Published %d streams in %.2fs", len(owned), time.monotonic() - start)
+    finally:
+        coordinator.finish_cycle(owned)
+
+    if not leader:
+        return None
+    merged, missing = coordinator.collect(cycle, streams, timeout=merge_timeout)
+    if missing:
+        logger.warning(
+            "No shard results for %d of %d streams after %ss: %s",
+            len(missing),
+            len(streams),
+            merge_timeout,
+            ", ".join(missing[:10]) + (" ..." if len(missing) > 10 else ""),
+        )
+    if not merged:
+        return None
+    return summarize_cycle(
+        merged,
+        minutes,
+        model,
+        post_slack,
+        label=label,
+        extra_sections={SHARD_GAPS_HEADING: missing} if missing else None,
+        **summary_options,
+    )
+
+
+def _get_coordinator(args: argparse.Namespace):
+    """This process's ShardCoordinator, started once and stopped at exit."""
+    from shard_coordinator import ShardCoordinator
+
+    def create():
+        coordinator = ShardCoordinator(
+            args.shard_db, worker_id=args.worker_id, lease_seconds=args.lease_seconds
+        )
+        coordinator.start()
+        atexit.register(coordinator.stop)
+        return coordinator
+
+    return _cached_state("shards", args.shard_db, create)
+
+
+def dry_run(
+    streams: list[str],
+    minutes: int,
+    combined: bool,
+    schedule: list[ScheduleGroup],
+    shard_db: str | None = None,
+    slo_file: str | None = None,
+) -> None:
+    """Print the schedule and the SQL each cycle would run; queries nothing."""
+    for group in schedule:
+        print(f"Group '{group.name}': every {group.interval_minutes} min -> {', '.join(group.streams)}")
+    if shard_db and os.path.exists(shard_db):
+        from shard_coordinator import HashRing, ShardCoordinator
+
+        coordinator = ShardCoordinator(shard_db, worker_id="dry-run")
+        workers = coordinator.live_workers()
+        ring = HashRing(workers, coordinator.vnodes)
+        leases = coordinator.owners()
+        print(f"\nShards in {shard_db}: {len(workers)} live workers, leader {leases.get('__leader__', '-')}")
+        for worker in workers:
+            planned = [s for s in streams if ring.owner(s) == worker]
+            held = sum(1 for s in streams if leases.get(s) == worker)
+            print(f"  {worker}: {len(planned)} streams by hash, {held} leases held")
+    if slo_file:
+        from slo_engine import load_slos
+
+        now = int(time.time())
+        for slo in load_slos(slo_file):
+            alerts = ", ".join(alert.name for alert in slo.alerts)
+            print(f"\n## SLO {slo.name} (target {slo.target:.4%} over {slo.budget_days}d; alerts {alerts})")
+            print(slo.counts_sql(now - now % 60 - 180, now))
+    for stream in streams:
+        print(f"\n## {stream}")
+        if combined:
+            print(COMBINED_HEALTH_SQL.format(stream=stream, minutes=minutes, limit=COMBINED_ROW_LIMIT))
+            continue
+        for name, qdef in HEALTH_QUERIES.items():
+            print(f"-- {name}: {qdef['description']}")
+            print(qdef["sql"].format(stream=stream, minutes=minutes))
+
+
+def _cached_state(kind: str, path: str, factory):
+    """One instance per (kind, file) for the life of the process."""
+    key = (kind, os.path.abspath(path))
+    if key not in _cycle_state:
+        _cycle_state[key] = factory()
+    return _cycle_state[key]
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Generate periodic health summaries from Parseable data using Claude.",
     )
     parser.add_argument(
         "--interval",
-        type=int,
+        type=_positive_int,
         default=DEFAULT_INTERVAL_MINUTES,
         help=f"Interval between summaries in minutes (default: {DEFAULT_INTERVAL_MINUTES})",
     )
@@ -364,6 +1131,94 @@ def main() -> None:
         default=DEFAULT_MODEL,
         help=f"Claude model for summaries (default: {DEFAULT_MODEL})",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Max health queries in flight overall (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--per-stream-concurrency",
+        type=_positive_int,
+        default=DEFAULT_PER_STREAM_CONCURRENCY,
+        help=(
+            "Max health queries in flight per stream "
+            f"(default: {DEFAULT_PER_STREAM_CONCURRENCY})"
+        ),
+    )
+    parser.add_argument(
+        "--query-timeout",
+        type=float,
+        default=DEFAULT_QUERY_TIMEOUT_SECONDS,
+        help=f"Per-query timeout in seconds (default: {DEFAULT_QUERY_TIMEOUT_SECONDS})",
+    )
+    parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="Run one grouped scan per stream and derive all health queries locally",
+    )
+    parser.add_argument(
+        "--gate",
+        action="store_true",
+        help="Only call Claude for streams with anomalies vs persisted baselines (needs numpy)",
+    )
+    parser.add_argument(
+        "--heartbeat",
+        type=float,
+        default=60,
+        help="With --gate, still summarize every stream with Claude this often in minutes "
+        "(default: 60)",
+    )
+    parser.add_argument(
+        "--baseline-file",
+        type=str,
+        default=".state/health_baselines.json",
+        help="With --gate, where anomaly baselines are persisted",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Send Claude only changes since the previous cycle plus a digest of its summary",
+    )
+    parser.add_argument(
+        "--state-file",
+        type=str,
+        default=".state/health_previous.json",
+        help="With --delta, where the previous cycle's aggregates are persisted",
+    )
+    parser.add_argument(
+        "--history-db",
+        type=str,
+        default=None,
+        help="Persist per-cycle, per-minute health metrics in this local SQLite store",
+    )
+    parser.add_argument(
+        "--history-days",
+        type=int,
+        default=0,
+        help="With --history-db, add this many days of local trend to the prompt (default: 0)",
+    )
+    parser.add_argument(
+        "--schedule",
+        type=str,
+        default="",
+        help=(
+            "Per-stream interval overrides as stream=minutes pairs, e.g. "
+            "payments=1,checkout=5 (other streams use --interval)"
+        ),
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=10.0,
+        help="Max per-group start offset in seconds after each boundary (default: 10)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        help="Write scheduler metrics (missed ticks, lag) as JSON to this path",
+    )
     parser.add_argument(
         "--once",
         action="store_true",
@@ -374,39 +1229,220 @@ def main() -> None:
         action="store_true",
         help="Post summaries to Slack (requires SLACK_WEBHOOK_URL)",
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the schedule and health SQL without querying Parseable or Claude",
+    )
+    parser.add_argument(
+        "--slo-file",
+        type=str,
+        default=None,
+        help="Evaluate these SLO definitions (JSON) each cycle; only breaches go to Claude",
+    )
+    parser.add_argument(
+        "--slo-db",
+        type=str,
+        default=".state/slo_counters.db",
+        help="With --slo-file, where per-minute SLO counters are kept",
+    )
+    parser.add_argument(
+        "--shard-db",
+        type=str,
+        default=None,
+        help="Shard streams across workers sharing this SQLite database; the leader merges",
+    )
+    parser.add_argument(
+        "--worker-id",
+        type=str,
+        default=None,
+        help="With --shard-db, this worker's name (default: hostname:pid)",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=30,
+        help="With --shard-db, how long a silent worker keeps its streams (default: 30)",
+    )
+    parser.add_argument(
+        "--merge-timeout",
+        type=float,
+        default=DEFAULT_MERGE_TIMEOUT_SECONDS,
+        help="With --shard-db, how long the leader waits for other shards' results "
+        f"(default: {DEFAULT_MERGE_TIMEOUT_SECONDS})",
+    )
+    daemon_group = parser.add_mutually_exclusive_group()
+    daemon_group.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a resident daemon that --once invocations are forwarded to",
+    )
+    daemon_group.add_argument(
+        "--stop-daemon",
+        action="store_true",
+        help="Stop a running --serve daemon",
+    )
+    daemon_group.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run in this process even if a daemon is listening",
+    )
+    return parser
+
+
+def serve(parser: argparse.ArgumentParser) -> None:
+    """Resident daemon: run forwarded --once cycles in this warm process."""
+    from resident_daemon import ResidentDaemon
+
+    def handle(argv: list[str]) -> None:
+        args = parser.parse_args(argv)
+        if not (args.once or args.dry_run) or args.serve or args.stop_daemon:
+            parser.error("only --once / --dry-run runs can be forwarded to a daemon")
+        run(args)
+
+    _require("anthropic")
+    _require("httpx")
+    logger.info("Serving on %s (pid %d); Ctrl+C or --stop-daemon to stop", DAEMON_SOCKET, os.getpid())
+    try:
+        ResidentDaemon(DAEMON_SOCKET, handle).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    flush_slack(timeout=10)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        parse_schedule(args.schedule, [], args.interval)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.serve:
+        serve(parser)
+        return
+
+    import resident_daemon
+
+    if args.stop_daemon:
+        print("Daemon stopped" if resident_daemon.stop(DAEMON_SOCKET) else "No daemon running")
+        return
+    if args.once and not args.no_daemon:
+        code = resident_daemon.forward(DAEMON_SOCKET, sys.argv[1:] if argv is None else argv)
+        if code is not None:
+            sys.exit(code)
+    run(args)
+
 
-    args = parser.parse_args()
+def run(args: argparse.Namespace) -> None:
     streams = [s.strip() for s in args.streams.split(",") if s.strip()]
 
+    if args.dry_run:
+        groups = parse_schedule(args.schedule, streams, args.interval, args.jitter)
+        dry_run(
+            streams,
+            args.interval,
+            args.combined,
+            groups,
+            shard_db=args.shard_db,
+            slo_file=args.slo_file,
+        )
+        return
+
     if not ANTHROPIC_API_KEY:
         logger.warning(
             "ANTHROPIC_API_KEY not set. Summaries will use a basic fallback format."
         )
 
+    cycle_options = {
+        "concurrency": args.concurrency,
+        "per_stream_concurrency": args.per_stream_concurrency,
+        "query_timeout": args.query_timeout,
+        "combined": args.combined,
+    }
+    if args.gate:
+        from anomaly_gate import AnomalyGate
+
+        cycle_options["gate"] = _cached_state(
+            f"gate:{args.heartbeat}",
+            args.baseline_file,
+            lambda: AnomalyGate(args.baseline_file, heartbeat_minutes=args.heartbeat),
+        )
+    if args.delta:
+        from health_delta import DeltaTracker
+
+        cycle_options["tracker"] = _cached_state(
+            "tracker", args.state_file, lambda: DeltaTracker(args.state_file)
+        )
+    if args.history_db:
+        from health_store import HealthStore
+
+        cycle_options["store"] = _cached_state(
+            "store", args.history_db, lambda: HealthStore(args.history_db)
+        )
+        cycle_options["history_days"] = args.history_days
+    if args.slo_file:
+        from slo_engine import SLOEngine, load_slos
+
+        cycle_options["slo_engine"] = _cached_state(
+            f"slo:{os.path.abspath(args.slo_file)}",
+            args.slo_db,
+            lambda: SLOEngine(args.slo_db, load_slos(args.slo_file)),
+        )
+
+    run_cycle = run_once
+    if args.shard_db:
+        coordinator = _get_coordinator(args)
+        cycle_options["merge_timeout"] = args.merge_timeout
+
+        def run_cycle(*cycle_args, **kwargs):
+            return run_sharded_once(coordinator, *cycle_args, **kwargs)
+
     if args.once:
-        run_once(streams, args.interval, args.model, args.slack)
+        run_cycle(streams, args.interval, args.model, args.slack, **cycle_options)
+        flush_slack()
         return
 
-    logger.info(
-        "Starting health summary loop (every %d minutes). Press Ctrl+C to stop.",
-        args.interval,
+    groups = parse_schedule(args.schedule, streams, args.interval, args.jitter)
+    multiple_groups = len(groups) > 1
+
+    def run_group(group: ScheduleGroup) -> None:
+        run_cycle(
+            group.streams,
+            group.interval_minutes,
+            args.model,
+            args.slack,
+            label=group.name if multiple_groups else None,
+            # Groups fired on the same boundary minute share one SLO evaluation.
+            slo_tick=int((time.time() - group.offset_seconds) // 60),
+            **cycle_options,
+        )
+
+    def write_metrics(metrics: dict) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.metrics_file)), exist_ok=True)
+        with open(args.metrics_file, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+
+    scheduler = FixedRateScheduler(
+        groups,
+        run_group,
+        on_cycle_complete=write_metrics if args.metrics_file else None,
     )
 
-    while True:
-        try:
-            run_once(streams, args.interval, args.model, args.slack)
-        except KeyboardInterrupt:
-            logger.info("Shutting down.")
-            break
-        except Exception as exc:
-            logger.error("Health summary cycle failed: %s", exc)
+    for group in groups:
+        logger.info(
+            "Scheduled group '%s': every %d minutes for %s",
+            group.name,
+            group.interval_minutes,
+            ", ".join(group.streams),
+        )
+    logger.info("Starting health summary scheduler. Press Ctrl+C to stop.")
 
-        logger.info("Next run in %d minutes...", args.interval)
-        try:
-            time.sleep(args.interval * 60)
-        except KeyboardInterrupt:
-            logger.info("Shutting down.")
-            break
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down; waiting for running cycles to finish...")
+        scheduler.stop()
+    flush_slack(timeout=10)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+"""
+Stratified sampling of log rows within a fixed row budget
+
+Taking the first N rows by p_timestamp over-represents whatever happened
+first: a 200-row sample of an error storm is 200 copies of the first
+error. Stratified sampling splits rows into strata (by default level x
+service_name x minute) and fills the budget round-robin, so every stratum
+gets its first row before any stratum gets a second one.
+
+- stratified_sql(): pushes the sampling into DataFusion with window
+  functions, so only the sampled rows leave Parseable
+- StratifiedReservoir: the same allocation client-side over a stream of
+  rows, using one reservoir sample per stratum (for servers or streams
+  where the window-function query fails)
+
+Sampled rows carry a `_stratum_rows` column: the number of rows in the
+window that fall in the same stratum, so a reader can tell one
+representative row of 5,000 from a one-off.
+
+Usage:
+    from log_sampling import stratified_sql, StratifiedReservoir
+
+    sql = stratified_sql("otel-logs", "p_timestamp > NOW() - INTERVAL '15 minutes'", limit=200)
+
+    reservoir = StratifiedReservoir(limit=200)
+    for row in rows:
+        reservoir.add(row)
+    sample = reservoir.sample()
+"""
+
+import hashlib
+import random
+from collections import defaultdict
+
+DEFAULT_STRATA = ("level", "service_name")
+DEFAULT_BUCKET = "minute"
+STRATUM_ROWS_COLUMN = "_stratum_rows"
+_ROW_NUMBER_COLUMN = "_rn"
+_BUCKET_COLUMN = "_bucket"
+_SPREAD_COLUMN = "_spread"
+
+# Length of the ISO timestamp prefix that identifies each bucket client-side.
+_BUCKET_PREFIX = {"second": 19, "minute": 16, "hour": 13, "day": 10}
+
+
+def stratified_sql(
+    stream: str,
+    where: str,
+    limit: int,
+    strata: tuple[str, ...] = DEFAULT_STRATA,
+    bucket: str | None = DEFAULT_BUCKET,
+    per_stratum: int | None = None,
+    columns: str = "*",
+) -> str:
+    """DataFusion SQL returning at most limit rows spread across strata.
+
+    Rows are numbered within each stratum (earliest first) and the outer
+    query keeps row 1 of every stratum, then row 2, ... until limit is
+    reached. per_stratum caps how many rows any single stratum can
+    contribute. The result is ordered by p_timestamp.
+
+    When a layer has more strata than the budget left, each strata group
+    (e.g. level x service) first gets its busiest time bucket, then its
+    next busiest, with a stable hash breaking ties (see _spread). The
+    sample then covers every group, its spikes and a spread of buckets
+    instead of only the oldest ones. columns must include the strata
+    columns.
+    """
+    if bucket is not None and bucket not in _BUCKET_PREFIX:
+        raise ValueError(f"unsupported bucket {bucket!r}; use one of {', '.join(_BUCKET_PREFIX)}")
+    groups = [f'"{c}"' for c in strata]
+    bucket_expr = f"date_trunc('{bucket}', p_timestamp)" if bucket else "NULL"
+    partition = groups + ([bucket_expr] if bucket else [])
+    partition_by = ", ".join(partition) if partition else "1"
+    group_by = ", ".join(groups) if groups else "1"
+    stratum_hash = "md5(concat_ws('|', {}))".format(
+        ", ".join(f"CAST({c} AS VARCHAR)" for c in groups + [_BUCKET_COLUMN])
+    )
+    cap = min(per_stratum or limit, limit)
+    return (
+        f"SELECT * FROM ("
+        f"SELECT *, DENSE_RANK() OVER (PARTITION BY {group_by} "
+        f"ORDER BY {STRATUM_ROWS_COLUMN} DESC, {stratum_hash}) AS {_SPREAD_COLUMN} FROM ("
+        f"SELECT {columns}, {bucket_expr} AS {_BUCKET_COLUMN}, "
+        f"ROW_NUMBER() OVER (PARTITION BY {partition_by} ORDER BY p_timestamp ASC) AS {_ROW_NUMBER_COLUMN}, "
+        f"COUNT(*) OVER (PARTITION BY {partition_by}) AS {STRATUM_ROWS_COLUMN} "
+        f'FROM "{stream}" WHERE {where}'
+        f") WHERE {_ROW_NUMBER_COLUMN} <= {cap} "
+        f"ORDER BY {_ROW_NUMBER_COLUMN} ASC, {_SPREAD_COLUMN} ASC, {STRATUM_ROWS_COLUMN} DESC, {stratum_hash} "
+        f"LIMIT {limit}"
+        f") ORDER BY p_timestamp ASC"
+    )
+
+
+def strip_sampling_columns(rows: list[dict]) -> list[dict]:
+    """Drop the internal ranking columns from stratified_sql() results."""
+    for row in rows:
+        for column in (_ROW_NUMBER_COLUMN, _BUCKET_COLUMN, _SPREAD_COLUMN):
+            row.pop(column, None)
+    return rows
+
+
+def stratum_key(
+    row: dict,
+    strata: tuple[str, ...] = DEFAULT_STRATA,
+    bucket: str | None = DEFAULT_BUCKET,
+) -> tuple:
+    key = tuple(row.get(c) for c in strata)
+    if bucket:
+        key += (str(row.get("p_timestamp", ""))[: _BUCKET_PREFIX[bucket]],)
+    return key
+
+
+def _stratum_hash(key: tuple) -> str:
+    """Stable tie-break between strata, mirroring the md5 in stratified_sql()."""
+    return hashlib.md5("|".join(str(v) for v in key).encode()).hexdigest()
+
+
+class StratifiedReservoir:
+    """Client-side stratified sample over rows seen one at a time.
+
+    Keeps a uniform reservoir sample (Algorithm R) of up to
+    min(per_stratum, limit) rows per stratum. Memory does not grow with the
+    number of rows seen, but it does grow with the number of strata: up to
+    strata x min(per_stratum, limit) rows, not limit. sample() then
+    allocates the budget round-robin across strata like stratified_sql().
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        strata: tuple[str, ...] = DEFAULT_STRATA,
+        bucket: str | None = DEFAULT_BUCKET,
+        per_stratum: int | None = None,
+        seed: int = 0,
+    ):
+        self.limit = limit
+        self.strata = strata
+        self.bucket = bucket
+        self.capacity = min(per_stratum or limit, limit)
+        self._rng = random.Random(seed)
+        self._reservoirs: dict[tuple, list[dict]] = defaultdict(list)
+        self._seen: dict[tuple, int] = defaultdict(int)
+
+    @property
+    def rows_seen(self) -> int:
+        return sum(self._seen.values())
+
+    @property
+    def strata_seen(self) -> int:
+        return len(self._seen)
+
+    def add(self, row: dict) -> None:
+        key = stratum_key(row, self.strata, self.bucket)
+        self._seen[key] += 1
+        reservoir = self._reservoirs[key]
+        if len(reservoir) < self.capacity:
+            reservoir.append(row)
+        else:
+            j = self._rng.randrange(self._seen[key])
+            if j < self.capacity:
+                reservoir[j] = row
+
+    def sample(self) -> list[dict]:
+        """Up to limit rows, round-robin across strata, ordered by p_timestamp."""
+        ordered = {
+            key: sorted(rows, key=lambda r: str(r.get("p_timestamp", "")))
+            for key, rows in self._reservoirs.items()
+        }
+        # Same spread as stratified_sql(): within each strata group, buckets
+        # rank by size, then by a stable hash.
+        by_group: dict[tuple, list[tuple]] = defaultdict(list)
+        for key in ordered:
+            by_group[key[: len(self.strata)]].append(key)
+        spread = {}
+        for keys in by_group.values():
+            keys.sort(key=lambda k: (-self._seen[k], _stratum_hash(k)))
+            for rank, key in enumerate(keys):
+                spread[key] = rank
+        picked: list[dict] = []
+        depth = 0
+        while len(picked) < self.limit:
+            layer = [
+                (key, rows[depth]) for key, rows in ordered.items() if depth < len(rows)
+            ]
+            if not layer:
+                break
+            # A partial last layer keeps the best spread strata, as in SQL.
+            layer.sort(
+                key=lambda item: (
+                    spread[item[0]],
+                    -self._seen[item[0]],
+                    _stratum_hash(item[0]),
+                )
+            )
+            for key, row in layer[: self.limit - len(picked)]:
+                picked.append({**row, STRATUM_ROWS_COLUMN: self._seen[key]})
+            depth += 1
+        picked.sort(key=lambda r: str(r.get("p_timestamp", "")))
+        return picked
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Local hash-join correlation of error logs and traces
+
+For multi-signal RCA (experiment 05) the logs and spans used to be sent
+side by side, leaving Claude to match span_trace_id / trace_id by eye
+across thousands of rows. Here the join happens locally:
+
+- error logs for the window are fetched once and hashed by trace ID
+- only the traces they reference are fetched, in batched IN (...) queries
+  (ParseableContext.get_traces())
+- each trace becomes a bundle: its error logs, the failing span (the
+  log's own span if the log carries one, else the deepest span with an
+  error status) and the upstream chain from that span to the root
+- bundles with the same pattern (failing span + normalized log messages)
+  are grouped and ranked by how many traces show it; traces that weren't
+  found join the pattern their log messages match
+
+Only the top-K groups go into the prompt: one representative chain and
+its distinct log messages with counts, instead of every row.
+
+Usage:
+    from parseable_context_builder import ParseableContext
+
+    correlation = ParseableContext().correlate_errors("otel-logs", "otel-traces", minutes=15)
+    prompt_section = correlation.to_prompt_text(top_k=5)
+
+    from log_trace_correlation import correlate, SIMPLE_LOGS
+    from service_graph import SIMPLE_SCHEMA
+    correlation = correlate(logs, traces, SIMPLE_LOGS, SIMPLE_SCHEMA)
+
+    python integration-patterns/log_trace_correlation.py --from-file experiments/05-incident-rca/sample_data.json
+    python integration-patterns/log_trace_correlation.py --log-stream otel-logs --trace-stream otel-traces --minutes 30
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from service_graph import OTEL_SCHEMA, SIMPLE_SCHEMA, SpanSchema, _is_error
+
+# Correlation groups included in the prompt by default.
+CORRELATION_TOP_K = 5
+# Distinct log messages shown per group.
+MESSAGES_PER_GROUP = 5
+ERROR_LEVELS = ("error", "ERROR", "Error", "fatal", "FATAL", "critical", "CRITICAL")
+
+
+@dataclass(frozen=True)
+class LogSchema:
+    """Column names of the log fields the correlation uses."""
+
+    trace_id: str = "span_trace_id"
+    span_id: str | None = "span_span_id"
+    service: str = "service.name"
+    level: str = "severity_text"
+    message: str = "body"
+    timestamp: str = "p_timestamp"
+
+    def columns(self) -> str:
+        names = [self.timestamp, self.trace_id, self.span_id, self.service, self.level, self.message]
+        return ", ".join(f'"{name}"' for name in dict.fromkeys(names) if name)
+
+
+# Parseable's flattened OpenTelemetry logs.
+OTEL_LOGS = LogSchema()
+# Simplified log records, as in experiments/05-incident-rca sample data
+# (trace_id may be nested under "attributes").
+SIMPLE_LOGS = LogSchema(
+    trace_id="trace_id",
+    span_id=None,
+    service="service_name",
+    level="level",
+    message="message",
+    timestamp="timestamp",
+)
+LOG_SCHEMAS = {"otel": OTEL_LOGS, "simple": SIMPLE_LOGS}
+
+_VARIABLE = re.compile(r"\b[0-9a-f]{8,}\b|\b[0-9a-f-]{36}\b|\d+(?:\.\d+)?", re.I)
+
+
+def _field(row: dict, name: str | None):
+    """row[name], also looking in a nested "attributes" object."""
+    if not name:
+        return None
+    if name in row:
+        return row[name]
+    attributes = row.get("attributes")
+    return attributes.get(name) if isinstance(attributes, dict) else None
+
+
+def log_trace_id(row: dict, schema: LogSchema) -> str | None:
+    """The trace ID a log row carries, or None (missing, empty or all zeros)."""
+    trace_id = _field(row, schema.trace_id)
+    return str(trace_id) if trace_id and str(trace_id).strip("0") else None
+
+
+def message_template(message) -> str:
+    """Message with numbers and IDs replaced, so repeats of one error compare equal."""
+    return _VARIABLE.sub("<n>", str(message or "")).strip()
+
+
+def _clip(text: str, limit: int = 200) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+@dataclass
+class ChainSpan:
+    service: str
+    operation: str
+    duration_ms: float | None
+    error: bool
+
+    def label(self) -> str:
+        parts = [f"{self.duration_ms:.0f} ms"] if self.duration_ms is not None else []
+        if self.error:
+            parts.append("ERROR")
+        detail = f" ({', '.join(parts)})" if parts else ""
+        return f"{self.service} {self.operation}".strip() + detail
+
+
+@dataclass
+class TraceBundle:
+    """Error logs of one trace joined to its failing span and upstream chain."""
+
+    trace_id: str
+    logs: list[dict]
+    span_count: int = 0
+    # Root first, failing span last; empty when the trace wasn't found.
+    chain: list[ChainSpan] = field(default_factory=list)
+
+    @property
+    def failing(self) -> ChainSpan | None:
+        return self.chain[-1] if self.chain else None
+
+
+@dataclass
+class BundleGroup:
+    """Traces that fail the same way, with one representative bundle."""
+
+    signature: tuple
+    bundles: list[TraceBundle]
+    # (service, level, template) -> [count, first raw message]
+    messages: dict[tuple, list] = field(default_factory=dict)
+
+    @property
+    def representative(self) -> TraceBundle:
+        return max(self.bundles, key=lambda b: (b.span_count > 0, len(b.chain), len(b.logs)))
+
+    @property
+    def log_count(self) -> int:
+        return sum(len(b.logs) for b in self.bundles)
+
+    def to_dict(self, max_trace_ids: int = 10) -> dict:
+        rep = self.representative
+        return {
+            "traces": len(self.bundles),
+            "error_logs": self.log_count,
+            "trace_ids": [b.trace_id for b in self.bundles[:max_trace_ids]],
+            "failing_span": rep.failing.label() if rep.failing else None,
+            "chain": [span.label() for span in rep.chain],
+            "messages": [
+                {"service": service, "level": level, "count": count, "example": example}
+                for (service, level, _), (count, example) in self.messages.items()
+            ],
+        }
+
+
+@dataclass
+class Correlation:
+    groups: list[BundleGroup]
+    error_logs: int
+    uncorrelated_logs: int
+    traces_requested: int
+    traces_found: int
+
+    def to_dict(self, top_k: int = CORRELATION_TOP_K) -> dict:
+        return {
+            "error_logs": self.error_logs,
+            "uncorrelated_logs": self.uncorrelated_logs,
+            "traces_requested": self.traces_requested,
+            "traces_found": self.traces_found,
+            "patterns": len(self.groups),
+            "groups": [group.to_dict() for group in self.groups[:top_k]],
+        }
+
+    def to_prompt_text(self, top_k: int = CORRELATION_TOP_K) -> str:
+        if not self.groups:
+            return ""
+        shown = self.groups[:top_k]
+        lines = [
+            f"**Error logs joined to traces** (top {len(shown)} of {len(self.groups)} patterns; "
+            f"{self.error_logs} error logs, {self.traces_found}/{self.traces_requested} traces found, "
+            f"{self.uncorrelated_logs} logs without a trace ID):\n"
+        ]
+        for rank, group in enumerate(shown, 1):
+            rep = group.representative
+            failing = f"{rep.failing.service} {rep.failing.operation}".strip() if rep.failing else "trace not found"
+            example_ids = ", ".join(b.trace_id for b in group.bundles[:3])
+            lines.append(
+                f"{rank}. **{failing}** -- {len(group.bundles)} trace{'s' if len(group.bundles) != 1 else ''}, "
+                f"{group.log_count} error logs "
+                f"(e.g. {example_ids})"
+            )
+            if rep.chain:
+                lines.append("   Chain: " + " -> ".join(span.label() for span in rep.chain))
+            for (service, level, _), (count, example) in list(group.messages.items())[:MESSAGES_PER_GROUP]:
+                lines.append(f"   - {service} {level} x{count}: {_clip(example)}")
+        return "\n".join(lines) + "\n"
+
+
+def _chain(spans: list[dict], schema: SpanSchema, log_span_ids: set[str]) -> list[ChainSpan]:
+    """Failing span of a trace and its ancestors, root first."""
+    by_id = {}
+    for span in spans:
+        span_id = span.get(schema.span_id)
+        if span_id and span_id not in by_id:  # one row per span event in OTel streams
+            by_id[span_id] = span
+    if not by_id:
+        return []
+
+    depth_cache: dict[str, int] = {}
+
+    def depth(span_id: str) -> int:
+        seen = []
+        current = span_id
+        while current in by_id and current not in depth_cache and current not in seen:
+            seen.append(current)
+            current = by_id[current].get(schema.parent_span_id)
+        base = depth_cache.get(current, 0)
+        for offset, sid in enumerate(reversed(seen), 1):
+            depth_cache[sid] = base + offset
+        return depth_cache.get(span_id, 0)
+
+    def duration(span: dict) -> float:
+        value = span.get(schema.duration)
+        return float(value) * schema.duration_to_ms if value is not None else 0.0
+
+    logged = [sid for sid in log_span_ids if sid in by_id]
+    errors = [sid for sid, span in by_id.items() if _is_error(span.get(schema.status))]
+    candidates = logged or errors or list(by_id)
+    failing = max(candidates, key=lambda sid: (depth(sid), duration(by_id[sid])))
+
+    chain, current, seen = [], failing, set()
+    while current in by_id and current not in seen:
+        seen.add(current)
+        span = by_id[current]
+        value = span.get(schema.duration)
+        chain.append(
+            ChainSpan(
+                service=str(span.get(schema.service) or "?"),
+                operation=str(span.get(schema.operation) or "") if schema.operation else "",
+                duration_ms=float(value) * schema.duration_to_ms if value is not None else None,
+                error=_is_error(span.get(schema.status)),
+            )
+        )
+        current = span.get(schema.parent_span_id)
+    return chain[::-1]
+
+
+def correlate(
+    logs: list[dict],
+    traces: dict[str, list[dict]],
+    log_schema: LogSchema = OTEL_LOGS,
+    span_schema: SpanSchema = OTEL_SCHEMA,
+) -> Correlation:
+    """Hash-join error logs to spans by trace ID and group the bundles by pattern.
+
+    traces maps trace ID -> span rows (ParseableContext.get_traces()).
+    """
+    by_trace: dict[str, list[dict]] = defaultdict(list)
+    uncorrelated = 0
+    for row in logs:
+        trace_id = log_trace_id(row, log_schema)
+        if trace_id:
+            by_trace[trace_id].append(row)
+        else:
+            uncorrelated += 1
+
+    bundles = []
+    for trace_id, trace_logs in by_trace.items():
+        trace_logs.sort(key=lambda row: str(_field(row, log_schema.timestamp) or ""))
+        spans = traces.get(trace_id, [])
+        log_span_ids = {str(s) for s in (_field(row, log_schema.span_id) for row in trace_logs) if s}
+        keys = [
+            (
+                str(_field(row, log_schema.service) or "?"),
+                str(_field(row, log_schema.level) or ""),
+                message_template(_field(row, log_schema.message)),
+            )
+            for row in trace_logs
+        ]
+        bundles.append((TraceBundle(trace_id, trace_logs, len(spans), _chain(spans, span_schema, log_span_ids)), keys))
+
+    # Pattern = distinct log messages + failing span. Traces that weren't
+    # found join the most common pattern with the same messages, if any.
+    groups: dict[tuple, BundleGroup] = {}
+    by_messages: dict[tuple, Counter] = defaultdict(Counter)
+    for bundle, keys in bundles:
+        if bundle.chain:
+            messages = tuple(sorted(set(keys)))
+            by_messages[messages][(bundle.failing.service, bundle.failing.operation)] += 1
+    for bundle, keys in bundles:
+        messages = tuple(sorted(set(keys)))
+        if bundle.failing:
+            failing = (bundle.failing.service, bundle.failing.operation)
+        else:
+            common = by_messages[messages].most_common(1)
+            failing = common[0][0] if common else None
+        signature = (messages, failing)
+        group = groups.setdefault(signature, BundleGroup(signature, []))
+        group.bundles.append(bundle)
+        for key, row in zip(keys, bundle.logs):
+            entry = group.messages.setdefault(key, [0, str(_field(row, log_schema.message) or "")])
+            entry[0] += 1
+
+    ranked = sorted(groups.values(), key=lambda g: (len(g.bundles), g.log_count), reverse=True)
+    for group in ranked:
+        group.messages = dict(sorted(group.messages.items(), key=lambda item: -item[1][0]))
+    return Correlation(
+        groups=ranked,
+        error_logs=len(logs),
+        uncorrelated_logs=uncorrelated,
+        traces_requested=len(by_trace),
+        traces_found=sum(1 for trace_id in by_trace if traces.get(trace_id)),
+    )
+
+
+def _load_sample(path: str) -> tuple[list[dict], dict[str, list[dict]]]:
+    """Error logs and traces from an experiment 05 style sample_data.json."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    logs = [row for row in data.get("log_excerpts", []) if str(row.get("level", "")) in ERROR_LEVELS]
+    traces = {item["trace_id"]: list(item.get("spans", [])) for item in data.get("trace_samples", [])}
+    return logs, traces
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Join error logs to traces and rank failure patterns.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-file", help="Experiment 05 style sample_data.json (log_excerpts + trace_samples)")
+    source.add_argument("--log-stream", help="Parseable log stream to read error logs from")
+    parser.add_argument("--trace-stream", default="traces", help="Parseable traces stream (default: traces)")
+    parser.add_argument("--minutes", type=int, default=15, help="Look-back window (default: 15)")
+    parser.add_argument("--schema", choices=sorted(LOG_SCHEMAS), help="Column names (default: by source)")
+    parser.add_argument("--top-k", type=int, default=CORRELATION_TOP_K, help="Patterns to show")
+    parser.add_argument("--json", action="store_true", help="Print the groups as JSON")
+    args = parser.parse_args()
+
+    schema = args.schema or ("simple" if args.from_file else "otel")
+    log_schema, span_schema = LOG_SCHEMAS[schema], {"otel": OTEL_SCHEMA, "simple": SIMPLE_SCHEMA}[schema]
+    if args.from_file:
+        logs, traces = _load_sample(args.from_file)
+        correlation = correlate(logs, traces, log_schema, span_schema)
+        raw_chars = len(json.dumps(logs, default=str)) + len(json.dumps(traces, default=str))
+    else:
+        from parseable_context_builder import ParseableContext
+
+        ctx = ParseableContext()
+        try:
+            correlation = ctx.correlate_errors(
+                args.log_stream,
+                args.trace_stream,
+                minutes=args.minutes,
+                log_schema=log_schema,
+                span_schema=span_schema,
+            )
+        except Exception as exc:
+            print(f"Error: correlation failed: {exc}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            ctx.close()
+        raw_chars = None
+
+    if args.json:
+        print(json.dumps(correlation.to_dict(args.top_k), indent=2, default=str))
+        return
+    text = correlation.to_prompt_text(args.top_k)
+    print(text or "No error logs with trace IDs in the window.")
+    if raw_chars:
+        print(f"[{len(text)} chars in the prompt vs {raw_chars} chars of raw logs + spans]", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
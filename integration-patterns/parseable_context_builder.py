@@ -12,32 +12,88 @@ Usage:
     # Recent logs
     logs = ctx.get_recent_logs("otel-logs", minutes=15)
 
+    # Representative logs: spread across level x service x minute
+    logs = ctx.get_recent_logs("otel-logs", minutes=15, sampling="stratified")
+
     # Error summary
     errors = ctx.get_error_summary("otel-logs", minutes=30)
 
     # Full trace
     spans = ctx.get_trace_for_id("abc123")
 
+    # Many traces in a few queries: {trace_id: [spans]}
+    traces = ctx.get_traces(["abc123", "def456"])
+
     # Stream health stats
     stats = ctx.get_stream_stats("otel-logs")
 
-    # Multi-stream incident context
+    # Error logs hash-joined to the traces they reference, grouped by pattern
+    correlation = ctx.correlate_errors("otel-logs", "otel-traces", minutes=15)
+    print(correlation.to_prompt_text(top_k=5))
+
+    # Multi-stream incident context. Sections are lazy: nothing is queried
+    # until a section is read or the context is rendered.
     context = ctx.build_incident_context(["otel-logs", "traces"], minutes=15)
+    context = ctx.build_incident_context(["otel-logs"], minutes=15, sampling="stratified")
+    context = ctx.build_incident_context(["otel-logs"], minutes=15, trace_stream="otel-traces")
+    errors = context.error_summaries["otel-logs"]   # runs only the error query
+    prompt = context.to_prompt_text()               # fetches the rest concurrently
+
+    # Arbitrary SQL over an explicit time range
+    rows = ctx.query('SELECT COUNT(*) AS n FROM "otel-logs"',
+                     "2026-02-06T06:00:00+00:00", "2026-02-06T07:00:00+00:00")
 
 Requires:
     pip install httpx
 """
 
+import functools
 import json
+import math
 import os
+import threading
+from collections import Counter
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
 
 try:
     import httpx
 except ImportError:
     raise ImportError("httpx is required: pip install httpx")
 
+from log_sampling import (
+    DEFAULT_BUCKET,
+    DEFAULT_STRATA,
+    StratifiedReservoir,
+    strip_sampling_columns,
+    stratified_sql,
+)
+from log_trace_correlation import (
+    CORRELATION_TOP_K,
+    ERROR_LEVELS,
+    OTEL_LOGS,
+    Correlation,
+    LogSchema,
+    correlate,
+    log_trace_id,
+)
+from service_graph import OTEL_SCHEMA, SpanSchema
+
+# Log rows included per stream in IncidentContext.to_prompt_text().
+PROMPT_LOG_ROWS = 50
+# Rows scanned client-side when stratified sampling falls back to a reservoir.
+FALLBACK_SCAN_ROWS = 20_000
+# Trace IDs per IN (...) list in get_traces().
+TRACE_ID_BATCH = 200
+# Threads used by IncidentContext.prefetch() to load pending sections.
+PREFETCH_WORKERS = 8
+# Error logs read, and traces fetched, by correlate_errors().
+CORRELATION_LOG_ROWS = 2_000
+CORRELATION_MAX_TRACES = 500
+
 
 @dataclass
 class StreamStats:
@@ -52,18 +108,123 @@ class StreamStats:
     distinct_services: list[str] = field(default_factory=list)
 
 
+class LazySection:
+    """A context section whose query runs on first access.
+
+    loader() produces the value; if it raises, fallback(exc) is used
+    instead. The value is computed once, and concurrent callers wait for
+    the first one to finish.
+    """
+
+    def __init__(self, loader: Callable[[], Any], fallback: Callable[[Exception], Any]):
+        self._loader = loader
+        self._fallback = fallback
+        self._value: Any = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> Any:
+        with self._lock:
+            if not self._loaded:
+                try:
+                    self._value = self._loader()
+                except Exception as exc:
+                    self._value = self._fallback(exc)
+                self._loaded = True
+                self._loader = self._fallback = None
+        return self._value
+
+
+class LazySections(MutableMapping):
+    """Per-stream mapping whose LazySection values load on access.
+
+    Reads return the loaded value, so it can be used like the plain dicts
+    IncidentContext used to hold; assigning a value stores it as-is.
+    """
+
+    def __init__(self, items: dict | None = None):
+        self._items = dict(items or {})
+
+    def __getitem__(self, key):
+        value = self._items[key]
+        return value.get() if isinstance(value, LazySection) else value
+
+    def __setitem__(self, key, value) -> None:
+        self._items[key] = value
+
+    def __delitem__(self, key) -> None:
+        del self._items[key]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def pending(self, key) -> LazySection | None:
+        """The unloaded section for key, if there is one."""
+        value = self._items.get(key)
+        if isinstance(value, LazySection) and not value.loaded:
+            return value
+        return None
+
+    def __repr__(self) -> str:
+        loaded = {
+            k: (v.get() if isinstance(v, LazySection) and v.loaded else v)
+            for k, v in self._items.items()
+        }
+        return f"LazySections({loaded!r})"
+
+
 @dataclass
 class IncidentContext:
-    """Aggregated context from multiple streams for incident analysis."""
+    """Aggregated context from multiple streams for incident analysis.
+
+    The per-stream sections may hold LazySection values (see
+    ParseableContext.build_incident_context()); they are queried when first
+    read or when the context is rendered.
+    """
 
     streams: list[str] = field(default_factory=list)
     window_minutes: int = 0
-    recent_logs: dict[str, list[dict]] = field(default_factory=dict)
-    error_summaries: dict[str, list[dict]] = field(default_factory=dict)
-    stream_stats: dict[str, StreamStats] = field(default_factory=dict)
+    recent_logs: MutableMapping[str, list[dict]] = field(default_factory=LazySections)
+    error_summaries: MutableMapping[str, list[dict]] = field(default_factory=LazySections)
+    stream_stats: MutableMapping[str, StreamStats] = field(default_factory=LazySections)
+    correlations: MutableMapping[str, Correlation | None] = field(default_factory=LazySections)
+    correlation_top_k: int = CORRELATION_TOP_K
+
+    def _pending_sections(self) -> list[LazySection]:
+        """Unloaded sections, in the order to_prompt_text() renders them."""
+        pending = []
+        for stream in self.streams:
+            for sections in (self.stream_stats, self.error_summaries, self.correlations, self.recent_logs):
+                section = sections.pending(stream) if isinstance(sections, LazySections) else None
+                if section is not None:
+                    pending.append(section)
+        return pending
+
+    def prefetch(self, max_workers: int = PREFETCH_WORKERS) -> None:
+        """Start loading every pending section in the background.
+
+        Sections are submitted in rendering order, so the first ones the
+        renderer needs are the first to be queried. Reading a section that
+        is still loading waits for it.
+        """
+        pending = self._pending_sections()
+        if len(pending) < 2:
+            return  # nothing to overlap; the renderer loads it inline
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pending)))
+        for section in pending:
+            executor.submit(section.get)
+        executor.shutdown(wait=False)
 
     def to_prompt_text(self) -> str:
         """Format the incident context as text suitable for a Claude prompt."""
+        self.prefetch()
         sections = []
         sections.append(
             f"## Incident Context (last {self.window_minutes} minutes)\n"
@@ -87,12 +248,16 @@ class IncidentContext:
                 sections.append(json.dumps(errors, indent=2, default=str))
                 sections.append("\n```\n")
 
+            correlation = self.correlations.get(stream)
+            if correlation and correlation.groups:
+                sections.append("\n" + correlation.to_prompt_text(self.correlation_top_k))
+
             logs = self.recent_logs.get(stream, [])
             if logs:
                 sections.append(
                     f"\n**Recent Logs ({len(logs)} entries):**\n```json\n"
                 )
-                sections.append(json.dumps(logs[:50], indent=2, default=str))
+                sections.append(json.dumps(logs[:PROMPT_LOG_ROWS], indent=2, default=str))
                 sections.append("\n```\n")
 
         return "\n".join(sections)
@@ -115,29 +280,57 @@ class ParseableContext:
             parts = auth_str.split(":", 1)
             self.auth = (parts[0], parts[1]) if len(parts) == 2 else (parts[0], "")
         self.timeout = timeout
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
+
+    def _http(self) -> httpx.Client:
+        """Pooled HTTP client, shared by all threads using this context."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                )
+            return self._client
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    @staticmethod
+    def format_time(dt: datetime) -> str:
+        """Format a datetime as the UTC timestamp string Parseable expects."""
+        return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
 
-    def _query(self, sql: str, start_time: str, end_time: str) -> list[dict]:
+    def query(
+        self,
+        sql: str,
+        start_time: str,
+        end_time: str,
+        timeout: float | None = None,
+    ) -> list[dict]:
         """Execute a DataFusion SQL query via the Parseable REST API."""
         payload = {
             "query": sql,
             "startTime": start_time,
             "endTime": end_time,
         }
-        with httpx.Client(timeout=self.timeout) as client:
-            resp = client.post(
-                f"{self.url}/api/v1/query",
-                json=payload,
-                auth=self.auth,
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = self._http().post(
+            f"{self.url}/api/v1/query",
+            json=payload,
+            auth=self.auth,
+            timeout=timeout if timeout is not None else self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
 
     def _time_range(self, minutes: int) -> tuple[str, str]:
         """Return (start_time, end_time) ISO strings for the given look-back window."""
         now = datetime.now(timezone.utc)
         start = now - timedelta(minutes=minutes)
-        fmt = "%Y-%m-%dT%H:%M:%S+00:00"
-        return start.strftime(fmt), now.strftime(fmt)
+        return self.format_time(start), self.format_time(now)
 
     # -----------------------------------------------------------------
     # Public API
@@ -148,12 +341,19 @@ class ParseableContext:
         stream: str,
         minutes: int = 15,
         limit: int = 200,
+        sampling: str = "first",
     ) -> list[dict]:
         """Fetch recent log entries from a stream.
 
         Uses DataFusion SQL with p_timestamp for time filtering.
-        Returns logs ordered by timestamp ascending.
+        Returns logs ordered by timestamp ascending: the first `limit` rows,
+        or with sampling="stratified" a sample spread across strata (see
+        sample_logs()).
         """
+        if sampling == "stratified":
+            return self.sample_logs(stream, minutes=minutes, limit=limit)
+        if sampling != "first":
+            raise ValueError(f"unknown sampling mode {sampling!r}; use 'first' or 'stratified'")
         sql = (
             f'SELECT * FROM "{stream}" '
             f"WHERE p_timestamp > NOW() - INTERVAL '{minutes} minutes' "
@@ -161,7 +361,48 @@ class ParseableContext:
             f"LIMIT {limit}"
         )
         start_time, end_time = self._time_range(minutes)
-        return self._query(sql, start_time, end_time)
+        return self.query(sql, start_time, end_time)
+
+    def sample_logs(
+        self,
+        stream: str,
+        minutes: int = 15,
+        limit: int = 200,
+        strata: tuple[str, ...] = DEFAULT_STRATA,
+        bucket: str | None = DEFAULT_BUCKET,
+        per_stratum: int | None = None,
+    ) -> list[dict]:
+        """Stratified sample of up to `limit` recent rows.
+
+        Strata are level x service_name x minute by default; the budget is
+        filled round-robin so each stratum is represented before any gets a
+        second row. Sampling runs in DataFusion with window functions; if
+        that query is rejected, up to FALLBACK_SCAN_ROWS rows are scanned
+        into a client-side reservoir instead. Each row has a _stratum_rows
+        column with the size of its stratum.
+        """
+        where = f"p_timestamp > NOW() - INTERVAL '{minutes} minutes'"
+        start_time, end_time = self._time_range(minutes)
+        sql = stratified_sql(stream, where, limit, strata, bucket, per_stratum)
+        try:
+            return strip_sampling_columns(self.query(sql, start_time, end_time))
+        except httpx.HTTPStatusError:
+            pass
+
+        reservoir = StratifiedReservoir(limit, strata, bucket, per_stratum)
+        page_size = 5_000
+        for offset in range(0, FALLBACK_SCAN_ROWS, page_size):
+            page = self.query(
+                f'SELECT * FROM "{stream}" WHERE {where} '
+                f"ORDER BY p_timestamp ASC LIMIT {page_size} OFFSET {offset}",
+                start_time,
+                end_time,
+            )
+            for row in page:
+                reservoir.add(row)
+            if len(page) < page_size:
+                break
+        return reservoir.sample()
 
     def get_error_summary(
         self,
@@ -182,7 +423,7 @@ class ParseableContext:
             f"LIMIT 25"
         )
         start_time, end_time = self._time_range(minutes)
-        return self._query(sql, start_time, end_time)
+        return self.query(sql, start_time, end_time)
 
     def get_trace_for_id(
         self,
@@ -203,7 +444,86 @@ class ParseableContext:
         now = datetime.now(timezone.utc)
         start = now - timedelta(hours=24)
         fmt = "%Y-%m-%dT%H:%M:%S+00:00"
-        return self._query(sql, start.strftime(fmt), now.strftime(fmt))
+        return self.query(sql, start.strftime(fmt), now.strftime(fmt))
+
+    def get_traces(
+        self,
+        trace_ids: list[str],
+        trace_stream: str = "traces",
+        id_column: str = "trace_id",
+        batch_size: int = TRACE_ID_BATCH,
+        hours: int = 24,
+    ) -> dict[str, list[dict]]:
+        """Retrieve spans for many trace IDs at once.
+
+        IDs are deduplicated and sent batch_size at a time in a single
+        `WHERE <id_column> IN (...)` query per batch, instead of one query
+        per trace. Returns {trace_id: spans ordered by p_timestamp}, with an
+        empty list for IDs that weren't found. For Parseable's OTel traces
+        streams use id_column="span_trace_id".
+        """
+        ids = list(dict.fromkeys(str(t) for t in trace_ids))
+        traces: dict[str, list[dict]] = {trace_id: [] for trace_id in ids}
+        now = datetime.now(timezone.utc)
+        start_time = self.format_time(now - timedelta(hours=hours))
+        end_time = self.format_time(now)
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i : i + batch_size]
+            in_list = ", ".join("'" + trace_id.replace("'", "''") + "'" for trace_id in batch)
+            sql = (
+                f'SELECT * FROM "{trace_stream}" '
+                f'WHERE "{id_column}" IN ({in_list}) '
+                f"ORDER BY p_timestamp ASC"
+            )
+            for span in self.query(sql, start_time, end_time):
+                trace_id = str(span.get(id_column))
+                if trace_id in traces:
+                    traces[trace_id].append(span)
+        return traces
+
+    def correlate_errors(
+        self,
+        log_stream: str,
+        trace_stream: str = "traces",
+        minutes: int = 15,
+        log_schema: LogSchema = OTEL_LOGS,
+        span_schema: SpanSchema = OTEL_SCHEMA,
+        max_logs: int = CORRELATION_LOG_ROWS,
+        max_traces: int = CORRELATION_MAX_TRACES,
+    ) -> Correlation:
+        """Error logs of the window hash-joined to the traces they reference.
+
+        One query reads up to max_logs error logs (only the columns the join
+        needs); the max_traces trace IDs with the most error logs are then
+        fetched with get_traces(), and the join, failing-span and upstream
+        chain lookup and pattern ranking run locally (see
+        log_trace_correlation.py).
+        """
+        levels = ", ".join(f"'{level}'" for level in ERROR_LEVELS)
+        sql = (
+            f"SELECT {log_schema.columns()} "
+            f'FROM "{log_stream}" '
+            f'WHERE "{log_schema.level}" IN ({levels}) '
+            f"AND p_timestamp > NOW() - INTERVAL '{minutes} minutes' "
+            f"ORDER BY p_timestamp DESC "
+            f"LIMIT {max_logs}"
+        )
+        start_time, end_time = self._time_range(minutes)
+        logs = self.query(sql, start_time, end_time)
+        counts = Counter(filter(None, (log_trace_id(row, log_schema) for row in logs)))
+        trace_ids = [trace_id for trace_id, _ in counts.most_common(max_traces)]
+        traces = (
+            self.get_traces(
+                trace_ids,
+                trace_stream,
+                id_column=span_schema.trace_id,
+                # Spans can start a little before their first error log.
+                hours=math.ceil(minutes / 60) + 1,
+            )
+            if trace_ids
+            else {}
+        )
+        return correlate(logs, traces, log_schema, span_schema)
 
     def get_stream_stats(
         self,
@@ -228,7 +548,7 @@ class ParseableContext:
             f"WHERE p_timestamp > NOW() - INTERVAL '{minutes} minutes'"
         )
         try:
-            rows = self._query(count_sql, start_time, end_time)
+            rows = self.query(count_sql, start_time, end_time)
         except Exception:
             return StreamStats(stream=stream)
 
@@ -248,7 +568,7 @@ class ParseableContext:
             f"AND service_name IS NOT NULL"
         )
         try:
-            svc_rows = self._query(svc_sql, start_time, end_time)
+            svc_rows = self.query(svc_sql, start_time, end_time)
             stats.distinct_services = [
                 r["service_name"] for r in svc_rows if r.get("service_name")
             ]
@@ -261,51 +581,64 @@ class ParseableContext:
         self,
         streams: list[str],
         minutes: int = 15,
+        sampling: str = "first",
+        log_limit: int = PROMPT_LOG_ROWS,
+        trace_stream: str | None = None,
+        correlation_top_k: int = CORRELATION_TOP_K,
     ) -> IncidentContext:
         """Build a comprehensive incident context from multiple log streams.
 
-        Gathers recent logs, error summaries, and stream statistics for each
-        stream, then packages them into an IncidentContext object that can be
-        serialized into a Claude prompt.
+        Sets up recent logs, error summaries, and stream statistics for each
+        stream as lazy sections of an IncidentContext: no query runs until a
+        section is read or the context is rendered, and to_prompt_text()
+        fetches the sections it needs concurrently. Logs are limited to
+        log_limit rows (by default the number the prompt includes); with
+        sampling="stratified" they are a stratified sample of that size.
+        With trace_stream, each stream also gets a correlations section:
+        its error logs joined to those traces, of which the top
+        correlation_top_k patterns are rendered (see correlate_errors()).
         """
+        if sampling not in ("first", "stratified"):
+            raise ValueError(f"unknown sampling mode {sampling!r}; use 'first' or 'stratified'")
         context = IncidentContext(
             streams=list(streams),
             window_minutes=minutes,
+            correlation_top_k=correlation_top_k,
         )
 
         for stream in streams:
-            try:
-                context.recent_logs[stream] = self.get_recent_logs(
-                    stream, minutes=minutes
-                )
-            except Exception as exc:
-                context.recent_logs[stream] = [
-                    {"_error": f"Failed to fetch logs: {exc}"}
-                ]
-
-            try:
-                context.error_summaries[stream] = self.get_error_summary(
-                    stream, minutes=minutes
-                )
-            except Exception:
-                context.error_summaries[stream] = []
-
-            try:
-                context.stream_stats[stream] = self.get_stream_stats(
-                    stream, minutes=minutes
+            context.recent_logs[stream] = LazySection(
+                functools.partial(
+                    self.get_recent_logs,
+                    stream,
+                    minutes=minutes,
+                    limit=log_limit,
+                    sampling=sampling,
+                ),
+                lambda exc: [{"_error": f"Failed to fetch logs: {exc}"}],
+            )
+            context.error_summaries[stream] = LazySection(
+                functools.partial(self.get_error_summary, stream, minutes=minutes),
+                lambda exc: [],
+            )
+            context.stream_stats[stream] = LazySection(
+                functools.partial(self.get_stream_stats, stream, minutes=minutes),
+                functools.partial(lambda stream, exc: StreamStats(stream=stream), stream),
+            )
+            if trace_stream and stream != trace_stream:
+                context.correlations[stream] = LazySection(
+                    functools.partial(self.correlate_errors, stream, trace_stream, minutes=minutes),
+                    lambda exc: None,
                 )
-            except Exception:
-                context.stream_stats[stream] = StreamStats(stream=stream)
 
         return context
 
     def list_streams(self) -> list[str]:
         """List all available log streams in Parseable."""
-        with httpx.Client(timeout=self.timeout) as client:
-            resp = client.get(
-                f"{self.url}/api/v1/logstream",
-                auth=self.auth,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            return [s["name"] for s in data if "name" in s]
+        resp = self._http().get(
+            f"{self.url}/api/v1/logstream",
+            auth=self.auth,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        return [s["name"] for s in data if "name" in s]
@@ -0,0 +1,254 @@
+"""
+Resident daemon mode for command-line entry points
+
+Short CLI runs (health_summary.py --once from cron, run_experiment.py from
+scripts) spend much of their time importing SDKs, creating clients and
+opening connections. A resident daemon keeps one warm process per entry
+point listening on a Unix socket; later invocations forward their argv to
+it and stream back its output and exit code, so module imports, HTTP
+connection pools, caches and loaded baselines are reused between runs.
+
+- Commands run one at a time, in the client's working directory, with
+  stdout/stderr (including logging) streamed back to the client
+- The daemon uses its own environment (API keys, URLs); clients only send
+  argv and cwd
+- The socket is created with mode 0600, so only the owning user can
+  submit commands
+- Clients fall back to running in-process when no daemon is listening
+
+Protocol: one JSON object per line. The client sends
+{"argv": [...], "cwd": "..."} (or {"command": "ping" | "stop"}); the
+daemon replies with {"out": text} / {"err": text} chunks and finally
+{"exit": code}.
+
+Usage:
+    from resident_daemon import ResidentDaemon, forward
+
+    code = forward(".state/tool.sock", sys.argv[1:])
+    if code is not None:
+        sys.exit(code)               # handled by a running daemon
+
+    ResidentDaemon(".state/tool.sock", handler=lambda argv: run(argv)).serve_forever()
+"""
+
+import contextlib
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class _SocketWriter:
+    """File-like object that forwards writes to the client as JSON lines."""
+
+    def __init__(self, conn: socket.socket, kind: str, lock: threading.Lock):
+        self.conn = conn
+        self.kind = kind
+        self.lock = lock
+        self.closed = False
+
+    def write(self, text: str) -> int:
+        if text and not self.closed:
+            message = json.dumps({self.kind: text}).encode("utf-8") + b"\n"
+            try:
+                with self.lock:
+                    self.conn.sendall(message)
+            except OSError:
+                # Client went away (e.g. Ctrl+C); finish the command silently.
+                self.closed = True
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+@contextlib.contextmanager
+def _capture_logging(stream):
+    """Point root StreamHandlers at stream for the duration of a command."""
+    swapped = []
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            swapped.append((handler, handler.setStream(stream)))
+    try:
+        yield
+    finally:
+        for handler, previous in swapped:
+            handler.setStream(previous)
+
+
+def _is_listening(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+            return True
+        except OSError:
+            return False
+
+
+class ResidentDaemon:
+    """Serves handler(argv) -> exit code over a Unix socket.
+
+    handler may also raise SystemExit, as argparse and the CLIs do.
+    idle_timeout (seconds) stops the daemon after a quiet period.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        handler: Callable[[list[str]], int | None],
+        idle_timeout: float | None = None,
+    ):
+        self.path = path
+        self.handler = handler
+        self.idle_timeout = idle_timeout
+        self.commands_served = 0
+        self._stop = False
+
+    def _bind(self) -> socket.socket:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if os.path.exists(self.path):
+            if _is_listening(self.path):
+                raise RuntimeError(f"a daemon is already listening on {self.path}")
+            os.unlink(self.path)  # stale socket from a previous daemon
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.path, 0o600)
+        server.listen(16)
+        return server
+
+    def serve_forever(self) -> None:
+        server = self._bind()
+        server.settimeout(self.idle_timeout)
+        logger.info("Daemon listening on %s (pid %d)", self.path, os.getpid())
+        try:
+            while not self._stop:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    logger.info("Daemon idle for %ss; exiting", self.idle_timeout)
+                    break
+                with conn:
+                    self._serve_connection(conn)
+        finally:
+            server.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+
+    def _serve_connection(self, conn: socket.socket) -> None:
+        conn.settimeout(None)
+        reader = conn.makefile("r", encoding="utf-8")
+        try:
+            request = json.loads(reader.readline() or "{}")
+        except ValueError:
+            return
+        lock = threading.Lock()
+
+        def reply(message: dict) -> None:
+            with contextlib.suppress(OSError), lock:
+                conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+        command = request.get("command")
+        if command == "ping":
+            reply({"exit": 0, "pid": os.getpid(), "commands_served": self.commands_served})
+            return
+        if command == "stop":
+            self._stop = True
+            reply({"exit": 0})
+            return
+
+        argv = [str(a) for a in request.get("argv", [])]
+        out = _SocketWriter(conn, "out", lock)
+        err = _SocketWriter(conn, "err", lock)
+        cwd = os.getcwd()
+        started = time.monotonic()
+        code = 0
+        try:
+            os.chdir(request.get("cwd") or cwd)
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err), _capture_logging(err):
+                try:
+                    result = self.handler(argv)
+                    code = int(result or 0)
+                except SystemExit as e:
+                    code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                    if isinstance(e.code, str):
+                        err.write(e.code + "\n")
+                except Exception:
+                    err.write(traceback.format_exc())
+                    code = 1
+        finally:
+            os.chdir(cwd)
+        self.commands_served += 1
+        logger.info("Served %s -> exit %d in %.2fs", argv, code, time.monotonic() - started)
+        reply({"exit": code})
+
+
+def _request(path: str, message: dict, timeout: float | None = None) -> socket.socket | None:
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        return None
+    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+    return conn
+
+
+def forward(path: str, argv: list[str]) -> int | None:
+    """Run argv in the daemon on path, relaying its output.
+
+    Returns the command's exit code, or None if no daemon is listening
+    (the caller should then run the command itself).
+    """
+    if not os.path.exists(path):
+        return None
+    conn = _request(path, {"argv": list(argv), "cwd": os.getcwd()})
+    if conn is None:
+        return None
+    with conn, conn.makefile("r", encoding="utf-8") as reader:
+        for line in reader:
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "err" in message:
+                sys.stderr.write(message["err"])
+                sys.stderr.flush()
+            elif "exit" in message:
+                return message["exit"]
+    print(f"Error: daemon on {path} closed the connection before finishing", file=sys.stderr)
+    return 1
+
+
+def ping(path: str, timeout: float = 2.0) -> dict | None:
+    """Daemon status ({"pid", "commands_served"}), or None if none is running."""
+    conn = _request(path, {"command": "ping"}, timeout)
+    if conn is None:
+        return None
+    with conn, conn.makefile("r", encoding="utf-8") as reader:
+        line = reader.readline()
+    return json.loads(line) if line else None
+
+
+def stop(path: str, timeout: float = 5.0) -> bool:
+    """Ask the daemon on path to exit after its current command."""
+    conn = _request(path, {"command": "stop"}, timeout)
+    if conn is None:
+        return False
+    with conn, conn.makefile("r", encoding="utf-8") as reader:
+        reader.readline()
+    return True
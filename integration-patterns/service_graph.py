@@ -0,0 +1,684 @@
+"""
+Service dependency graph built incrementally from the traces stream
+
+Experiments 05 and 06 need to know which services call which. Dumping raw
+spans into a prompt answers that expensively and only for the spans that
+fit. ServiceGraph instead keeps caller -> callee edges, aggregated from
+parent/child span pairs that cross a service boundary:
+
+- call counts, error counts and latency percentiles per edge, with latency
+  kept in a t-digest sketch (a few hundred bytes per edge and time bucket,
+  mergeable across buckets)
+- edges bucketed by time (bucket_minutes) and pruned after retention_hours,
+  so "last 15 minutes" and "last 6 hours" come from the same state
+- update() reads the traces stream in time slices from a persisted
+  watermark to now, selecting only the span columns it needs
+- child spans whose parent hasn't arrived yet wait in a bounded buffer
+  until it does (parents usually end, and are ingested, after children)
+- CLIENT spans with db.system become edges to the database
+  ("redis:valkey-cart"), since those are never instrumented themselves
+
+Blast-radius and dependency questions are graph walks over the in-memory
+edges, with no trace scans.
+
+Usage:
+    from parseable_context_builder import ParseableContext
+    from service_graph import ServiceGraph
+
+    graph = ServiceGraph.load(".state/service_graph.json")
+    graph.update(ParseableContext(), "traces")
+    graph.save(".state/service_graph.json")
+
+    print(graph.to_prompt_text(minutes=15))
+    impacted = graph.blast_radius("payment", minutes=15)
+
+    # CLI
+    python integration-patterns/service_graph.py --stream traces
+    python integration-patterns/service_graph.py --stream traces --blast-radius payment
+    python integration-patterns/service_graph.py --from-file experiments/06-trace-analysis/sample_data.json
+
+Requires:
+    pip install httpx   (for update(); the graph itself is pure Python)
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_STATE = ".state/service_graph.json"
+DEFAULT_COMPRESSION = 100
+# Spans remembered (span_id -> service) so later children can find their parent.
+MAX_TRACKED_SPANS = 200_000
+# Children waiting for a parent span that hasn't been read yet.
+MAX_ORPHANS = 50_000
+# Tracked spans / orphans carried over between runs in the state file.
+PERSISTED_SPANS = 20_000
+
+
+# ---------------------------------------------------------------------------
+# Latency sketch
+# ---------------------------------------------------------------------------
+
+
+class TDigest:
+    """Merging t-digest (Dunning) for streaming quantile estimates.
+
+    Values are buffered and periodically merged into at most ~compression
+    centroids, sized by the k1 (arcsine) scale function so the tails keep
+    small centroids and p99 stays accurate.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means: list[float] = []
+        self._weights: list[float] = []
+        self._buffer: list[tuple[float, float]] = []
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        other._compress()
+        self._buffer.extend(zip(other._means, other._weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self._means, self._weights)) + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+        means, weights = [points[0][0]], [points[0][1]]
+        done = 0.0  # weight of centroids already closed
+        k_left = self._k(0.0)
+        for mean, weight in points[1:]:
+            q_right = (done + weights[-1] + weight) / total
+            if self._k(q_right) - k_left <= 1.0:
+                merged = weights[-1] + weight
+                means[-1] += (mean - means[-1]) * weight / merged
+                weights[-1] = merged
+            else:
+                done += weights[-1]
+                k_left = self._k(done / total)
+                means.append(mean)
+                weights.append(weight)
+        self._means, self._weights = means, weights
+
+    def quantile(self, q: float) -> float | None:
+        """Estimated value at quantile q (0..1), or None if empty."""
+        self._compress()
+        if not self._means:
+            return None
+        if len(self._means) == 1 or q <= 0:
+            return self.min if q <= 0 else self._means[0]
+        if q >= 1:
+            return self.max
+        target = q * self.count
+        cumulative = 0.0
+        prev_mean, prev_mid = self.min, 0.0
+        for mean, weight in zip(self._means, self._weights):
+            mid = cumulative + weight / 2
+            if target < mid:
+                span = mid - prev_mid
+                return prev_mean + (mean - prev_mean) * ((target - prev_mid) / span if span else 0)
+            prev_mean, prev_mid = mean, mid
+            cumulative += weight
+        span = self.count - prev_mid
+        return prev_mean + (self.max - prev_mean) * ((target - prev_mid) / span if span else 0)
+
+    def to_dict(self) -> dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "centroids": [[round(m, 4), w] for m, w in zip(self._means, self._weights)],
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(data.get("compression", DEFAULT_COMPRESSION))
+        for mean, weight in data.get("centroids", []):
+            digest._means.append(mean)
+            digest._weights.append(weight)
+            digest.count += weight
+        if digest.count:
+            digest.min, digest.max = data["min"], data["max"]
+        return digest
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class SpanSchema:
+    """Column names of the span fields the graph uses."""
+
+    trace_id: str = "span_trace_id"
+    span_id: str = "span_span_id"
+    parent_span_id: str = "span_parent_span_id"
+    service: str = "service.name"
+    duration: str = "span_duration_ns"
+    duration_to_ms: float = 1e-6
+    status: str = "span_status_code"
+    kind: str = "span_kind_description"
+    db_system: str | None = "db.system"
+    peer: str | None = "server.address"
+    operation: str | None = "span_name"
+
+    def columns(self) -> str:
+        names = [
+            self.trace_id, self.span_id, self.parent_span_id, self.service,
+            self.duration, self.status, self.kind, self.db_system, self.peer,
+        ]
+        return ", ".join(f'"{name}"' for name in names if name) + ", p_timestamp"
+
+    def order_by(self) -> str:
+        # p_timestamp is ingestion time, shared by a whole OTLP batch, so it
+        # alone doesn't give OFFSET paging a stable order. Rows still tied
+        # after span and trace id are copies of one span, which add_spans dedups.
+        return f'p_timestamp ASC, "{self.span_id}" ASC, "{self.trace_id}" ASC'
+
+
+# Parseable's flattened OpenTelemetry traces (one row per span event).
+OTEL_SCHEMA = SpanSchema()
+# Simplified span records, as in experiments/05-incident-rca sample data.
+SIMPLE_SCHEMA = SpanSchema(
+    trace_id="trace_id",
+    span_id="span_id",
+    parent_span_id="parent_span_id",
+    service="service_name",
+    duration="duration_ms",
+    duration_to_ms=1.0,
+    status="status_code",
+    kind="span_kind",
+    db_system=None,
+    peer=None,
+    operation="operation_name",
+)
+SCHEMAS = {"otel": OTEL_SCHEMA, "simple": SIMPLE_SCHEMA}
+
+_ERROR_STATUSES = {"2", "2.0", "ERROR", "STATUS_CODE_ERROR"}
+
+
+def _is_error(status) -> bool:
+    return status is not None and str(status).upper() in _ERROR_STATUSES
+
+
+@dataclass
+class EdgeStats:
+    """Calls from one service to another within a time bucket (or merged)."""
+
+    calls: int = 0
+    errors: int = 0
+    latency: TDigest = field(default_factory=TDigest)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
+
+    def record(self, duration_ms: float | None, error: bool) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        if duration_ms is not None:
+            self.latency.add(duration_ms)
+
+    def merge(self, other: "EdgeStats") -> None:
+        self.calls += other.calls
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "errors": self.errors, "latency": self.latency.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EdgeStats":
+        return cls(data["calls"], data["errors"], TDigest.from_dict(data["latency"]))
+
+
+# ---------------------------------------------------------------------------
+# Graph
+# ---------------------------------------------------------------------------
+
+
+def _sql_time(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class ServiceGraph:
+    """Caller -> callee edges with per-bucket call, error and latency stats."""
+
+    def __init__(
+        self,
+        bucket_minutes: int = 5,
+        retention_hours: float = 6,
+        compression: int = DEFAULT_COMPRESSION,
+    ):
+        self.bucket_minutes = bucket_minutes
+        self.retention_hours = retention_hours
+        self.compression = compression
+        self.watermark: datetime | None = None
+        self.spans_seen = 0
+        # bucket start (epoch seconds) -> (caller, callee) -> stats
+        self._buckets: dict[int, dict[tuple[str, str], EdgeStats]] = {}
+        self._services: OrderedDict[str, str] = OrderedDict()
+        # parent span id -> [(service, duration_ms, error, bucket)]
+        self._orphans: OrderedDict[str, list[tuple]] = OrderedDict()
+        self._orphan_count = 0
+
+    # -----------------------------------------------------------------
+    # Ingest
+    # -----------------------------------------------------------------
+
+    def _bucket(self, at: datetime) -> int:
+        seconds = self.bucket_minutes * 60
+        epoch = int(at.timestamp())
+        return epoch - epoch % seconds
+
+    def _record(self, caller: str, callee: str, bucket: int, duration_ms, error: bool) -> None:
+        edges = self._buckets.setdefault(bucket, {})
+        stats = edges.get((caller, callee))
+        if stats is None:
+            stats = edges[(caller, callee)] = EdgeStats(latency=TDigest(self.compression))
+        stats.record(duration_ms, error)
+
+    def add_spans(
+        self,
+        rows: list[dict],
+        schema: SpanSchema = OTEL_SCHEMA,
+        at: datetime | None = None,
+    ) -> int:
+        """Add span rows (any order, duplicates ignored); returns new spans.
+
+        at picks the time bucket; it defaults to now.
+        """
+        bucket = self._bucket(at or datetime.now(timezone.utc))
+        added = 0
+        for row in rows:
+            span_id = row.get(schema.span_id)
+            service = row.get(schema.service)
+            if not span_id or not service or span_id in self._services:
+                continue  # one row per span event in OTel streams
+            added += 1
+            self._services[span_id] = service
+            if len(self._services) > MAX_TRACKED_SPANS:
+                self._services.popitem(last=False)
+
+            duration = row.get(schema.duration)
+            duration_ms = float(duration) * schema.duration_to_ms if duration is not None else None
+            error = _is_error(row.get(schema.status))
+
+            db_system = row.get(schema.db_system) if schema.db_system else None
+            if db_system and str(row.get(schema.kind, "")).upper() == "CLIENT":
+                peer = row.get(schema.peer) if schema.peer else None
+                self._record(service, f"{db_system}:{peer}" if peer else db_system, bucket, duration_ms, error)
+
+            parent_id = row.get(schema.parent_span_id)
+            if parent_id:
+                parent_service = self._services.get(parent_id)
+                if parent_service is not None:
+                    if parent_service != service:
+                        self._record(parent_service, service, bucket, duration_ms, error)
+                else:
+                    self._orphans.setdefault(parent_id, []).append((service, duration_ms, error, bucket))
+                    self._orphan_count += 1
+
+            for child_service, child_ms, child_error, child_bucket in self._orphans.pop(span_id, ()):
+                self._orphan_count -= 1
+                if child_service != service:
+                    self._record(service, child_service, child_bucket, child_ms, child_error)
+
+        while self._orphan_count > MAX_ORPHANS:
+            _, dropped = self._orphans.popitem(last=False)
+            self._orphan_count -= len(dropped)
+        self.spans_seen += added
+        return added
+
+    def update(
+        self,
+        ctx,
+        stream: str,
+        schema: SpanSchema = OTEL_SCHEMA,
+        initial_minutes: int = 60,
+        lag_seconds: int = 60,
+        page_size: int = 10_000,
+        now: datetime | None = None,
+    ) -> dict:
+        """Read spans from the watermark (or initial_minutes ago) up to now - lag.
+
+        The range is read in bucket-aligned slices, paging within a slice
+        with LIMIT/OFFSET over a total order (see SpanSchema.order_by). The watermark advances after each slice, so an
+        interrupted update resumes where it stopped. lag_seconds leaves
+        room for late-arriving spans.
+        """
+        end = (now or datetime.now(timezone.utc)) - timedelta(seconds=lag_seconds)
+        cursor = self.watermark or end - timedelta(minutes=initial_minutes)
+        step = timedelta(minutes=self.bucket_minutes)
+        started = time.monotonic()
+        queries = rows_read = spans_added = 0
+        while cursor < end:
+            slice_end = min(datetime.fromtimestamp(self._bucket(cursor), timezone.utc) + step, end)
+            api_start = ctx.format_time(cursor.replace(microsecond=0))
+            api_end = ctx.format_time(slice_end.replace(microsecond=0) + timedelta(seconds=1))
+            offset = 0
+            while True:
+                sql = (
+                    f"SELECT DISTINCT {schema.columns()} FROM \"{stream}\" "
+                    f"WHERE p_timestamp >= '{_sql_time(cursor)}' AND p_timestamp < '{_sql_time(slice_end)}' "
+                    f"ORDER BY {schema.order_by()} LIMIT {page_size}"
+                )
+                if offset:
+                    sql += f" OFFSET {offset}"
+                rows = ctx.query(sql, api_start, api_end)
+                queries += 1
+                rows_read += len(rows)
+                spans_added += self.add_spans(rows, schema, at=cursor)
+                if len(rows) < page_size:
+                    break
+                offset += page_size
+            self.watermark = cursor = slice_end
+        self.prune(end)
+        return {
+            "queries": queries,
+            "rows": rows_read,
+            "spans": spans_added,
+            "edges": len(self._call_counts(None)),
+            "seconds": round(time.monotonic() - started, 2),
+        }
+
+    def prune(self, now: datetime | None = None) -> None:
+        """Drop buckets older than retention_hours."""
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=self.retention_hours)
+        oldest = self._bucket(cutoff)
+        for bucket in [b for b in self._buckets if b < oldest]:
+            del self._buckets[bucket]
+
+    # -----------------------------------------------------------------
+    # Queries
+    # -----------------------------------------------------------------
+
+    def _window(self, minutes: int | None, now: datetime | None) -> list[int]:
+        if minutes is None:
+            return sorted(self._buckets)
+        since = self._bucket((now or datetime.now(timezone.utc)) - timedelta(minutes=minutes))
+        return sorted(b for b in self._buckets if b >= since)
+
+    def edges(self, minutes: int | None = None, now: datetime | None = None) -> dict[tuple[str, str], EdgeStats]:
+        """Edge stats merged over the last `minutes` (default: everything retained)."""
+        merged: dict[tuple[str, str], EdgeStats] = {}
+        for bucket in self._window(minutes, now):
+            for key, stats in self._buckets[bucket].items():
+                if key not in merged:
+                    merged[key] = EdgeStats(latency=TDigest(self.compression))
+                merged[key].merge(stats)
+        return merged
+
+    def _call_counts(self, minutes: int | None) -> dict[tuple[str, str], list[int]]:
+        """(caller, callee) -> [calls, errors], without merging latency sketches."""
+        counts: dict[tuple[str, str], list[int]] = {}
+        for bucket in self._window(minutes, None):
+            for key, stats in self._buckets[bucket].items():
+                total = counts.setdefault(key, [0, 0])
+                total[0] += stats.calls
+                total[1] += stats.errors
+        return counts
+
+    def _walk(self, service: str, minutes: int | None, upstream: bool, max_depth: int | None) -> list[dict]:
+        adjacency: dict[str, list[tuple[str, int, int]]] = {}
+        for (caller, callee), (calls, errors) in self._call_counts(minutes).items():
+            src, dst = (callee, caller) if upstream else (caller, callee)
+            adjacency.setdefault(src, []).append((dst, calls, errors))
+        found: dict[str, dict] = {}
+        queue = deque([(service, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for neighbour, calls, errors in adjacency.get(node, []):
+                if neighbour == service or neighbour in found:
+                    continue
+                found[neighbour] = {
+                    "service": neighbour,
+                    "depth": depth + 1,
+                    "via": node,
+                    "calls": calls,
+                    "error_rate": round(errors / calls, 4) if calls else 0.0,
+                }
+                queue.append((neighbour, depth + 1))
+        return sorted(found.values(), key=lambda r: (r["depth"], -r["calls"]))
+
+    def blast_radius(
+        self,
+        service: str,
+        minutes: int | None = None,
+        max_depth: int | None = None,
+    ) -> list[dict]:
+        """Services that call `service`, directly or transitively.
+
+        These are the services a failure of `service` can propagate to.
+        Each entry has depth, the service it reaches it through (via), and
+        the call count / error rate of that edge.
+        """
+        return self._walk(service, minutes, upstream=True, max_depth=max_depth)
+
+    def dependencies(
+        self,
+        service: str,
+        minutes: int | None = None,
+        max_depth: int | None = None,
+    ) -> list[dict]:
+        """Services (and databases) that `service` calls, directly or transitively."""
+        return self._walk(service, minutes, upstream=False, max_depth=max_depth)
+
+    def edge_rows(self, minutes: int | None = None) -> list[dict]:
+        """Edges as rows, most errors first, then busiest."""
+        rows = []
+        for (caller, callee), stats in self.edges(minutes).items():
+            rows.append({
+                "caller": caller,
+                "callee": callee,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "error_rate": round(stats.error_rate, 4),
+                "p50_ms": _round(stats.latency.quantile(0.50)),
+                "p95_ms": _round(stats.latency.quantile(0.95)),
+                "p99_ms": _round(stats.latency.quantile(0.99)),
+            })
+        rows.sort(key=lambda r: (-r["errors"], -r["calls"]))
+        return rows
+
+    def to_prompt_text(self, minutes: int | None = None, max_edges: int = 40) -> str:
+        """Compact edge list for a Claude prompt."""
+        rows = self.edge_rows(minutes)
+        window = f"last {minutes} minutes" if minutes else f"last {self.retention_hours:g} hours"
+        lines = [f"## Service dependency graph ({window}, {len(rows)} edges)\n"]
+        lines.append("caller -> callee: calls, errors, latency p50/p95/p99 ms")
+        for r in rows[:max_edges]:
+            lines.append(
+                f"- {r['caller']} -> {r['callee']}: {r['calls']} calls, "
+                f"{r['errors']} errors ({r['error_rate']:.1%}), "
+                f"{r['p50_ms']}/{r['p95_ms']}/{r['p99_ms']}"
+            )
+        if len(rows) > max_edges:
+            lines.append(f"- ... {len(rows) - max_edges} more edges without errors or with fewer calls")
+        return "\n".join(lines) + "\n"
+
+    # -----------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        state = {
+            "bucket_minutes": self.bucket_minutes,
+            "retention_hours": self.retention_hours,
+            "compression": self.compression,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "spans_seen": self.spans_seen,
+            "buckets": {
+                str(bucket): [[caller, callee, stats.to_dict()] for (caller, callee), stats in edges.items()]
+                for bucket, edges in self._buckets.items()
+            },
+            "recent_spans": list(self._services.items())[-PERSISTED_SPANS:],
+            "orphans": list(self._orphans.items())[-PERSISTED_SPANS:],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "ServiceGraph":
+        """Load a saved graph, or return an empty one if path doesn't exist.
+
+        kwargs apply to a new graph only; a saved graph keeps its settings.
+        """
+        if not os.path.exists(path):
+            return cls(**kwargs)
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        graph = cls(state["bucket_minutes"], state["retention_hours"], state["compression"])
+        if state.get("watermark"):
+            graph.watermark = datetime.fromisoformat(state["watermark"])
+        graph.spans_seen = state.get("spans_seen", 0)
+        for bucket, edges in state.get("buckets", {}).items():
+            graph._buckets[int(bucket)] = {
+                (caller, callee): EdgeStats.from_dict(stats) for caller, callee, stats in edges
+            }
+        graph._services = OrderedDict(state.get("recent_spans", []))
+        graph._orphans = OrderedDict(
+            (parent, [tuple(child) for child in children]) for parent, children in state.get("orphans", [])
+        )
+        graph._orphan_count = sum(len(children) for children in graph._orphans.values())
+        return graph
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
+
+
+def _load_span_file(path: str) -> list[dict]:
+    """Span rows from a JSON array (or {"trace_samples": [{"spans": [...]}]}) or NDJSON file."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        data = data.get("trace_samples", data.get("spans", []))
+    rows = []
+    for item in data:
+        if isinstance(item, dict) and "spans" in item:
+            trace_id = item.get("trace_id")
+            rows.extend({"trace_id": trace_id, **span} for span in item["spans"])
+        else:
+            rows.append(item)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and query a service dependency graph from traces.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--stream", default="traces", help="Parseable traces stream (default: traces)")
+    source.add_argument("--from-file", help="Build from a JSON/NDJSON file of spans instead of Parseable")
+    source.add_argument("--trace-ids", nargs="+", metavar="ID", help="Build from these traces only (bulk lookup)")
+    parser.add_argument("--traces-stream", default="traces", help="Stream for --trace-ids (default: traces)")
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), help="Span column names (default: by source)")
+    parser.add_argument("--state", default=DEFAULT_STATE, help=f"Graph state file (default: {DEFAULT_STATE})")
+    parser.add_argument("--no-update", action="store_true", help="Only query the saved graph")
+    parser.add_argument("--initial-minutes", type=int, default=60, help="History read on first update")
+    parser.add_argument("--minutes", type=int, help="Window for output (default: all retained)")
+    parser.add_argument("--blast-radius", metavar="SERVICE", help="List services impacted by SERVICE failing")
+    parser.add_argument("--dependencies", metavar="SERVICE", help="List what SERVICE depends on")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of the prompt edge list")
+    args = parser.parse_args()
+
+    if args.from_file or args.trace_ids:
+        # One-off graphs from specific spans: nothing to persist.
+        graph = ServiceGraph()
+        if args.from_file:
+            rows = _load_span_file(args.from_file)
+            schema = SCHEMAS[args.schema] if args.schema else (
+                OTEL_SCHEMA if rows and OTEL_SCHEMA.span_id in rows[0] else SIMPLE_SCHEMA
+            )
+        else:
+            from parseable_context_builder import ParseableContext
+
+            schema = SCHEMAS[args.schema or "otel"]
+            traces = ParseableContext().get_traces(
+                args.trace_ids, trace_stream=args.traces_stream, id_column=schema.trace_id
+            )
+            rows = [span for spans in traces.values() for span in spans]
+        graph.add_spans(rows, schema)
+    else:
+        graph = ServiceGraph.load(args.state)
+        if not args.no_update:
+            from parseable_context_builder import ParseableContext
+
+            ctx = ParseableContext()
+            try:
+                stats = graph.update(
+                    ctx,
+                    args.stream,
+                    schema=SCHEMAS[args.schema or "otel"],
+                    initial_minutes=args.initial_minutes,
+                )
+            except Exception as exc:
+                print(f"Error: failed to read {args.stream}: {exc}", file=sys.stderr)
+                sys.exit(1)
+            finally:
+                graph.save(args.state)
+                ctx.close()
+            print(
+                f"Read {stats['rows']} rows ({stats['spans']} new spans) in {stats['queries']} "
+                f"queries, {stats['seconds']}s; watermark {graph.watermark:%Y-%m-%d %H:%M:%S}Z",
+                file=sys.stderr,
+            )
+
+    started = time.perf_counter()
+    if args.blast_radius or args.dependencies:
+        service = args.blast_radius or args.dependencies
+        walk = graph.blast_radius if args.blast_radius else graph.dependencies
+        result = walk(service, minutes=args.minutes)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            label = "Impacted by" if args.blast_radius else "Dependencies of"
+            print(f"{label} {service} ({len(result)} services, {elapsed_ms:.1f} ms):")
+            for r in result:
+                print(
+                    f"  {'  ' * (r['depth'] - 1)}{r['service']} (via {r['via']}, "
+                    f"{r['calls']} calls, {r['error_rate']:.1%} errors)"
+                )
+    elif args.json:
+        print(json.dumps(graph.edge_rows(args.minutes), indent=2))
+    else:
+        print(graph.to_prompt_text(args.minutes))
+
+
+if __name__ == "__main__":
+    main()
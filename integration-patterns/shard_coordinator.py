@@ -0,0 +1,320 @@
+"""
+Sharded, lease-coordinated ownership of health summary streams
+
+Lets several health_summary.py workers split hundreds of streams between
+them instead of every replica querying every stream. All coordination
+goes through one SQLite database (WAL mode) on storage every worker can
+reach:
+
+- Workers register with a heartbeat; a worker whose heartbeat is older
+  than lease_seconds is considered dead and drops out of the ring
+- Streams map to live workers by consistent hashing (HashRing), so a
+  worker joining or leaving only moves ~1/N of the streams
+- A worker only queries a stream while it holds that stream's lease.
+  Leases are renewed by a background heartbeat thread and expire with it,
+  so streams of a dead worker are picked up automatically
+- When the ring moves a stream to another worker, the current holder
+  finishes its cycle and releases the lease; the new owner acquires it on
+  its next cycle. Leases mean no stream is summarized twice, even while
+  workers disagree about who is alive
+- One worker holds the leader lease. Every worker publishes its per-stream
+  query results for a cycle; the leader collects them and produces the
+  single platform summary (gate, delta, history, Claude, Slack)
+
+Usage:
+    from shard_coordinator import ShardCoordinator
+
+    coord = ShardCoordinator(".state/health_shards.db")
+    coord.start()                                  # heartbeat thread
+    mine = coord.assign(streams)                   # streams to query this cycle
+    coord.publish(cycle, {s: run_queries(s) for s in mine})
+    if coord.is_leader():
+        results, missing = coord.collect(cycle, streams, timeout=30)
+    coord.finish_cycle(mine)                       # hand off rebalanced streams
+    coord.stop()
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from sqlite_conn import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 30
+DEFAULT_VNODES = 64
+LEADER_KEY = "__leader__"
+# Published shard results older than this are deleted.
+RESULT_RETENTION_SECONDS = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id    TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key        TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_owner ON leases (owner);
+CREATE TABLE IF NOT EXISTS shard_results (
+    cycle      TEXT NOT NULL,
+    stream     TEXT NOT NULL,
+    worker_id  TEXT NOT NULL,
+    results    TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (cycle, stream)
+);
+"""
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with vnodes virtual nodes per worker."""
+
+    def __init__(self, workers: list[str], vnodes: int = DEFAULT_VNODES):
+        points = sorted((_hash(f"{worker}#{i}"), worker) for worker in workers for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def owner(self, key: str) -> str | None:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._workers[index]
+
+
+class ShardCoordinator:
+    """One worker's view of the shared shard database."""
+
+    def __init__(
+        self,
+        path: str,
+        worker_id: str | None = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        vnodes: int = DEFAULT_VNODES,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.path = path
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.vnodes = vnodes
+        self.busy_timeout_ms = busy_timeout_ms
+        self._db = ThreadConnections(path, busy_timeout_ms)
+        self._handoff: set[str] = set()
+        self._handoff_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections are not shareable)."""
+        return self._db.get()
+
+    # -----------------------------------------------------------------
+    # Membership
+    # -----------------------------------------------------------------
+
+    def heartbeat(self) -> None:
+        """Mark this worker alive and extend every lease it holds."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, heartbeat_at) VALUES (?, ?)",
+                (self.worker_id, now),
+            )
+            conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE owner = ? AND expires_at > ?",
+                (now + self.lease_seconds, self.worker_id, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def live_workers(self) -> list[str]:
+        cutoff = time.time() - self.lease_seconds
+        rows = self._conn().execute(
+            "SELECT worker_id FROM workers WHERE heartbeat_at > ? ORDER BY worker_id",
+            (cutoff,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def start(self) -> None:
+        """Register and keep heartbeating in a daemon thread (every lease/3)."""
+        self.heartbeat()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._heartbeat_loop, name="shard-heartbeat", daemon=True)
+            self._thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                self.heartbeat()
+            except sqlite3.Error as exc:
+                logger.warning("Shard heartbeat failed: %s", exc)
+
+    def stop(self) -> None:
+        """Stop heartbeating and give up all leases so others take over now."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        conn = self._conn()
+        conn.execute("DELETE FROM leases WHERE owner = ?", (self.worker_id,))
+        conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+
+    # -----------------------------------------------------------------
+    # Leases
+    # -----------------------------------------------------------------
+
+    def _acquire(self, conn: sqlite3.Connection, key: str, now: float) -> bool:
+        """Take or renew the lease on key if it is free, expired or ours."""
+        cursor = conn.execute(
+            "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+            (key, self.worker_id, now + self.lease_seconds, now),
+        )
+        return cursor.rowcount > 0
+
+    def assign(self, streams: list[str]) -> list[str]:
+        """Streams this worker should query this cycle.
+
+        Acquires leases on the streams the ring gives this worker. Streams
+        it still holds but the ring now gives to someone else are kept for
+        this cycle and released by finish_cycle(). Several groups of
+        streams may be assigned and finished concurrently.
+        """
+        self.heartbeat()
+        ring = HashRing(self.live_workers(), self.vnodes)
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            held = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT key FROM leases WHERE owner = ? AND expires_at > ?",
+                    (self.worker_id, now),
+                )
+            }
+            mine = []
+            handoff = set()
+            for stream in streams:
+                if ring.owner(stream) == self.worker_id:
+                    if self._acquire(conn, stream, now):
+                        mine.append(stream)
+                elif stream in held:
+                    mine.append(stream)
+                    handoff.add(stream)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._handoff_lock:
+            self._handoff |= handoff
+        return mine
+
+    def finish_cycle(self, streams: list[str]) -> None:
+        """Release leases on any of streams the ring has moved to other workers."""
+        with self._handoff_lock:
+            released = self._handoff.intersection(streams)
+            self._handoff -= released
+        if not released:
+            return
+        self._conn().executemany(
+            "DELETE FROM leases WHERE key = ? AND owner = ?",
+            [(stream, self.worker_id) for stream in released],
+        )
+        logger.info("Handed off %d streams to other shards", len(released))
+
+    def is_leader(self) -> bool:
+        """Acquire or renew the leader lease; True if this worker holds it."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            leader = self._acquire(conn, LEADER_KEY, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return leader
+
+    def owners(self) -> dict[str, str]:
+        """Current unexpired lease holders, {key: worker_id}."""
+        rows = self._conn().execute(
+            "SELECT key, owner FROM leases WHERE expires_at > ?", (time.time(),)
+        ).fetchall()
+        return dict(rows)
+
+    # -----------------------------------------------------------------
+    # Results
+    # -----------------------------------------------------------------
+
+    def publish(self, cycle: str, results: dict[str, dict]) -> None:
+        """Store this worker's per-stream results for a cycle."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO shard_results (cycle, stream, worker_id, results, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (cycle, stream, self.worker_id, json.dumps(stream_results, default=str), now)
+                    for stream, stream_results in results.items()
+                ],
+            )
+            conn.execute(
+                "DELETE FROM shard_results WHERE created_at < ?",
+                (now - RESULT_RETENTION_SECONDS,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def collect(
+        self,
+        cycle: str,
+        streams: list[str],
+        timeout: float,
+        poll_seconds: float = 0.5,
+    ) -> tuple[dict[str, dict], list[str]]:
+        """Wait up to timeout for every stream's results of a cycle.
+
+        Returns (results in `streams` order, streams still missing).
+        """
+        wanted = set(streams)
+        results: dict[str, dict] = {}
+        deadline = time.monotonic() + timeout
+        while True:
+            rows = self._conn().execute(
+                "SELECT stream, results FROM shard_results WHERE cycle = ?", (cycle,)
+            ).fetchall()
+            for stream, payload in rows:
+                if stream in wanted and stream not in results:
+                    results[stream] = json.loads(payload)
+            if len(results) == len(wanted) or time.monotonic() >= deadline:
+                break
+            time.sleep(poll_seconds)
+        missing = [stream for stream in streams if stream not in results]
+        return {stream: results[stream] for stream in streams if stream in results}, missing
@@ -0,0 +1,433 @@
+"""
+Rate-limit-aware Slack delivery queue
+
+Slack incoming webhooks accept roughly one message per second per channel
+and answer bursts with HTTP 429. Posting synchronously during an alert
+storm loses messages. This module puts a persistent outbound queue
+(SQLite, WAL mode) in front of Slack:
+
+- a token bucket per channel, shared by every process using the same DB
+- Retry-After is honoured on 429 responses
+- when a backlog builds for a channel, pending messages are merged into
+  one multi-section message (up to Slack's 50-block limit)
+- one pooled httpx.Client per deliverer
+- delivery latency, retry and drop counters exposed via metrics()
+
+Usage:
+    from slack_delivery import SlackDeliverer, SlackOutbox
+
+    outbox = SlackOutbox(".state/slack_outbox.db")
+    deliverer = SlackDeliverer(outbox)
+    deliverer.start()                       # background thread
+
+    outbox.enqueue(SLACK_WEBHOOK_URL, {"blocks": [...]})
+
+    deliverer.flush(timeout=30)             # e.g. before a --once exit
+    print(deliverer.metrics())
+
+Requires:
+    pip install httpx
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import httpx
+except ImportError:
+    raise ImportError("httpx is required: pip install httpx")
+
+from sqlite_conn import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+# Slack rejects messages with more than 50 blocks.
+SLACK_MAX_BLOCKS = 50
+_LATENCY_SAMPLES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel         TEXT NOT NULL,
+    payload         TEXT NOT NULL,
+    enqueued_at     REAL NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_until   REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_channel_due ON outbox (channel, next_attempt_at);
+CREATE TABLE IF NOT EXISTS buckets (
+    channel       TEXT PRIMARY KEY,
+    tokens        REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name  TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS latencies (
+    at      REAL NOT NULL,
+    seconds REAL NOT NULL
+);
+"""
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def merge_payloads(payloads: list[dict]) -> tuple[dict, int]:
+    """Merge several Slack block payloads into one multi-section message.
+
+    Returns (merged_payload, number_of_payloads_used). Payloads are taken in
+    order until the next one would exceed SLACK_MAX_BLOCKS; at least one is
+    always used.
+    """
+    blocks: list[dict] = []
+    used = 0
+    for payload in payloads:
+        extra = payload.get("blocks") or [
+            {"type": "section", "text": {"type": "mrkdwn", "text": payload.get("text", "")}}
+        ]
+        needed = len(extra) + (1 if blocks else 0)
+        if used and len(blocks) + needed > SLACK_MAX_BLOCKS:
+            break
+        if blocks:
+            blocks.append({"type": "divider"})
+        blocks.extend(extra)
+        used += 1
+    return {"text": f"{used} notifications", "blocks": blocks[:SLACK_MAX_BLOCKS]}, used
+
+
+class SlackOutbox:
+    """Persistent outbound queue with per-channel token buckets."""
+
+    def __init__(
+        self,
+        path: str,
+        rate_per_second: float = 1.0,
+        burst: int = 3,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.path = path
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.busy_timeout_ms = busy_timeout_ms
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = ThreadConnections(path, busy_timeout_ms)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        return self._db.get()
+
+    def enqueue(self, channel: str, payload: dict) -> int:
+        """Queue a Slack payload for a channel (webhook URL) and return its id."""
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO outbox (channel, payload, enqueued_at, next_attempt_at) "
+            "VALUES (?, ?, ?, ?)",
+            (channel, json.dumps(payload), now, now),
+        )
+        return int(cur.lastrowid)
+
+    def depth(self) -> int:
+        (count,) = self._conn().execute("SELECT COUNT(*) FROM outbox").fetchone()
+        return int(count)
+
+    def due_channels(self) -> list[tuple[str, int]]:
+        """Return (channel, due_count) for channels with deliverable messages."""
+        now = time.time()
+        return self._conn().execute(
+            "SELECT channel, COUNT(*) FROM outbox "
+            "WHERE next_attempt_at <= ? AND claimed_until < ? "
+            "GROUP BY channel",
+            (now, now),
+        ).fetchall()
+
+    def next_due_in(self) -> float | None:
+        """Seconds until the earliest queued message becomes due (None if empty)."""
+        row = self._conn().execute(
+            "SELECT MIN(MAX(next_attempt_at, claimed_until)) FROM outbox"
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def acquire_token(self, channel: str) -> float:
+        """Take a send token for channel. Returns 0 on success, else seconds to wait."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at, blocked_until FROM buckets WHERE channel = ?",
+                (channel,),
+            ).fetchone()
+            tokens, updated_at, blocked_until = row or (float(self.burst), now, 0.0)
+            tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate_per_second)
+            wait = 0.0
+            if blocked_until > now:
+                wait = blocked_until - now
+            elif tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate_per_second
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (channel, tokens, updated_at, blocked_until) "
+                "VALUES (?, ?, ?, ?)",
+                (channel, tokens, now, blocked_until),
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def block_channel(self, channel: str, seconds: float) -> None:
+        """Hold all sends to channel for the given number of seconds (Retry-After)."""
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO buckets (channel, tokens, updated_at, blocked_until) "
+            "VALUES (?, 0, ?, ?) "
+            "ON CONFLICT(channel) DO UPDATE SET tokens = 0, updated_at = excluded.updated_at, "
+            "blocked_until = excluded.blocked_until",
+            (channel, now, now + seconds),
+        )
+
+    def claim(self, channel: str, limit: int, lease_seconds: float = 60) -> list[tuple]:
+        """Lease up to limit due messages for channel, oldest first.
+
+        Returns (id, payload, enqueued_at, attempts) tuples.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, payload, enqueued_at, attempts FROM outbox "
+                "WHERE channel = ? AND next_attempt_at <= ? AND claimed_until < ? "
+                "ORDER BY id LIMIT ?",
+                (channel, now, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET claimed_until = ? WHERE id = ?",
+                [(now + lease_seconds, r[0]) for r in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [(r[0], json.loads(r[1]), r[2], r[3]) for r in rows]
+
+    def complete(self, ids: list[int]) -> None:
+        self._conn().executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def release(self, ids: list[int], retry_at: float, count_attempt: bool) -> None:
+        """Return leased messages to the queue, due again at retry_at."""
+        self._conn().executemany(
+            "UPDATE outbox SET claimed_until = 0, next_attempt_at = ?, "
+            "attempts = attempts + ? WHERE id = ?",
+            [(retry_at, 1 if count_attempt else 0, i) for i in ids],
+        )
+
+    def expire(self, max_age_seconds: float) -> int:
+        """Drop messages older than max_age_seconds and return how many."""
+        cur = self._conn().execute(
+            "DELETE FROM outbox WHERE enqueued_at < ?",
+            (time.time() - max_age_seconds,),
+        )
+        return cur.rowcount
+
+    # -----------------------------------------------------------------
+    # Metrics
+    # -----------------------------------------------------------------
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        self._conn().execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def record_latencies(self, seconds: list[float]) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO latencies (at, seconds) VALUES (?, ?)",
+            [(now, s) for s in seconds],
+        )
+        conn.execute(
+            "DELETE FROM latencies WHERE rowid NOT IN "
+            "(SELECT rowid FROM latencies ORDER BY at DESC LIMIT ?)",
+            (_LATENCY_SAMPLES,),
+        )
+
+    def metrics(self) -> dict:
+        conn = self._conn()
+        stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        latencies = sorted(s for (s,) in conn.execute("SELECT seconds FROM latencies"))
+        return {
+            "queue_depth": self.depth(),
+            "sent": int(stats.get("sent", 0)),
+            "messages_posted": int(stats.get("posts", 0)),
+            "merged": int(stats.get("merged", 0)),
+            "retries": int(stats.get("retries", 0)),
+            "rate_limited": int(stats.get("rate_limited", 0)),
+            "dropped": int(stats.get("dropped", 0)),
+            "latency_p50_seconds": round(_percentile(latencies, 50), 3),
+            "latency_p95_seconds": round(_percentile(latencies, 95), 3),
+            "latency_max_seconds": round(latencies[-1], 3) if latencies else 0.0,
+        }
+
+
+class SlackDeliverer:
+    """Drains a SlackOutbox to Slack, respecting rate limits."""
+
+    def __init__(
+        self,
+        outbox: SlackOutbox,
+        merge_threshold: int = 3,
+        max_merge: int = 10,
+        max_attempts: int = 5,
+        max_age_seconds: float = 3600,
+        timeout: float = 10,
+    ):
+        self.outbox = outbox
+        self.merge_threshold = merge_threshold
+        self.max_merge = max_merge
+        self.max_attempts = max_attempts
+        self.max_age_seconds = max_age_seconds
+        self._client = httpx.Client(timeout=timeout)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the background delivery thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="slack-delivery", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        """Wake the delivery thread after an enqueue."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def flush(self, timeout: float = 30) -> bool:
+        """Deliver until the queue is empty or timeout elapses; True if empty."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.outbox.depth() == 0:
+                return True
+            wait = self.deliver_pending()
+            if self.outbox.depth() == 0:
+                return True
+            time.sleep(min(max(wait, 0.05), max(0.0, deadline - time.monotonic())))
+        return self.outbox.depth() == 0
+
+    def metrics(self) -> dict:
+        return self.outbox.metrics()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                wait = self.deliver_pending()
+            except Exception as exc:
+                logger.error("Slack delivery pass failed: %s", exc)
+                wait = 5.0
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+    def deliver_pending(self) -> float:
+        """Run one delivery pass. Returns seconds until more work may be due."""
+        dropped = self.outbox.expire(self.max_age_seconds)
+        if dropped:
+            logger.warning("Dropped %d Slack messages older than %ds", dropped, self.max_age_seconds)
+            self.outbox.incr("dropped", dropped)
+
+        next_wait = self.outbox.next_due_in()
+        for channel, due in self.outbox.due_channels():
+            wait = self.outbox.acquire_token(channel)
+            if wait > 0:
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+                continue
+            limit = self.max_merge if due >= self.merge_threshold else 1
+            claimed = self.outbox.claim(channel, limit)
+            if claimed:
+                self._send(channel, claimed)
+            next_wait = 0.0
+        return 60.0 if next_wait is None else next_wait
+
+    def _send(self, channel: str, claimed: list[tuple]) -> None:
+        payload, used = merge_payloads([c[1] for c in claimed])
+        if len(claimed) == 1:
+            payload = claimed[0][1]
+        sent, unsent = claimed[:used], claimed[used:]
+        if unsent:
+            self.outbox.release([c[0] for c in unsent], time.time(), count_attempt=False)
+
+        ids = [c[0] for c in sent]
+        try:
+            resp = self._client.post(channel, json=payload)
+        except httpx.HTTPError as exc:
+            self._retry_or_drop(sent, f"transport error: {exc}")
+            return
+
+        if resp.status_code == 429:
+            retry_after = _retry_after_seconds(resp)
+            logger.warning("Slack rate limited; retrying after %.1fs", retry_after)
+            self.outbox.block_channel(channel, retry_after)
+            self.outbox.release(ids, time.time() + retry_after, count_attempt=False)
+            self.outbox.incr("rate_limited")
+            return
+        if resp.status_code >= 400:
+            self._retry_or_drop(sent, f"HTTP {resp.status_code}: {resp.text[:200]}")
+            return
+
+        now = time.time()
+        self.outbox.complete(ids)
+        self.outbox.record_latencies([now - c[2] for c in sent])
+        self.outbox.incr("sent", len(sent))
+        self.outbox.incr("posts")
+        if len(sent) > 1:
+            self.outbox.incr("merged", len(sent))
+        logger.info("Slack message delivered (%d notification(s))", len(sent))
+
+    def _retry_or_drop(self, claimed: list[tuple], reason: str) -> None:
+        retry, drop = [], []
+        for job_id, _payload, _enqueued, attempts in claimed:
+            (drop if attempts + 1 >= self.max_attempts else retry).append((job_id, attempts))
+        if drop:
+            logger.error("Dropping %d Slack message(s) after %d attempts: %s",
+                         len(drop), self.max_attempts, reason)
+            self.outbox.complete([d[0] for d in drop])
+            self.outbox.incr("dropped", len(drop))
+        if retry:
+            backoff = min(60.0, 2.0 ** (max(a for _, a in retry) + 1))
+            logger.warning("Slack post failed (%s); retrying in %.0fs", reason, backoff)
+            self.outbox.release([r[0] for r in retry], time.time() + backoff, count_attempt=True)
+            self.outbox.incr("retries", len(retry))
+
+
+def _retry_after_seconds(resp: "httpx.Response", default: float = 1.0) -> float:
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", default)))
+    except ValueError:
+        return default
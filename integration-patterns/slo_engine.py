@@ -0,0 +1,516 @@
+"""
+Multi-window, multi-burn-rate SLO engine on local per-minute counters
+
+Experiment 08 designs SLOs for the payment service; this computes them.
+Each SLO is a pair of SQL predicates over a stream (which events count,
+and which of those are good), a target and an error-budget period:
+
+- per-minute good/total counts are pulled incrementally from Parseable
+  (one GROUP BY minute query per SLO per cycle, re-reading only the last
+  few minutes for late data) and kept in a ring buffer covering the
+  budget period, mirrored to SQLite so restarts don't re-scan
+- burn rates for every alert window come from one cumulative sum over
+  the ring: burn = (bad / total) / (1 - target)
+- an alert fires when both its long and short window burn faster than its
+  threshold (Google SRE multi-window, multi-burn-rate alerting); defaults
+  are 1h/5m at 14.4x and 6h/30m at 6x (page), 1d/2h at 3x and 3d/6h at 1x
+  (ticket)
+- the rolling error budget (default 30 days) is a sum over the same ring
+
+Only breaches (firing alerts or an exhausted budget) are meant for Claude;
+the full status renders locally as a Markdown table.
+
+SLO file (JSON):
+    {"slos": [{
+        "name": "payment-availability",
+        "stream": "payment-logs",
+        "total": "operation IN ('charge', 'refund', 'payout')",
+        "good": "status IN ('success', 'invalid')",
+        "target": 0.9995,
+        "budget_days": 30,
+        "alerts": [{"long": "1h", "short": "5m", "burn_rate": 14.4, "severity": "page"}]
+    }]}
+
+Usage:
+    from parseable_context_builder import ParseableContext
+    from slo_engine import SLOEngine, load_slos
+
+    engine = SLOEngine(".state/slo_counters.db", load_slos("slos.json"))
+    engine.update(ParseableContext())
+    statuses = engine.evaluate()
+    breaches = [s.to_dict() for s in statuses if s.breached]
+
+    python integration-patterns/slo_engine.py --slo-file experiments/08-schema-slo/slo_definitions.json
+    python integration-patterns/slo_engine.py --slo-file slos.json --backfill-days 30
+
+Requires:
+    pip install numpy httpx
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is required: pip install numpy")
+
+from health_store import parse_bucket
+from sqlite_conn import ThreadConnections
+
+DEFAULT_DB = ".state/slo_counters.db"
+# Minutes re-read on every update to pick up late-arriving events.
+LATE_MINUTES = 3
+# History fetched for an SLO with no stored counters (the budget fills in over time).
+DEFAULT_BACKFILL_DAYS = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slo_minutes (
+    slo_key TEXT    NOT NULL,
+    bucket  INTEGER NOT NULL,
+    good    INTEGER NOT NULL,
+    total   INTEGER NOT NULL,
+    PRIMARY KEY (slo_key, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS slo_state (
+    slo_key    TEXT PRIMARY KEY,
+    name       TEXT    NOT NULL,
+    first_at   INTEGER NOT NULL,
+    watermark  INTEGER NOT NULL
+);
+"""
+
+_DURATION = re.compile(r"^\s*(\d+)\s*([mhd])\s*$")
+_UNIT_MINUTES = {"m": 1, "h": 60, "d": 1440}
+
+
+def parse_minutes(value) -> int:
+    """'5m' / '6h' / '3d' (or a number of minutes) -> minutes."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _DURATION.match(str(value))
+    if not match:
+        raise ValueError(f"invalid duration {value!r}; use e.g. 5m, 6h, 3d")
+    return int(match.group(1)) * _UNIT_MINUTES[match.group(2)]
+
+
+def _label(minutes: int) -> str:
+    for unit, size in (("d", 1440), ("h", 60)):
+        if minutes % size == 0:
+            return f"{minutes // size}{unit}"
+    return f"{minutes}m"
+
+
+@dataclass(frozen=True)
+class BurnAlert:
+    """Fires when both windows burn budget at >= burn_rate times the sustainable rate."""
+
+    long_minutes: int
+    short_minutes: int
+    burn_rate: float
+    severity: str = "page"
+
+    @property
+    def name(self) -> str:
+        return f"{_label(self.long_minutes)}/{_label(self.short_minutes)}@{self.burn_rate:g}x"
+
+
+DEFAULT_ALERTS = (
+    BurnAlert(60, 5, 14.4, "page"),
+    BurnAlert(360, 30, 6.0, "page"),
+    BurnAlert(1440, 120, 3.0, "ticket"),
+    BurnAlert(4320, 360, 1.0, "ticket"),
+)
+
+
+@dataclass(frozen=True)
+class SLODefinition:
+    name: str
+    stream: str
+    good: str
+    target: float
+    total: str = "TRUE"
+    budget_days: int = 30
+    alerts: tuple[BurnAlert, ...] = DEFAULT_ALERTS
+    description: str = ""
+
+    @property
+    def key(self) -> str:
+        """Identifies the counters; changing the stream or predicates starts fresh ones."""
+        raw = json.dumps([self.name, self.stream, self.total, self.good])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def budget_minutes(self) -> int:
+        return self.budget_days * 1440
+
+    def counts_sql(self, start: int, end: int) -> str:
+        """Per-minute total/good counts for [start, end) (epoch seconds)."""
+        return (
+            f"SELECT DATE_TRUNC('minute', p_timestamp) AS minute_bucket, "
+            f"COUNT(*) AS total, "
+            f"COUNT(*) FILTER (WHERE {self.good}) AS good "
+            f'FROM "{self.stream}" '
+            f"WHERE ({self.total}) "
+            f"AND p_timestamp >= '{_sql_time(start)}' AND p_timestamp < '{_sql_time(end)}' "
+            f"GROUP BY DATE_TRUNC('minute', p_timestamp)"
+        )
+
+
+def load_slos(path: str) -> list[SLODefinition]:
+    """Read SLO definitions from a JSON file (see module docstring)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    slos = []
+    for entry in data.get("slos", data if isinstance(data, list) else []):
+        target = float(entry["target"])
+        if not 0 < target < 1:
+            raise ValueError(f"SLO {entry.get('name')!r}: target must be between 0 and 1, got {target}")
+        alerts = tuple(
+            BurnAlert(
+                parse_minutes(a["long"]),
+                parse_minutes(a["short"]),
+                float(a["burn_rate"]),
+                a.get("severity", "page"),
+            )
+            for a in entry.get("alerts", [])
+        ) or DEFAULT_ALERTS
+        slos.append(
+            SLODefinition(
+                name=entry["name"],
+                stream=entry["stream"],
+                good=entry["good"],
+                target=target,
+                total=entry.get("total", "TRUE"),
+                budget_days=int(entry.get("budget_days", 30)),
+                alerts=alerts,
+                description=entry.get("description", ""),
+            )
+        )
+    names = [slo.name for slo in slos]
+    if len(names) != len(set(names)):
+        raise ValueError("SLO names must be unique")
+    return slos
+
+
+def _sql_time(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+@dataclass
+class SLOStatus:
+    """Result of evaluating one SLO at a point in time."""
+
+    name: str
+    stream: str
+    target: float
+    budget_days: int
+    total: int
+    good: int
+    data_minutes: int
+    burn_rates: dict[str, float] = field(default_factory=dict)
+    firing: list[dict] = field(default_factory=list)
+
+    @property
+    def sli(self) -> float | None:
+        return self.good / self.total if self.total else None
+
+    @property
+    def budget_remaining(self) -> float:
+        """Fraction of the period's error budget left (negative when overspent)."""
+        allowed = (1 - self.target) * self.total
+        if allowed <= 0:
+            return 1.0
+        return 1 - (self.total - self.good) / allowed
+
+    @property
+    def breached(self) -> bool:
+        return bool(self.firing) or (self.total > 0 and self.budget_remaining <= 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "slo": self.name,
+            "stream": self.stream,
+            "target": self.target,
+            "sli": None if self.sli is None else round(self.sli, 6),
+            "budget_window": f"{self.budget_days}d",
+            "budget_remaining_pct": round(self.budget_remaining * 100, 2),
+            "history_covered_pct": round(min(self.data_minutes / (self.budget_days * 1440), 1) * 100, 1),
+            "firing": self.firing,
+            "burn_rates": self.burn_rates,
+        }
+
+
+class _Counters:
+    """Ring buffer of per-minute good/total counts covering the budget period."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.good = np.zeros(size, dtype=np.int64)
+        self.total = np.zeros(size, dtype=np.int64)
+        self.latest: int | None = None  # newest minute index (epoch // 60) stored
+
+    def _advance(self, minute: int) -> None:
+        if self.latest is None:
+            self.latest = minute
+            return
+        if minute <= self.latest:
+            return
+        gap = minute - self.latest
+        if gap >= self.size:
+            self.good[:] = 0
+            self.total[:] = 0
+        else:
+            cleared = (np.arange(self.latest + 1, minute + 1)) % self.size
+            self.good[cleared] = 0
+            self.total[cleared] = 0
+        self.latest = minute
+
+    def set(self, minute: int, good: int, total: int) -> None:
+        self._advance(minute)
+        if minute <= self.latest - self.size:
+            return  # older than the budget period
+        slot = minute % self.size
+        self.good[slot] = good
+        self.total[slot] = total
+
+    def chronological(self, now_minute: int) -> tuple["np.ndarray", "np.ndarray"]:
+        """(good, total) with the last element being now_minute."""
+        self._advance(now_minute)
+        shift = -((now_minute + 1) % self.size)
+        return np.roll(self.good, shift), np.roll(self.total, shift)
+
+
+class SLOEngine:
+    """Maintains per-minute SLO counters and evaluates burn-rate alerts."""
+
+    def __init__(self, db_path: str, slos: list[SLODefinition]):
+        self.db_path = db_path
+        self.slos = list(slos)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = ThreadConnections(db_path, busy_timeout_ms=10_000)
+        # Schedule groups update and evaluate concurrently; the ring buffers
+        # and watermarks are shared, so both run under this lock.
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        self._counters: dict[str, _Counters] = {}
+        self._state: dict[str, tuple[int, int]] = {}  # key -> (first_at, watermark)
+        for slo in self.slos:
+            self._load(slo)
+
+    def _conn(self) -> sqlite3.Connection:
+        return self._db.get()
+
+    def _load(self, slo: SLODefinition) -> None:
+        counters = _Counters(slo.budget_minutes)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT first_at, watermark FROM slo_state WHERE slo_key = ?", (slo.key,)
+        ).fetchone()
+        if row:
+            self._state[slo.key] = (row[0], row[1])
+            since = row[1] - slo.budget_minutes * 60
+            for bucket, good, total in conn.execute(
+                "SELECT bucket, good, total FROM slo_minutes WHERE slo_key = ? AND bucket >= ? ORDER BY bucket",
+                (slo.key, since),
+            ):
+                counters.set(bucket // 60, good, total)
+        self._counters[slo.key] = counters
+
+    # -----------------------------------------------------------------
+    # Incremental update from Parseable
+    # -----------------------------------------------------------------
+
+    def update(
+        self,
+        ctx,
+        now: float | None = None,
+        backfill_days: float = DEFAULT_BACKFILL_DAYS,
+    ) -> dict[str, int]:
+        """Fetch new per-minute counts for every SLO; returns rows read per SLO.
+
+        Reads from LATE_MINUTES before the last watermark (or backfill_days
+        ago for a new SLO, one day per query) up to now. Minute counts are
+        replaced rather than added, so re-reading overlapping minutes is safe.
+        """
+        now = int(time.time() if now is None else now)
+        with self._lock:
+            return self._update(ctx, now, backfill_days)
+
+    def _update(self, ctx, now: int, backfill_days: float) -> dict[str, int]:
+        read = {}
+        for slo in self.slos:
+            state = self._state.get(slo.key)
+            if state:
+                first_at, watermark = state
+                start = watermark - LATE_MINUTES * 60
+            else:
+                start = now - int(min(backfill_days, slo.budget_days) * 86400)
+            start = max(start, now - slo.budget_minutes * 60)
+            start -= start % 60
+            if not state:
+                first_at = start
+            rows = []
+            for slice_start in range(start, now, 86400):
+                slice_end = min(slice_start + 86400, now)
+                rows.extend(
+                    ctx.query(
+                        slo.counts_sql(slice_start, slice_end),
+                        ctx.format_time(datetime.fromtimestamp(slice_start, timezone.utc)),
+                        ctx.format_time(datetime.fromtimestamp(slice_end + 1, timezone.utc)),
+                    )
+                )
+            self._store(slo, rows, first_at, now)
+            read[slo.name] = len(rows)
+        return read
+
+    def _store(self, slo: SLODefinition, rows: list[dict], first_at: int, watermark: int) -> None:
+        counters = self._counters[slo.key]
+        records = []
+        for row in rows:
+            bucket = parse_bucket(row.get("minute_bucket"))
+            if bucket is None:
+                continue
+            good, total = int(row.get("good") or 0), int(row.get("total") or 0)
+            counters.set(bucket // 60, good, total)
+            records.append((slo.key, bucket, good, total))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO slo_minutes (slo_key, bucket, good, total) VALUES (?, ?, ?, ?)",
+                records,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO slo_state (slo_key, name, first_at, watermark) VALUES (?, ?, ?, ?)",
+                (slo.key, slo.name, first_at, watermark),
+            )
+            conn.execute(
+                "DELETE FROM slo_minutes WHERE slo_key = ? AND bucket < ?",
+                (slo.key, watermark - slo.budget_minutes * 60),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._state[slo.key] = (first_at, watermark)
+
+    # -----------------------------------------------------------------
+    # Evaluation
+    # -----------------------------------------------------------------
+
+    def evaluate(self, now: float | None = None) -> list[SLOStatus]:
+        """Burn rates, firing alerts and budget for every SLO, from local counters."""
+        now_minute = int(time.time() if now is None else now) // 60
+        statuses = []
+        for slo in self.slos:
+            with self._lock:
+                good, total = self._counters[slo.key].chronological(now_minute)
+                first_at = self._state.get(slo.key, (now_minute * 60, 0))[0]
+            good_sum = np.concatenate(([0], np.cumsum(good)))
+            total_sum = np.concatenate(([0], np.cumsum(total)))
+
+            windows = sorted({m for a in slo.alerts for m in (a.long_minutes, a.short_minutes)})
+            idx = len(good) - np.minimum(np.array(windows), len(good))
+            window_total = total_sum[-1] - total_sum[idx]
+            window_bad = window_total - (good_sum[-1] - good_sum[idx])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                burn = np.where(window_total > 0, window_bad / window_total, 0.0) / (1 - slo.target)
+            burn_by_window = dict(zip(windows, burn.tolist()))
+
+            firing = [
+                {
+                    "alert": alert.name,
+                    "severity": alert.severity,
+                    "long_burn": round(burn_by_window[alert.long_minutes], 2),
+                    "short_burn": round(burn_by_window[alert.short_minutes], 2),
+                }
+                for alert in slo.alerts
+                if burn_by_window[alert.long_minutes] >= alert.burn_rate
+                and burn_by_window[alert.short_minutes] >= alert.burn_rate
+            ]
+            statuses.append(
+                SLOStatus(
+                    name=slo.name,
+                    stream=slo.stream,
+                    target=slo.target,
+                    budget_days=slo.budget_days,
+                    total=int(total_sum[-1]),
+                    good=int(good_sum[-1]),
+                    data_minutes=max(0, now_minute - first_at // 60),
+                    burn_rates={_label(m): round(b, 2) for m, b in burn_by_window.items()},
+                    firing=firing,
+                )
+            )
+        return statuses
+
+
+def render_slo_status(statuses: list[SLOStatus]) -> str:
+    """Markdown table of every SLO's state (rendered locally, not by Claude)."""
+    lines = [
+        "## SLO Status\n",
+        "| SLO | Target | SLI | Budget left | Firing |",
+        "|-----|--------|-----|-------------|--------|",
+    ]
+    for s in statuses:
+        sli = "-" if s.sli is None else f"{s.sli:.4%}"
+        firing = ", ".join(f"{f['alert']} ({f['severity']})" for f in s.firing) or "-"
+        lines.append(
+            f"| {s.name} | {s.target:.4%} | {sli} | {s.budget_remaining:.1%} of {s.budget_days}d | {firing} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Update SLO counters from Parseable and evaluate burn rates.")
+    parser.add_argument("--slo-file", required=True, help="JSON file of SLO definitions")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Counter database (default: {DEFAULT_DB})")
+    parser.add_argument(
+        "--backfill-days",
+        type=float,
+        default=DEFAULT_BACKFILL_DAYS,
+        help=f"History to fetch for SLOs without stored counters (default: {DEFAULT_BACKFILL_DAYS})",
+    )
+    parser.add_argument("--no-update", action="store_true", help="Evaluate stored counters only")
+    parser.add_argument("--json", action="store_true", help="Print statuses as JSON")
+    args = parser.parse_args()
+
+    engine = SLOEngine(args.db, load_slos(args.slo_file))
+    if not args.no_update:
+        from parseable_context_builder import ParseableContext
+
+        ctx = ParseableContext()
+        started = time.monotonic()
+        try:
+            read = engine.update(ctx, backfill_days=args.backfill_days)
+        except Exception as exc:
+            print(f"Error: failed to update SLO counters: {exc}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            ctx.close()
+        print(
+            f"Updated {len(read)} SLOs ({sum(read.values())} minute rows) in "
+            f"{time.monotonic() - started:.2f}s",
+            file=sys.stderr,
+        )
+
+    statuses = engine.evaluate()
+    if args.json:
+        print(json.dumps([s.to_dict() for s in statuses], indent=2))
+    else:
+        print(render_slo_status(statuses))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-thread SQLite connections for the local state stores
+
+sqlite3 connections can't be shared across threads, and a connection
+inherited across fork() must not be reused by the child. ThreadConnections
+hands each thread (of each process) its own autocommit connection to one
+database file:
+
+- reopened when the owning pid changes (gunicorn workers fork after import)
+- busy timeout applied both to the driver and as PRAGMA busy_timeout
+- synchronous=NORMAL plus any extra per-store pragmas
+
+Usage:
+    from sqlite_conn import ThreadConnections
+
+    self._db = ThreadConnections(path, busy_timeout_ms=5000, pragmas=("foreign_keys=ON",))
+    self._db.get().execute("SELECT 1")
+"""
+
+import os
+import sqlite3
+import threading
+
+
+class ThreadConnections:
+    """One autocommit connection per (thread, pid) to a SQLite file."""
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout_ms: int = 5000,
+        pragmas: tuple[str, ...] = (),
+    ):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.pragmas = pragmas
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use or after fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,
+            )
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for pragma in self.pragmas:
+                conn.execute(f"PRAGMA {pragma}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,245 @@
+"""
+Shared webhook state backed by SQLite (WAL mode)
+
+Lets several webhook worker processes on one host share alert dedup,
+cached Parseable context, per-stream rate limits and the in-flight job
+journal. SQLite in WAL mode gives concurrent readers with a single
+writer, which is plenty for alert-storm volumes on one box.
+
+Usage:
+    from webhook_state import SharedState
+
+    state = SharedState("/var/lib/alert-webhook/state.db")
+
+    if state.seen_recently(fingerprint, ttl_seconds=300):
+        ...  # duplicate alert, drop it
+
+    logs = state.cache_get("logs:otel-logs")
+    if logs is None:
+        logs = fetch_context_logs("otel-logs")
+        state.cache_put("logs:otel-logs", logs, ttl_seconds=30)
+
+    if not state.allow("otel-logs", limit=6, per_seconds=60):
+        ...  # stream is over its analysis budget
+
+    job_id = state.begin_job(alert)
+    ...
+    state.finish_job(job_id)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from sqlite_conn import ThreadConnections
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup (
+    fingerprint TEXT PRIMARY KEY,
+    expires_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_events (
+    bucket TEXT NOT NULL,
+    at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rate_events_bucket_at ON rate_events (bucket, at);
+CREATE TABLE IF NOT EXISTS jobs (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    alert      TEXT NOT NULL,
+    worker_pid INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    attempts   INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+
+def alert_fingerprint(alert: dict) -> str:
+    """Stable fingerprint for an alert payload, ignoring its timestamp."""
+    key = {k: v for k, v in alert.items() if k not in ("timestamp", "fired_at")}
+    raw = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedState:
+    """Cross-process webhook state stored in a SQLite WAL database."""
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._db = ThreadConnections(path, busy_timeout_ms)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections are not shareable)."""
+        return self._db.get()
+
+    # -----------------------------------------------------------------
+    # Dedup
+    # -----------------------------------------------------------------
+
+    def seen_recently(self, fingerprint: str, ttl_seconds: float) -> bool:
+        """Record a fingerprint; return True if it was already seen within the TTL."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT expires_at FROM dedup WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+            if row and row[0] > now:
+                conn.execute("COMMIT")
+                return True
+            conn.execute(
+                "INSERT OR REPLACE INTO dedup (fingerprint, expires_at) VALUES (?, ?)",
+                (fingerprint, now + ttl_seconds),
+            )
+            conn.execute("COMMIT")
+            return False
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def forget(self, fingerprint: str) -> None:
+        """Drop a recorded fingerprint so the next delivery is processed again."""
+        self._conn().execute("DELETE FROM dedup WHERE fingerprint = ?", (fingerprint,))
+
+    # -----------------------------------------------------------------
+    # Context cache
+    # -----------------------------------------------------------------
+
+    def cache_get(self, key: str):
+        """Return the cached JSON value for key, or None if missing or expired."""
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if not row or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def cache_put(self, key: str, value, ttl_seconds: float) -> None:
+        """Store a JSON-serializable value under key for ttl_seconds."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), time.time() + ttl_seconds),
+        )
+
+    # -----------------------------------------------------------------
+    # Rate limiting (sliding window)
+    # -----------------------------------------------------------------
+
+    def allow(self, bucket: str, limit: int, per_seconds: float) -> bool:
+        """Return True and record an event if bucket has fewer than limit events in the window."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM rate_events WHERE bucket = ? AND at <= ?",
+                (bucket, now - per_seconds),
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM rate_events WHERE bucket = ?",
+                (bucket,),
+            ).fetchone()
+            if count >= limit:
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT INTO rate_events (bucket, at) VALUES (?, ?)",
+                (bucket, now),
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # -----------------------------------------------------------------
+    # In-flight job journal
+    # -----------------------------------------------------------------
+
+    def begin_job(self, alert: dict) -> int:
+        """Journal an alert as in flight for this worker and return its job id."""
+        cur = self._conn().execute(
+            "INSERT INTO jobs (alert, worker_pid, started_at) VALUES (?, ?, ?)",
+            (json.dumps(alert, default=str), os.getpid(), time.time()),
+        )
+        return int(cur.lastrowid)
+
+    def finish_job(self, job_id: int) -> None:
+        """Remove a completed job from the journal."""
+        self._conn().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def in_flight(self) -> int:
+        """Number of jobs currently journaled across all workers."""
+        (count,) = self._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()
+        return int(count)
+
+    def claim_orphaned_jobs(self, max_attempts: int = 3) -> list[tuple[int, dict]]:
+        """Take over jobs whose owning worker process has died.
+
+        Returns (job_id, alert) pairs now owned by this process. Jobs that
+        have already been retried max_attempts times are dropped.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        claimed = []
+        try:
+            rows = conn.execute(
+                "SELECT id, alert, worker_pid, attempts FROM jobs"
+            ).fetchall()
+            for job_id, alert_json, pid, attempts in rows:
+                if pid == os.getpid() or _pid_alive(pid):
+                    continue
+                if attempts >= max_attempts:
+                    conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET worker_pid = ?, started_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (os.getpid(), time.time(), job_id),
+                )
+                claimed.append((job_id, json.loads(alert_json)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    # -----------------------------------------------------------------
+    # Housekeeping
+    # -----------------------------------------------------------------
+
+    def purge_expired(self, rate_horizon_seconds: float = 3600) -> None:
+        """Delete expired dedup/cache rows and stale rate-limit events."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM dedup WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM rate_events WHERE at <= ?",
+            (now - rate_horizon_seconds,),
+        )
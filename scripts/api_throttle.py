@@ -0,0 +1,172 @@
+"""
+Adaptive throttling and retry for concurrent Claude API calls.
+
+Used by run_experiment.py when several experiments run at once. The
+throttle caps requests in flight, shrinks that cap when the API signals
+pressure (429 rate limits, 529 overloaded, or low remaining-quota
+headers) and grows it back one step per successful call. Connection
+errors, timeouts and transient 408/409/5xx responses are retried with the
+same backoff but do not shrink the cap. The SDK's own retries are turned
+off (max_retries=0) so every retry goes through here.
+
+Rate-limit headers read (all optional):
+    anthropic-ratelimit-requests-remaining / -requests-reset
+    anthropic-ratelimit-input-tokens-remaining / -input-tokens-reset
+    anthropic-ratelimit-output-tokens-remaining / -output-tokens-reset
+    retry-after
+"""
+
+import random
+import threading
+import time
+from datetime import datetime
+
+RETRYABLE_STATUS = (429, 529)
+# Retried with backoff like the SDK does, without counting as rate pressure.
+TRANSIENT_STATUS = (408, 409, 500, 502, 503, 504)
+
+
+def _parse_reset(value: str | None) -> float | None:
+    """Convert an RFC 3339 reset timestamp header into seconds from now."""
+    if not value:
+        return None
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, reset.timestamp() - time.time())
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_connection_error(exc: Exception) -> bool:
+    """True for SDK connection errors and timeouts (APITimeoutError is a subclass)."""
+    try:
+        import anthropic
+    except ImportError:
+        return False
+    return isinstance(exc, anthropic.APIConnectionError)
+
+
+def retry_after_seconds(headers, default: float) -> float:
+    """Seconds to wait from a retry-after header, or default."""
+    try:
+        return max(0.0, float(headers.get("retry-after", default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class AdaptiveThrottle:
+    """Concurrency limiter driven by API rate-limit feedback (AIMD)."""
+
+    def __init__(self, max_concurrency: int, low_watermark: float = 0.05):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.low_watermark = low_watermark
+        self._active = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self) -> float:
+        """Block until a request slot is free; returns seconds spent waiting."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0 and self._active < self.limit:
+                    self._active += 1
+                    break
+                self._cond.wait(timeout=pause if pause > 0 else None)
+        waited = time.monotonic() - start
+        with self._cond:
+            self.wait_seconds += waited
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Hold all new requests for the given number of seconds."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def on_success(self, headers) -> None:
+        """Grow the limit by one and pause early if remaining quota is nearly gone."""
+        with self._cond:
+            self.limit = min(self.max_concurrency, self.limit + 1)
+            self._cond.notify_all()
+
+        for kind in ("requests", "input-tokens", "output-tokens"):
+            remaining = _parse_int(headers.get(f"anthropic-ratelimit-{kind}-remaining"))
+            limit = _parse_int(headers.get(f"anthropic-ratelimit-{kind}-limit"))
+            if remaining is None or not limit:
+                continue
+            if remaining / limit <= self.low_watermark:
+                reset = _parse_reset(headers.get(f"anthropic-ratelimit-{kind}-reset"))
+                if reset:
+                    self.pause(reset)
+                with self._cond:
+                    self.limit = max(1, self.limit // 2)
+
+    def on_pressure(self, retry_after: float) -> None:
+        """Halve the limit and pause after a 429/529."""
+        with self._cond:
+            self.rate_limited += 1
+            self.limit = max(1, self.limit // 2)
+        self.pause(retry_after)
+
+
+def call_with_retry(
+    send,
+    throttle: AdaptiveThrottle,
+    max_retries: int = 6,
+    base_delay: float = 2.0,
+    max_delay: float = 60.0,
+):
+    """Call send() under the throttle, retrying 429/529 and transient errors with backoff.
+
+    send must return a raw SDK response (``client.messages.with_raw_response
+    .create(...)``) so rate-limit headers can be inspected. Returns
+    (parsed_message, attempts).
+    """
+    attempt = 0
+    backoff = 0.0
+    while True:
+        attempt += 1
+        if backoff:
+            time.sleep(backoff)  # transient error: wait without holding a slot
+            backoff = 0.0
+        throttle.acquire()
+        try:
+            raw = send()
+        except Exception as exc:
+            status = getattr(exc, "status_code", None)
+            pressure = status in RETRYABLE_STATUS
+            transient = status in TRANSIENT_STATUS or _is_connection_error(exc)
+            if not (pressure or transient) or attempt > max_retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+            headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+            delay = retry_after_seconds(headers, delay)
+            delay += random.uniform(0, delay * 0.25)
+            if pressure:
+                throttle.on_pressure(delay)
+            else:
+                backoff = delay
+            reason = f"API returned {status}" if status else type(exc).__name__
+            print(f"  {reason}; retry {attempt}/{max_retries} in {delay:.1f}s")
+            continue
+        finally:
+            throttle.release()
+        throttle.on_success(raw.headers)
+        return raw.parse(), attempt
@@ -0,0 +1,204 @@
+"""
+Message Batches support for run_experiment.py sweeps.
+
+A sweep (experiments x models x repeats) is submitted as a single
+Message Batch instead of one synchronous request per run. The batch ID and
+the mapping from each request's custom_id to its (experiment, model, run)
+are persisted under results/.batches/ as soon as the batch is created, so
+an interrupted run can pick up polling where it left off and results that
+were already written are not written twice.
+
+Batched requests are billed at half the synchronous price.
+
+Usage (from run_experiment.py):
+    sweep = submit_sweep(client, BATCH_STATE_DIR, requests)
+    wait_for_batch(client, sweep)
+    collect_results(client, sweep, handle_result)
+
+The client is passed in, so a local stand-in can be used by constructing
+it with base_url (or setting ANTHROPIC_BASE_URL).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    import anthropic
+
+BATCH_DISCOUNT = 0.5
+DEFAULT_POLL_INITIAL_SECONDS = 10.0
+DEFAULT_POLL_MAX_SECONDS = 300.0
+DEFAULT_POLL_FACTOR = 1.5
+
+
+def _transient_errors() -> tuple[type[Exception], ...]:
+    """Poll failures worth retrying rather than abandoning the wait.
+
+    The SDK is imported here, not at module level, so importing this
+    module (and run_experiment.py) stays cheap for --help and --dry-run.
+    """
+    import anthropic
+
+    return (
+        anthropic.APIConnectionError,
+        anthropic.RateLimitError,
+        anthropic.InternalServerError,
+    )
+
+
+def sweep_id(requests: list[dict]) -> str:
+    """Stable ID for a set of batch requests, used to avoid resubmitting a sweep."""
+    digest = hashlib.sha256()
+    for request in sorted(requests, key=lambda r: r["custom_id"]):
+        digest.update(request["custom_id"].encode("utf-8"))
+        digest.update(json.dumps(request["params"], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class BatchSweep:
+    """Persisted state of one submitted batch."""
+
+    def __init__(self, path: Path, state: dict):
+        self.path = path
+        self.state = state
+
+    @classmethod
+    def load(cls, path: Path) -> "BatchSweep":
+        return cls(path, json.loads(path.read_text(encoding="utf-8")))
+
+    @property
+    def batch_id(self) -> str:
+        return self.state["batch_id"]
+
+    @property
+    def jobs(self) -> dict[str, dict]:
+        return self.state["jobs"]
+
+    @property
+    def complete(self) -> bool:
+        return self.state.get("status") == "collected"
+
+    def is_collected(self, custom_id: str) -> bool:
+        return custom_id in self.state["collected"]
+
+    def mark_collected(self, custom_id: str) -> None:
+        self.state["collected"].append(custom_id)
+        self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def pending_sweeps(state_dir: Path) -> list[BatchSweep]:
+    """Sweeps whose results have not all been written out yet, oldest first."""
+    if not state_dir.is_dir():
+        return []
+    sweeps = [BatchSweep.load(p) for p in sorted(state_dir.glob("*.json"))]
+    return sorted(
+        (s for s in sweeps if not s.complete),
+        key=lambda s: s.state["submitted_at"],
+    )
+
+
+def submit_sweep(
+    client: anthropic.Anthropic,
+    state_dir: Path,
+    requests: list[dict],
+) -> BatchSweep:
+    """Submit requests as one batch, or resume a pending batch for the same sweep.
+
+    Each request is {"custom_id", "params", "job"}; job is the caller's
+    description of the run and is handed back with its result.
+    """
+    sid = sweep_id(requests)
+    for sweep in pending_sweeps(state_dir):
+        if sweep.state["sweep_id"] == sid:
+            print(f"  Resuming batch {sweep.batch_id} submitted {sweep.state['submitted_at']}")
+            return sweep
+
+    batch = client.messages.batches.create(
+        requests=[{"custom_id": r["custom_id"], "params": r["params"]} for r in requests],
+    )
+    sweep = BatchSweep(
+        state_dir / f"{batch.id}.json",
+        {
+            "batch_id": batch.id,
+            "sweep_id": sid,
+            "submitted_at": datetime.now(timezone.utc).isoformat(),
+            "status": "submitted",
+            "jobs": {r["custom_id"]: r["job"] for r in requests},
+            "collected": [],
+        },
+    )
+    sweep.save()
+    print(f"  Submitted batch {batch.id} with {len(requests)} request(s)")
+    return sweep
+
+
+def wait_for_batch(
+    client: anthropic.Anthropic,
+    sweep: BatchSweep,
+    initial_delay: float = DEFAULT_POLL_INITIAL_SECONDS,
+    max_delay: float = DEFAULT_POLL_MAX_SECONDS,
+    factor: float = DEFAULT_POLL_FACTOR,
+    sleep: Callable[[float], None] = time.sleep,
+):
+    """Poll until the batch has ended, backing off between polls."""
+    delay = initial_delay
+    last_counts = None
+    while True:
+        try:
+            batch = client.messages.batches.retrieve(sweep.batch_id)
+        except _transient_errors() as e:
+            print(f"  Poll failed ({e.__class__.__name__}); retrying in {delay:.0f}s")
+        else:
+            counts = batch.request_counts
+            summary = (
+                f"processing={counts.processing} succeeded={counts.succeeded} "
+                f"errored={counts.errored} canceled={counts.canceled} expired={counts.expired}"
+            )
+            if summary != last_counts:
+                print(f"  [{datetime.now(timezone.utc):%H:%M:%S}] {sweep.batch_id}: {summary}")
+                last_counts = summary
+            if batch.processing_status == "ended":
+                sweep.state["status"] = "ended"
+                sweep.state["ended_at"] = batch.ended_at.isoformat() if batch.ended_at else None
+                sweep.save()
+                return batch
+        sleep(delay)
+        delay = min(max_delay, delay * factor)
+
+
+def collect_results(
+    client: anthropic.Anthropic,
+    sweep: BatchSweep,
+    handle: Callable[[dict, object], None],
+) -> int:
+    """Stream the batch's results to handle(job, result); returns how many were handled.
+
+    Results already handled by an earlier, interrupted run are skipped.
+    """
+    handled = 0
+    for entry in client.messages.batches.results(sweep.batch_id):
+        if sweep.is_collected(entry.custom_id):
+            continue
+        job = sweep.jobs.get(entry.custom_id)
+        if job is None:
+            print(f"  Warning: unknown custom_id {entry.custom_id} in batch results")
+            continue
+        handle(job, entry.result)
+        sweep.mark_collected(entry.custom_id)
+        handled += 1
+    sweep.state["status"] = "collected"
+    sweep.save()
+    return handled
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Benchmark experiments across models and prompt revisions.
+
+Every metadata_*.json under results/ is folded into a SQLite index
+(results/index.sqlite), updated incrementally: only new or modified
+files are read. Reports aggregate the index by experiment, model and
+revision; compare flags regressions between two revisions.
+
+A revision is the --revision label given to `benchmark.py run` (default:
+the current git commit, with "-dirty" if experiments/ has uncommitted
+changes). Runs made with plain run_experiment.py are indexed under
+"prompt:<hash>" of the exact prompt sent, or "legacy" for older runs.
+
+Usage:
+    python scripts/benchmark.py run --all --models claude-opus-4-6,claude-sonnet-4-5-20250929 --repeat 5
+    python scripts/benchmark.py run --experiment 02-log-analysis --repeat 10 --revision shorter-prompt
+    python scripts/benchmark.py run --experiment 04-alert-correlation --models claude-sonnet-4-5-20250929 --stream
+    python scripts/benchmark.py index
+    python scripts/benchmark.py report --experiment 02-log-analysis
+    python scripts/benchmark.py compare --base a1b2c3d --head shorter-prompt
+
+Requires:
+    pip install anthropic          # only for `run`
+    export ANTHROPIC_API_KEY=sk-ant-...
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from stream_metrics import percentile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "results"
+INDEX_PATH = RESULTS_DIR / "index.sqlite"
+
+# Relative increases that count as a regression in `compare`.
+DEFAULT_LATENCY_THRESHOLD = 0.20
+DEFAULT_COST_THRESHOLD = 0.10
+DEFAULT_TRUNCATION_THRESHOLD = 0.10
+
+# Bump when the runs table changes; the index is derived data and is rebuilt.
+SCHEMA_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    path               TEXT PRIMARY KEY REFERENCES files (path) ON DELETE CASCADE,
+    experiment         TEXT NOT NULL,
+    model              TEXT NOT NULL,
+    revision           TEXT NOT NULL,
+    timestamp          TEXT,
+    run_index          INTEGER,
+    input_tokens       INTEGER,
+    output_tokens      INTEGER,
+    estimated_cost_usd REAL,
+    elapsed_seconds    REAL,
+    stop_reason        TEXT,
+    cached             INTEGER NOT NULL DEFAULT 0,
+    batch_id           TEXT,
+    prompt_sha256      TEXT,
+    ttft_seconds       REAL,
+    stream_tok_per_s   REAL
+);
+CREATE INDEX IF NOT EXISTS runs_group ON runs (experiment, model, revision);
+"""
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+
+def _revision_of(metadata: dict) -> str:
+    if metadata.get("revision"):
+        return metadata["revision"]
+    if metadata.get("prompt_sha256"):
+        return f"prompt:{metadata['prompt_sha256'][:10]}"
+    return "legacy"
+
+
+class ResultsIndex:
+    """SQLite index over results/*/metadata_*.json."""
+
+    def __init__(self, path: Path = INDEX_PATH, results_dir: Path = RESULTS_DIR):
+        self.path = path
+        self.results_dir = results_dir
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS runs; DROP TABLE IF EXISTS files;")
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.conn.executescript(_SCHEMA)
+
+    def update(self) -> tuple[int, int]:
+        """Index new or changed metadata files and drop deleted ones.
+
+        Returns (files_indexed, files_removed).
+        """
+        known = dict(self.conn.execute("SELECT path, mtime FROM files"))
+        seen = set()
+        indexed = 0
+        with self.conn:
+            for meta_path in sorted(self.results_dir.glob("*/metadata_*.json")):
+                rel = str(meta_path.relative_to(self.results_dir))
+                seen.add(rel)
+                mtime = meta_path.stat().st_mtime
+                if known.get(rel) == mtime:
+                    continue
+                try:
+                    metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                # Interrupted streams have no usage or stop reason to aggregate.
+                if "model" not in metadata or metadata.get("interrupted"):
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime) VALUES (?, ?)", (rel, mtime)
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO runs VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        rel,
+                        metadata.get("experiment", meta_path.parent.name),
+                        metadata["model"],
+                        _revision_of(metadata),
+                        metadata.get("timestamp"),
+                        metadata.get("run_index"),
+                        metadata.get("input_tokens"),
+                        metadata.get("output_tokens"),
+                        metadata.get("estimated_cost_usd"),
+                        metadata.get("elapsed_seconds"),
+                        metadata.get("stop_reason"),
+                        int(bool(metadata.get("cached"))),
+                        metadata.get("batch_id"),
+                        metadata.get("prompt_sha256"),
+                        metadata.get("ttft_seconds"),
+                        metadata.get("output_tokens_per_second"),
+                    ),
+                )
+                indexed += 1
+            removed = [p for p in known if p not in seen]
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+        return indexed, len(removed)
+
+    def runs(
+        self,
+        experiment: str | None = None,
+        model: str | None = None,
+        revisions: list[str] | None = None,
+    ) -> list[dict]:
+        """Indexed runs matching the filters; cached replays are excluded."""
+        sql = "SELECT * FROM runs WHERE cached = 0"
+        params: list = []
+        if experiment:
+            sql += " AND experiment = ?"
+            params.append(experiment)
+        if model:
+            sql += " AND model = ?"
+            params.append(model)
+        if revisions:
+            sql += f" AND revision IN ({','.join('?' * len(revisions))})"
+            params.extend(revisions)
+        cursor = self.conn.execute(sql + " ORDER BY timestamp", params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+
+def summarize(runs: list[dict]) -> dict:
+    """Latency percentiles, throughput, tokens, cost and stop reasons for a group.
+
+    Throughput uses the streamed generation rate when available, otherwise
+    output tokens over total elapsed time.
+    """
+    timed = [r for r in runs if r["elapsed_seconds"]]
+    latencies = [r["elapsed_seconds"] for r in timed]
+    throughput = [
+        r["stream_tok_per_s"] or r["output_tokens"] / r["elapsed_seconds"]
+        for r in timed
+        if r["output_tokens"]
+    ]
+    ttfts = [r["ttft_seconds"] for r in runs if r["ttft_seconds"] is not None]
+    stops = Counter(r["stop_reason"] or "unknown" for r in runs)
+
+    def mean(values):
+        values = [v for v in values if v is not None]
+        return sum(values) / len(values) if values else None
+
+    return {
+        "runs": len(runs),
+        "p50_s": percentile(latencies, 50),
+        "p90_s": percentile(latencies, 90),
+        "p99_s": percentile(latencies, 99),
+        "ttft_p50_s": percentile(ttfts, 50),
+        "ttft_p90_s": percentile(ttfts, 90),
+        "tok_per_s": mean(throughput),
+        "mean_input_tokens": mean([r["input_tokens"] for r in runs]),
+        "mean_output_tokens": mean([r["output_tokens"] for r in runs]),
+        "mean_cost_usd": mean([r["estimated_cost_usd"] for r in runs]),
+        "total_cost_usd": sum(r["estimated_cost_usd"] or 0 for r in runs),
+        "stop_reasons": dict(stops),
+        "truncated_ratio": stops.get("max_tokens", 0) / len(runs) if runs else 0.0,
+    }
+
+
+def group_runs(runs: list[dict]) -> dict[tuple[str, str, str], list[dict]]:
+    groups: dict[tuple[str, str, str], list[dict]] = {}
+    for r in runs:
+        groups.setdefault((r["experiment"], r["model"], r["revision"]), []).append(r)
+    return groups
+
+
+def _fmt(value, spec: str = ".1f", suffix: str = "") -> str:
+    return "-" if value is None else f"{value:{spec}}{suffix}"
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+
+def print_report(index: ResultsIndex, experiment: str | None, model: str | None, as_json: bool) -> None:
+    groups = group_runs(index.runs(experiment, model))
+    summaries = {key: summarize(runs) for key, runs in sorted(groups.items())}
+    if as_json:
+        print(json.dumps(
+            [
+                {"experiment": e, "model": m, "revision": rev, **s}
+                for (e, m, rev), s in summaries.items()
+            ],
+            indent=2,
+        ))
+        return
+    if not summaries:
+        print("No indexed runs match.")
+        return
+
+    header = (
+        f"  {'Experiment':<24} {'Model':<28} {'Revision':<18} {'Runs':>4} "
+        f"{'p50 s':>6} {'p90 s':>6} {'p99 s':>6} {'TTFT50':>6} {'tok/s':>6} {'Out tok':>7} "
+        f"{'$/run':>7}  Stop reasons"
+    )
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    for (exp, mdl, rev), s in summaries.items():
+        stops = ", ".join(f"{k}={v}" for k, v in sorted(s["stop_reasons"].items()))
+        print(
+            f"  {exp:<24} {mdl:<28} {rev:<18} {s['runs']:>4} "
+            f"{_fmt(s['p50_s']):>6} {_fmt(s['p90_s']):>6} {_fmt(s['p99_s']):>6} "
+            f"{_fmt(s['ttft_p50_s'], '.2f'):>6} {_fmt(s['tok_per_s'], '.0f'):>6} {_fmt(s['mean_output_tokens'], ',.0f'):>7} "
+            f"{_fmt(s['mean_cost_usd'], '.4f'):>7}  {stops}"
+        )
+
+
+def _relative(base: float | None, head: float | None) -> float | None:
+    if base is None or head is None or base == 0:
+        return None
+    return (head - base) / base
+
+
+def compare_revisions(
+    index: ResultsIndex,
+    base: str,
+    head: str,
+    experiment: str | None = None,
+    latency_threshold: float = DEFAULT_LATENCY_THRESHOLD,
+    cost_threshold: float = DEFAULT_COST_THRESHOLD,
+    truncation_threshold: float = DEFAULT_TRUNCATION_THRESHOLD,
+) -> list[dict]:
+    """Per (experiment, model) deltas between two revisions, with regression flags."""
+    groups = group_runs(index.runs(experiment, revisions=[base, head]))
+    pairs = sorted({(e, m) for e, m, _ in groups})
+    rows = []
+    for exp, mdl in pairs:
+        b, h = groups.get((exp, mdl, base)), groups.get((exp, mdl, head))
+        if not b or not h:
+            continue
+        sb, sh = summarize(b), summarize(h)
+        latency = _relative(sb["p50_s"], sh["p50_s"])
+        cost = _relative(sb["mean_cost_usd"], sh["mean_cost_usd"])
+        truncation = sh["truncated_ratio"] - sb["truncated_ratio"]
+        regressions = []
+        if latency is not None and latency > latency_threshold:
+            regressions.append(f"p50 latency {latency:+.0%}")
+        if cost is not None and cost > cost_threshold:
+            regressions.append(f"cost/run {cost:+.0%}")
+        if truncation > truncation_threshold:
+            regressions.append(f"max_tokens stops {truncation:+.0%}")
+        rows.append({
+            "experiment": exp,
+            "model": mdl,
+            "base": sb,
+            "head": sh,
+            "p50_change": latency,
+            "cost_change": cost,
+            "output_tokens_change": _relative(sb["mean_output_tokens"], sh["mean_output_tokens"]),
+            "truncation_change": truncation,
+            "regressions": regressions,
+        })
+    return rows
+
+
+def print_comparison(rows: list[dict], base: str, head: str) -> None:
+    if not rows:
+        print(f"No experiment/model pairs have runs in both '{base}' and '{head}'.")
+        return
+    print(f"  Comparing {base} -> {head}\n")
+    print(
+        f"  {'Experiment':<24} {'Model':<28} {'Runs':>7} {'p50 s':>13} {'Δp50':>6} "
+        f"{'Δout tok':>8} {'Δ$/run':>7}  Status"
+    )
+    for row in rows:
+        b, h = row["base"], row["head"]
+
+        def pct(value):
+            return "-" if value is None else f"{value:+.0%}"
+
+        status = "REGRESSION: " + "; ".join(row["regressions"]) if row["regressions"] else "ok"
+        print(
+            f"  {row['experiment']:<24} {row['model']:<28} {b['runs']:>3}/{h['runs']:<3} "
+            f"{_fmt(b['p50_s']):>6}/{_fmt(h['p50_s']):<6} {pct(row['p50_change']):>6} "
+            f"{pct(row['output_tokens_change']):>8} {pct(row['cost_change']):>7}  {status}"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+
+def current_revision() -> str:
+    """Short git commit, suffixed -dirty if experiments/ has local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--", "experiments"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("run-%Y%m%dT%H%M%S", time.gmtime())
+    return f"{commit}-dirty" if dirty else commit
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    import anthropic
+
+    import run_experiment
+
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("Error: ANTHROPIC_API_KEY environment variable is not set.")
+        sys.exit(1)
+
+    experiments = run_experiment.discover_experiments() if args.all else [args.experiment]
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    revision = args.revision or current_revision()
+    jobs = [
+        (exp, model, run)
+        for run in range(1, args.repeat + 1)
+        for exp in experiments
+        for model in models
+    ]
+    print(
+        f"Benchmarking {len(experiments)} experiment(s) x {len(models)} model(s) x "
+        f"{args.repeat} run(s) as revision '{revision}'"
+    )
+
+    client = anthropic.Anthropic(api_key=api_key, max_retries=0)
+    # Never served from cache: every run must be a real, timed request.
+    run_experiment.run_many(
+        jobs,
+        client,
+        args.parallel,
+        cache=None,
+        token_budget=args.token_budget,
+        extra_metadata={"revision": revision, "benchmark": True},
+        stream=args.stream,
+    )
+
+    index = ResultsIndex()
+    index.update()
+    print()
+    print_report(index, args.experiment, None, as_json=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Claude experiments and compare revisions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run experiments N times per model and index the results")
+    target = run.add_mutually_exclusive_group(required=True)
+    target.add_argument("--experiment", type=str, help="Experiment directory name")
+    target.add_argument("--all", action="store_true", help="Benchmark every experiment")
+    run.add_argument(
+        "--models",
+        type=str,
+        default="claude-opus-4-6",
+        help="Comma-separated models (default: claude-opus-4-6)",
+    )
+    run.add_argument("--repeat", type=int, default=5, help="Runs per experiment per model (default: 5)")
+    run.add_argument("--parallel", type=int, default=1, help="Max concurrent requests (default: 1)")
+    run.add_argument("--revision", type=str, help="Label for this revision (default: git commit)")
+    run.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream responses to record time-to-first-token and generation speed",
+    )
+    run.add_argument(
+        "--token-budget",
+        type=int,
+        default=150_000,
+        help="Prompt token budget passed to run_experiment (default: 150,000)",
+    )
+
+    sub.add_parser("index", help="Update the results index from results/*/metadata_*.json")
+
+    report = sub.add_parser("report", help="Aggregate indexed runs by experiment/model/revision")
+    report.add_argument("--experiment", type=str)
+    report.add_argument("--model", type=str)
+    report.add_argument("--json", action="store_true", help="Emit JSON instead of a table")
+
+    compare = sub.add_parser("compare", help="Flag regressions between two revisions")
+    compare.add_argument("--base", required=True, help="Baseline revision")
+    compare.add_argument("--head", required=True, help="Revision to check")
+    compare.add_argument("--experiment", type=str)
+    compare.add_argument("--latency-threshold", type=float, default=DEFAULT_LATENCY_THRESHOLD)
+    compare.add_argument("--cost-threshold", type=float, default=DEFAULT_COST_THRESHOLD)
+    compare.add_argument(
+        "--truncation-threshold",
+        type=float,
+        default=DEFAULT_TRUNCATION_THRESHOLD,
+        help=(
+            "Rise in the share of max_tokens stops that counts as a regression "
+            f"(default: {DEFAULT_TRUNCATION_THRESHOLD})"
+        ),
+    )
+    compare.add_argument("--json", action="store_true", help="Emit JSON instead of a table")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_benchmark(args)
+        return
+
+    index = ResultsIndex()
+    indexed, removed = index.update()
+    if args.command == "index":
+        total = index.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        print(f"Indexed {indexed} new/changed file(s), removed {removed}; {total} run(s) in {INDEX_PATH}")
+    elif args.command == "report":
+        print_report(index, args.experiment, args.model, args.json)
+    elif args.command == "compare":
+        rows = compare_revisions(
+            index,
+            args.base,
+            args.head,
+            args.experiment,
+            latency_threshold=args.latency_threshold,
+            cost_threshold=args.cost_threshold,
+            truncation_threshold=args.truncation_threshold,
+        )
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print_comparison(rows, args.base, args.head)
+        # Non-zero exit lets CI fail on a regression.
+        if any(row["regressions"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Compressed, memory-mapped dataset container for experiment inputs.
+
+A dataset is NDJSON split into blocks of rows. Each block is compressed
+as an independent zstd frame, and a JSON index is stored in zstd
+skippable frames at the end of the file:
+
+    [zstd frame: rows 0..n) ][zstd frame: rows n..2n) ] ...
+    [skippable frame: index JSON][skippable frame: index offset + tag]
+
+Because skippable frames are ignored by zstd, `zstd -dc data.ndjson.zst`
+still yields the plain NDJSON rows. The index records each block's
+offset, row count, uncompressed size and min/max timestamp, so readers
+mmap the file and decompress only the blocks a sample or time range
+needs; fields are projected per row as blocks are decoded.
+
+Experiment sample data is often a document with one large array inside
+it (e.g. {"alert_storm": {"alerts": [...]}}). The converter stores that
+array's items as the rows and keeps the rest of the document, the path
+to the array and its JSON formatting in the index, so the original
+document can be rebuilt exactly (or with a subset of rows).
+
+Usage:
+    python scripts/dataset.py convert experiments/02-log-analysis/sample_data.json
+    python scripts/dataset.py convert exports/otel-logs_20260206T120000Z.ndjson -o data/otel-logs.ndjson.zst
+    python scripts/dataset.py info experiments/02-log-analysis/sample_data.ndjson.zst
+    python scripts/dataset.py cat data/otel-logs.ndjson.zst --start 2026-02-06T06:30:00Z \\
+        --end 2026-02-06T06:35:00Z --fields p_timestamp,level,body --sample 100
+
+    with Dataset(path) as ds:
+        rows = ds.sample(500, fields=["p_timestamp", "level", "body"])
+        text = ds.to_json(rows)
+
+Requires:
+    pip install zstandard
+"""
+
+import argparse
+import copy
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    raise ImportError("zstandard is required: pip install zstandard")
+
+DATASET_SUFFIX = ".ndjson.zst"
+FORMAT_NAME = "parseable-dataset"
+FORMAT_VERSION = 1
+DEFAULT_BLOCK_ROWS = 1024
+DEFAULT_BLOCK_BYTES = 1 << 20
+DEFAULT_LEVEL = 9
+
+# Fields tried, in order, as the row timestamp used for block pruning.
+TIME_FIELDS = ("p_timestamp", "timestamp", "@timestamp", "time", "fired_at", "start_time")
+
+_INDEX_MAGIC = 0x184D2A5E
+_TRAILER_MAGIC = 0x184D2A5F
+_TRAILER_TAG = b"PDS1"
+_TRAILER_SIZE = 8 + 12  # frame header + (u64 index offset, tag)
+
+
+def _skippable_frame(magic: int, payload: bytes) -> bytes:
+    return struct.pack("<II", magic, len(payload)) + payload
+
+
+def parse_time(value) -> datetime | None:
+    """ISO 8601 string -> aware datetime (UTC if naive); None if not a timestamp."""
+    if not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def detect_json_format(text: str, document) -> dict:
+    """json.dumps arguments that reproduce text exactly, or a 2-space default."""
+    for indent, separators in ((2, None), (None, (",", ":")), (None, None), (4, None)):
+        rendered = json.dumps(document, indent=indent, separators=separators, ensure_ascii=False)
+        for trailing_newline in (False, True):
+            if rendered + ("\n" if trailing_newline else "") == text:
+                return {
+                    "indent": indent,
+                    "separators": separators,
+                    "trailing_newline": trailing_newline,
+                    "exact": True,
+                }
+    return {"indent": 2, "separators": None, "trailing_newline": False, "exact": False}
+
+
+def _find_records(document, path: tuple = ()) -> tuple:
+    """Path to the largest list of objects in document (() if it is one)."""
+    best_path, best_len = None, 0
+    if isinstance(document, list) and all(isinstance(r, dict) for r in document):
+        best_path, best_len = path, len(document)
+    if isinstance(document, dict):
+        for key, value in document.items():
+            sub_path = _find_records(value, path + (key,))
+            if sub_path is not None:
+                length = len(_get_path(document, sub_path[len(path):]))
+                if length > best_len:
+                    best_path, best_len = sub_path, length
+    return best_path
+
+
+def _get_path(document, path):
+    for key in path:
+        document = document[key]
+    return document
+
+
+def _set_path(document, path, value):
+    if not path:
+        return value
+    _get_path(document, path[:-1])[path[-1]] = value
+    return document
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+
+class DatasetWriter:
+    """Streams rows into a dataset file; the index is written by close().
+
+    The file is written to a temporary path and renamed on close, so a
+    reader never sees a dataset without its index.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        time_field: str | None = None,
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+        block_bytes: int = DEFAULT_BLOCK_BYTES,
+        level: int = DEFAULT_LEVEL,
+        document: dict | None = None,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp, "wb")
+        self._compressor = zstandard.ZstdCompressor(level=level, write_content_size=True)
+        self.time_field = time_field
+        self.block_rows = block_rows
+        self.block_bytes = block_bytes
+        self.document = document
+        self.blocks: list[dict] = []
+        self.fields: dict[str, None] = {}
+        self.rows = 0
+        self.raw_bytes = 0
+        self._lines: list[bytes] = []
+        self._pending_bytes = 0
+        self._times: list[datetime] = []
+
+    def write(self, row: dict) -> None:
+        if self.time_field is None and self.rows == 0 and not self._lines:
+            self.time_field = next((f for f in TIME_FIELDS if parse_time(row.get(f))), None)
+        line = json.dumps(row, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+        self._lines.append(line)
+        self._pending_bytes += len(line)
+        self.fields.update(dict.fromkeys(row))
+        if self.time_field:
+            ts = parse_time(row.get(self.time_field))
+            if ts is not None:
+                self._times.append(ts)
+        if len(self._lines) >= self.block_rows or self._pending_bytes >= self.block_bytes:
+            self._flush_block()
+
+    def write_many(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def _flush_block(self) -> None:
+        if not self._lines:
+            return
+        raw = b"".join(self._lines)
+        frame = self._compressor.compress(raw)
+        block = {
+            "offset": self._file.tell(),
+            "length": len(frame),
+            "rows": len(self._lines),
+            "raw_bytes": len(raw),
+            "first_row": self.rows,
+        }
+        if self._times:
+            block["min_time"] = min(self._times).isoformat()
+            block["max_time"] = max(self._times).isoformat()
+        self._file.write(frame)
+        self.blocks.append(block)
+        self.rows += len(self._lines)
+        self.raw_bytes += len(raw)
+        self._lines, self._pending_bytes, self._times = [], 0, []
+
+    def close(self) -> dict:
+        """Write the index and move the file into place; returns the index."""
+        self._flush_block()
+        index = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "rows": self.rows,
+            "raw_bytes": self.raw_bytes,
+            "fields": list(self.fields),
+            "time_field": self.time_field,
+            "blocks": self.blocks,
+            "document": self.document,
+        }
+        index_offset = self._file.tell()
+        payload = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._file.write(_skippable_frame(_INDEX_MAGIC, payload))
+        self._file.write(_skippable_frame(_TRAILER_MAGIC, struct.pack("<Q", index_offset) + _TRAILER_TAG))
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        return index
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def convert_json(src: Path, dst: Path, **writer_options) -> dict:
+    """Convert a JSON document (e.g. sample_data.json) to a dataset."""
+    text = Path(src).read_text(encoding="utf-8")
+    document = json.loads(text)
+    records_path = _find_records(document)
+    if records_path is None:
+        # No array of objects: store the whole document as a single row.
+        records, envelope, records_path = [document], None, None
+    else:
+        records = _get_path(document, records_path)
+        envelope = copy.deepcopy(_set_path(document, records_path, [])) if records_path else None
+    doc_info = {
+        "path": list(records_path) if records_path is not None else None,
+        "envelope": envelope,
+        "json_format": detect_json_format(text, json.loads(text)),
+    }
+    with DatasetWriter(dst, document=doc_info, **writer_options) as writer:
+        writer.write_many(records)
+    return Dataset.read_index(dst)
+
+
+def convert_ndjson(src: Path, dst: Path, **writer_options) -> dict:
+    """Convert NDJSON (e.g. export_parseable.py output), streaming line by line."""
+    doc_info = {
+        "path": [],
+        "envelope": None,
+        "json_format": {"indent": None, "separators": [",", ":"], "trailing_newline": False, "exact": False},
+    }
+    with open(src, encoding="utf-8") as f, DatasetWriter(dst, document=doc_info, **writer_options) as writer:
+        for line in f:
+            if line.strip():
+                writer.write(json.loads(line))
+    return Dataset.read_index(dst)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+class Dataset:
+    """Read-only, memory-mapped view of a dataset file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = self._parse_index(self._mmap, self.path)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    @staticmethod
+    def _parse_index(buf, path) -> dict:
+        if len(buf) < _TRAILER_SIZE:
+            raise ValueError(f"{path}: not a dataset file (too short)")
+        magic, size = struct.unpack_from("<II", buf, len(buf) - _TRAILER_SIZE)
+        offset, = struct.unpack_from("<Q", buf, len(buf) - 12)
+        if magic != _TRAILER_MAGIC or size != 12 or bytes(buf[-4:]) != _TRAILER_TAG:
+            raise ValueError(f"{path}: not a dataset file (missing index trailer)")
+        magic, size = struct.unpack_from("<II", buf, offset)
+        if magic != _INDEX_MAGIC:
+            raise ValueError(f"{path}: corrupt dataset index")
+        index = json.loads(bytes(buf[offset + 8 : offset + 8 + size]))
+        if index.get("format") != FORMAT_NAME or index.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported dataset format {index.get('format')} v{index.get('version')}")
+        return index
+
+    @classmethod
+    def read_index(cls, path: Path) -> dict:
+        with cls(path) as ds:
+            return ds.index
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "Dataset":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.index["rows"]
+
+    @property
+    def fields(self) -> list[str]:
+        return self.index["fields"]
+
+    @property
+    def raw_bytes(self) -> int:
+        return self.index["raw_bytes"]
+
+    def _decode_block(self, block: dict) -> list[bytes]:
+        frame = self._mmap[block["offset"] : block["offset"] + block["length"]]
+        raw = self._decompressor.decompress(frame, max_output_size=block["raw_bytes"])
+        return raw.splitlines()
+
+    def _blocks_in_range(self, start: datetime | None, end: datetime | None) -> list[dict]:
+        blocks = []
+        for block in self.index["blocks"]:
+            if start is not None and "max_time" in block and parse_time(block["max_time"]) < start:
+                continue
+            if end is not None and "min_time" in block and parse_time(block["min_time"]) >= end:
+                continue
+            blocks.append(block)
+        return blocks
+
+    def _select(self, row: dict, start, end, fields) -> dict | None:
+        if start is not None or end is not None:
+            ts = parse_time(row.get(self.index["time_field"] or ""))
+            if ts is None or (start is not None and ts < start) or (end is not None and ts >= end):
+                return None
+        if fields is not None:
+            return {f: row[f] for f in fields if f in row}
+        return row
+
+    def iter_rows(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        fields: list[str] | None = None,
+    ) -> Iterator[dict]:
+        """Rows in stored order, optionally within [start, end) and projected to fields."""
+        if (start is not None or end is not None) and not self.index["time_field"]:
+            raise ValueError(f"{self.path}: no time field; cannot filter by time")
+        for block in self._blocks_in_range(start, end):
+            for line in self._decode_block(block):
+                row = self._select(json.loads(line), start, end, fields)
+                if row is not None:
+                    yield row
+
+    def sample(
+        self,
+        n: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        fields: list[str] | None = None,
+    ) -> list[dict]:
+        """n evenly spaced rows (always including the first and last).
+
+        Without a time range, only blocks containing a chosen row are
+        decompressed and only the chosen lines are parsed.
+        """
+        if start is not None or end is not None:
+            rows = list(self.iter_rows(start, end, fields))
+            if n >= len(rows):
+                return rows
+            return [rows[i] for i in _spaced_indices(len(rows), n)]
+
+        total = len(self)
+        if n >= total:
+            return list(self.iter_rows(fields=fields))
+        wanted = _spaced_indices(total, n)
+        rows, i = [], 0
+        for block in self.index["blocks"]:
+            first, last = block["first_row"], block["first_row"] + block["rows"]
+            if i >= len(wanted) or wanted[i] >= last:
+                continue
+            lines = self._decode_block(block)
+            while i < len(wanted) and wanted[i] < last:
+                rows.append(self._select(json.loads(lines[wanted[i] - first]), None, None, fields))
+                i += 1
+        return rows
+
+    def document(self, rows: list[dict] | None = None):
+        """Rebuild the original document, with rows (default: all) in place of the records."""
+        if rows is None:
+            rows = list(self.iter_rows())
+        # Datasets written directly (no source document) are a plain list of rows.
+        doc_info = self.index.get("document") or {"path": []}
+        path = doc_info.get("path")
+        if path is None:
+            return rows[0] if rows else None
+        return _set_path(copy.deepcopy(doc_info.get("envelope")), tuple(path), rows)
+
+    def to_json(self, rows: list[dict] | None = None) -> str:
+        """The document as JSON text, formatted like the file it was converted from."""
+        fmt = (self.index.get("document") or {}).get("json_format") or {"indent": 2}
+        separators = fmt.get("separators")
+        text = json.dumps(
+            self.document(rows),
+            indent=fmt.get("indent"),
+            separators=tuple(separators) if separators else None,
+            ensure_ascii=False,
+        )
+        return text + ("\n" if fmt.get("trailing_newline") else "")
+
+
+def _spaced_indices(total: int, n: int) -> list[int]:
+    if n <= 1:
+        return [0][:n]
+    return sorted({round(i * (total - 1) / (n - 1)) for i in range(n)})
+
+
+def is_dataset(path: Path) -> bool:
+    return Path(path).name.endswith(DATASET_SUFFIX)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def _default_output(src: Path) -> Path:
+    stem = src.name
+    for suffix in (".json", ".ndjson", ".jsonl"):
+        if stem.endswith(suffix):
+            stem = stem[: -len(suffix)]
+            break
+    return src.with_name(stem + DATASET_SUFFIX)
+
+
+def _cmd_convert(args: argparse.Namespace) -> None:
+    options = {"block_rows": args.block_rows, "level": args.level, "time_field": args.time_field}
+    for src in map(Path, args.inputs):
+        dst = Path(args.output) if args.output else _default_output(src)
+        if src.suffix in (".ndjson", ".jsonl"):
+            index = convert_ndjson(src, dst, **options)
+        else:
+            index = convert_json(src, dst, **options)
+        size = dst.stat().st_size
+        src_size = src.stat().st_size
+        fmt = (index.get("document") or {}).get("json_format") or {}
+        note = "" if fmt.get("exact", True) else " (JSON formatting normalized)"
+        print(
+            f"{src} -> {dst}: {index['rows']:,} rows in {len(index['blocks'])} blocks, "
+            f"{src_size:,} -> {size:,} bytes ({src_size / max(size, 1):.1f}x){note}"
+        )
+
+
+def _cmd_info(args: argparse.Namespace) -> None:
+    with Dataset(Path(args.path)) as ds:
+        index = ds.index
+        doc = index.get("document") or {}
+        print(f"File:        {ds.path} ({ds.path.stat().st_size:,} bytes)")
+        print(f"Rows:        {index['rows']:,} ({index['raw_bytes']:,} bytes uncompressed)")
+        print(f"Blocks:      {len(index['blocks'])}")
+        print(f"Time field:  {index['time_field'] or '-'}")
+        timed = [b for b in index["blocks"] if "min_time" in b]
+        if timed:
+            first = min(timed, key=lambda b: parse_time(b["min_time"]))["min_time"]
+            last = max(timed, key=lambda b: parse_time(b["max_time"]))["max_time"]
+            print(f"Time range:  {first} -> {last}")
+        print(f"Records at:  {'/'.join(map(str, doc.get('path') or [])) or '(top level)'}")
+        print(f"Fields:      {', '.join(index['fields'])}")
+
+
+def _cmd_cat(args: argparse.Namespace) -> None:
+    start = parse_time(args.start) if args.start else None
+    end = parse_time(args.end) if args.end else None
+    fields = args.fields.split(",") if args.fields else None
+    with Dataset(Path(args.path)) as ds:
+        rows = ds.sample(args.sample, start, end, fields) if args.sample else ds.iter_rows(start, end, fields)
+        out = sys.stdout
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert, inspect and read dataset files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="Convert JSON / NDJSON files to datasets")
+    convert.add_argument("inputs", nargs="+", help="sample_data.json or .ndjson files")
+    convert.add_argument("-o", "--output", help=f"Output path (default: <input>{DATASET_SUFFIX})")
+    convert.add_argument("--block-rows", type=int, default=DEFAULT_BLOCK_ROWS)
+    convert.add_argument("--level", type=int, default=DEFAULT_LEVEL, help="zstd level")
+    convert.add_argument("--time-field", help="Timestamp field (default: auto-detect)")
+    convert.set_defaults(func=_cmd_convert)
+
+    info = sub.add_parser("info", help="Print a dataset's index summary")
+    info.add_argument("path")
+    info.set_defaults(func=_cmd_info)
+
+    cat = sub.add_parser("cat", help="Write rows as NDJSON to stdout")
+    cat.add_argument("path")
+    cat.add_argument("--start", help="Only rows at or after this time (ISO 8601)")
+    cat.add_argument("--end", help="Only rows before this time (ISO 8601)")
+    cat.add_argument("--fields", help="Comma-separated fields to keep")
+    cat.add_argument("--sample", type=int, help="Evenly sample this many rows")
+    cat.set_defaults(func=_cmd_cat)
+
+    args = parser.parse_args()
+    if getattr(args, "output", None) and len(getattr(args, "inputs", [])) > 1:
+        parser.error("--output only applies to a single input")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
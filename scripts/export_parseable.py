@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Export large volumes of Parseable data for experiments.
+
+Unlike export_parseable_data.sh (one query, LIMIT 200), this splits the
+window into time slices and fetches them in parallel with bounded
+concurrency through ParseableContext. Rows are streamed to disk as
+slices complete, in time order, so memory holds only the slices in
+flight:
+
+- NDJSON: one file, one JSON object per line
+- Parquet: a directory of part-NNNNN.parquet files, one per slice
+
+A slice that hits the page size is split in half (down to one second)
+and then paged with OFFSET, so dense periods are never truncated. Pages
+are ordered by p_timestamp and then by every scalar column, so rows with
+equal timestamps are neither skipped nor repeated between pages.
+
+Progress is checkpointed to <output>.checkpoint.json after every slice.
+Rerunning the same command resumes after the last finished slice, with
+the original absolute time window; a partially written slice is
+discarded first. The default output name depends only on the stream,
+window and format (exports/<stream>_last60m.ndjson,
+exports/<stream>_<start>_<end>.parquet), so a rerun finds its checkpoint.
+
+Usage:
+    python scripts/export_parseable.py --stream otel-logs --minutes 60
+    python scripts/export_parseable.py --stream otel-logs --start 2026-02-06T06:00:00Z \\
+        --end 2026-02-06T12:00:00Z --slice-minutes 2 --concurrency 8 --output data/otel.ndjson
+    python scripts/export_parseable.py --stream traces --minutes 30 --format parquet
+
+Environment variables:
+    PARSEABLE_URL   - Parseable base URL (default: http://localhost:8000)
+    PARSEABLE_AUTH  - user:password  (default: parseable:parseable)
+
+Requires:
+    pip install httpx
+    pip install pyarrow   # only for --format parquet
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "integration-patterns"))
+
+import httpx  # noqa: E402  (installed alongside parseable_context_builder)
+
+from parseable_context_builder import ParseableContext  # noqa: E402
+
+DEFAULT_SLICE_MINUTES = 5
+DEFAULT_CONCURRENCY = 4
+DEFAULT_PAGE_SIZE = 50_000
+MIN_SLICE_SECONDS = 1.0
+MAX_ATTEMPTS = 4
+
+
+# ---------------------------------------------------------------------------
+# Slicing and fetching
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class TimeSlice:
+    index: int
+    start: datetime
+    end: datetime
+
+
+def parse_time(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def make_slices(start: datetime, end: datetime, slice_minutes: float) -> list[TimeSlice]:
+    step = timedelta(minutes=slice_minutes)
+    slices = []
+    cursor = start
+    while cursor < end:
+        slices.append(TimeSlice(len(slices), cursor, min(cursor + step, end)))
+        cursor += step
+    return slices
+
+
+def _file_time(value: str) -> str:
+    return parse_time(value).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _sql_time(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class SliceFetcher:
+    """Fetches every row of a time slice, splitting or paging dense slices."""
+
+    def __init__(
+        self,
+        ctx: ParseableContext,
+        stream: str,
+        columns: str = "*",
+        where: str | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ):
+        self.ctx = ctx
+        self.stream = stream
+        self.columns = columns
+        self.where = where
+        self.page_size = page_size
+        self.queries = 0
+        self.splits = 0
+        self._lock = threading.Lock()
+
+    def _sql(
+        self, start: datetime, end: datetime, offset: int = 0, order: str = "p_timestamp ASC"
+    ) -> str:
+        sql = (
+            f'SELECT {self.columns} FROM "{self.stream}" '
+            f"WHERE p_timestamp >= '{_sql_time(start)}' AND p_timestamp < '{_sql_time(end)}' "
+        )
+        if self.where:
+            sql += f"AND ({self.where}) "
+        sql += f"ORDER BY {order} LIMIT {self.page_size}"
+        if offset:
+            sql += f" OFFSET {offset}"
+        return sql
+
+    @staticmethod
+    def _total_order(rows: list[dict]) -> str:
+        """ORDER BY p_timestamp, then every scalar column seen in rows.
+
+        Rows that still tie are identical in every sortable column, so which
+        one lands on which page doesn't change the output.
+        """
+        columns = {}
+        for row in rows:
+            for key, value in row.items():
+                scalar = value is None or isinstance(value, (str, int, float, bool))
+                if key != "p_timestamp" and scalar:
+                    columns.setdefault(key, None)
+        return ", ".join(["p_timestamp ASC"] + [f'"{column}" ASC' for column in columns])
+
+    def _query(
+        self, start: datetime, end: datetime, offset: int = 0, order: str = "p_timestamp ASC"
+    ) -> list[dict]:
+        # The API's startTime/endTime have second precision; widen them and
+        # let the WHERE clause apply the exact half-open bounds.
+        api_start = self.ctx.format_time(start.replace(microsecond=0))
+        api_end = self.ctx.format_time(end.replace(microsecond=0) + timedelta(seconds=1))
+        delay = 1.0
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                with self._lock:
+                    self.queries += 1
+                return self.ctx.query(self._sql(start, end, offset, order), api_start, api_end)
+            except httpx.HTTPStatusError as exc:
+                status = exc.response.status_code
+                if status != 429 and status < 500 or attempt == MAX_ATTEMPTS:
+                    raise
+            except httpx.TransportError:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+            time.sleep(delay)
+            delay *= 2
+        return []
+
+    def fetch(self, start: datetime, end: datetime) -> list[dict]:
+        rows = self._query(start, end)
+        if len(rows) < self.page_size:
+            return rows
+        if (end - start).total_seconds() > MIN_SLICE_SECONDS * 2:
+            with self._lock:
+                self.splits += 1
+            mid = start + (end - start) / 2
+            return self.fetch(start, mid) + self.fetch(mid, end)
+        # Too dense to split further: page through it in a total order
+        # (re-reading the first page, which was only ordered by time).
+        order = self._total_order(rows)
+        rows = self._query(start, end, 0, order)
+        offset = len(rows)
+        while True:
+            page = self._query(start, end, offset, order)
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            offset += len(page)
+
+
+# ---------------------------------------------------------------------------
+# Output sinks
+# ---------------------------------------------------------------------------
+
+
+class NdjsonSink:
+    """Appends rows to one NDJSON file; resumes by truncating to a byte offset."""
+
+    def __init__(self, path: Path, resume_bytes: int = 0):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "r+b" if path.exists() else "wb")
+        self._file.truncate(resume_bytes)
+        self._file.seek(resume_bytes)
+        self.bytes = resume_bytes
+
+    def write_slice(self, index: int, rows: list[dict]) -> int:
+        data = "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.bytes += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """Writes one Parquet part file per slice into a directory."""
+
+    def __init__(self, path: Path, resume_slice: int = 0, resume_bytes: int = 0):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet output: pip install pyarrow")
+        self._pa, self._pq = pa, pq
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        # Drop parts from slices after the checkpoint (written but not committed).
+        for part in path.glob("part-*.parquet"):
+            if int(part.stem.split("-")[1]) >= resume_slice:
+                part.unlink()
+        self.bytes = resume_bytes
+
+    def write_slice(self, index: int, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        table = self._pa.Table.from_pylist(rows)
+        part = self.path / f"part-{index:05d}.parquet"
+        tmp = part.with_suffix(".tmp")
+        self._pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, part)
+        size = part.stat().st_size
+        self.bytes += size
+        return size
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Checkpointing
+# ---------------------------------------------------------------------------
+
+
+class Checkpoint:
+    """Export progress: the next slice to write and totals so far."""
+
+    def __init__(self, path: Path, state: dict):
+        self.path = path
+        self.state = state
+
+    @classmethod
+    def load_or_create(cls, path: Path, params: dict) -> "Checkpoint":
+        if path.exists():
+            state = json.loads(path.read_text(encoding="utf-8"))
+            return cls(path, state)
+        return cls(path, {**params, "next_slice": 0, "rows": 0, "bytes": 0})
+
+    def advance(self, rows: int, nbytes: int) -> None:
+        self.state["next_slice"] += 1
+        self.state["rows"] += rows
+        self.state["bytes"] += nbytes
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+
+def _human_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def export(
+    fetcher: SliceFetcher,
+    slices: list[TimeSlice],
+    sink,
+    checkpoint: Checkpoint,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> dict:
+    """Fetch slices in parallel and write them to sink in time order.
+
+    At most 2 x concurrency slices are held in memory at once.
+    """
+    started = time.monotonic()
+    first = checkpoint.state["next_slice"]
+    rows_this_run = bytes_this_run = 0
+    total = len(slices)
+    lookahead = max(1, concurrency) * 2
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="export") as pool:
+        pending: dict[int, Future] = {}
+        queue = iter(slices[first:])
+
+        def refill() -> None:
+            while len(pending) < lookahead:
+                s = next(queue, None)
+                if s is None:
+                    return
+                pending[s.index] = pool.submit(fetcher.fetch, s.start, s.end)
+
+        refill()
+        for index in range(first, total):
+            rows = pending.pop(index).result()
+            nbytes = sink.write_slice(index, rows)
+            checkpoint.advance(len(rows), nbytes)
+            rows_this_run += len(rows)
+            bytes_this_run += nbytes
+            refill()
+
+            elapsed = max(time.monotonic() - started, 1e-6)
+            print(
+                f"  slice {index + 1}/{total} "
+                f"[{slices[index].start:%H:%M:%S}-{slices[index].end:%H:%M:%S}] "
+                f"{len(rows):>7,} rows | total {checkpoint.state['rows']:,} rows, "
+                f"{_human_bytes(checkpoint.state['bytes'])} | "
+                f"{rows_this_run / elapsed:,.0f} rows/s, {_human_bytes(bytes_this_run / elapsed)}/s",
+                flush=True,
+            )
+
+    elapsed = time.monotonic() - started
+    return {
+        "rows": checkpoint.state["rows"],
+        "bytes": checkpoint.state["bytes"],
+        "rows_this_run": rows_this_run,
+        "elapsed_seconds": round(elapsed, 2),
+        "rows_per_second": round(rows_this_run / elapsed, 1) if elapsed else 0.0,
+        "bytes_per_second": round(bytes_this_run / elapsed, 1) if elapsed else 0.0,
+        "queries": fetcher.queries,
+        "slice_splits": fetcher.splits,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export Parseable data in parallel time slices to NDJSON or Parquet.",
+    )
+    parser.add_argument("--stream", required=True, help="Log stream name")
+    window = parser.add_mutually_exclusive_group()
+    window.add_argument("--minutes", type=int, default=60, help="Look-back window (default: 60)")
+    window.add_argument("--start", type=str, help="Window start (ISO 8601, UTC if no offset)")
+    parser.add_argument("--end", type=str, help="Window end with --start (default: now)")
+    parser.add_argument(
+        "--slice-minutes",
+        type=float,
+        default=DEFAULT_SLICE_MINUTES,
+        help=f"Time slice size (default: {DEFAULT_SLICE_MINUTES})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Slices fetched in parallel (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f"Max rows per query before a slice is split (default: {DEFAULT_PAGE_SIZE:,})",
+    )
+    parser.add_argument("--columns", type=str, default="*", help="SELECT list (default: *)")
+    parser.add_argument("--where", type=str, help="Extra SQL filter, e.g. \"level = 'error'\"")
+    parser.add_argument("--format", choices=("ndjson", "parquet"), default="ndjson")
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Output file (ndjson) or directory (parquet) "
+        "(default: exports/<stream>_<window>.<format>)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore an existing checkpoint or finished output and export from scratch",
+    )
+    parser.add_argument("--timeout", type=int, default=120, help="Per-query timeout seconds")
+    args = parser.parse_args()
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        # Stable for a given command line, so a rerun finds its checkpoint.
+        if args.start:
+            end_name = _file_time(args.end) if args.end else "now"
+            window_name = f"{_file_time(args.start)}_{end_name}"
+        else:
+            window_name = f"last{args.minutes}m"
+        output = REPO_ROOT / "exports" / f"{args.stream}_{window_name}.{args.format}"
+    checkpoint_path = output.parent / f"{output.name}.checkpoint.json"
+    if args.restart and checkpoint_path.exists():
+        checkpoint_path.unlink()
+    elif output.exists() and not checkpoint_path.exists() and not args.restart:
+        print(f"Error: {output} is a finished export. Use --restart to overwrite it.")
+        sys.exit(1)
+
+    if args.start:
+        start = parse_time(args.start)
+        end = parse_time(args.end) if args.end else datetime.now(timezone.utc)
+    else:
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(minutes=args.minutes)
+
+    params = {
+        "stream": args.stream,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "slice_minutes": args.slice_minutes,
+        "format": args.format,
+        "columns": args.columns,
+        "where": args.where,
+    }
+    checkpoint = Checkpoint.load_or_create(checkpoint_path, params)
+    if checkpoint.state["next_slice"] or checkpoint_path.exists():
+        mismatched = [
+            k for k in ("stream", "format", "slice_minutes", "columns", "where")
+            if checkpoint.state.get(k) != params[k]
+        ]
+        if mismatched:
+            print(
+                f"Error: {checkpoint_path} is for a different export "
+                f"({', '.join(mismatched)} differ). Use --restart to discard it."
+            )
+            sys.exit(1)
+        # Resume over the original absolute window, not a new "last N minutes".
+        start = parse_time(checkpoint.state["start"])
+        end = parse_time(checkpoint.state["end"])
+        print(f"Resuming from slice {checkpoint.state['next_slice'] + 1} ({checkpoint_path.name})")
+
+    slices = make_slices(start, end, args.slice_minutes)
+    if args.format == "parquet":
+        try:
+            sink = ParquetSink(output, checkpoint.state["next_slice"], checkpoint.state["bytes"])
+        except ImportError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    else:
+        sink = NdjsonSink(output, checkpoint.state["bytes"])
+    ctx = ParseableContext(timeout=args.timeout)
+    fetcher = SliceFetcher(ctx, args.stream, args.columns, args.where, args.page_size)
+
+    print(f"Parseable URL:  {ctx.url}")
+    print(f"Stream:         {args.stream}")
+    print(f"Window:         {start.isoformat()} -> {end.isoformat()}")
+    print(f"Slices:         {len(slices)} x {args.slice_minutes:g} min, concurrency {args.concurrency}")
+    print(f"Output:         {output} ({args.format})")
+    print("")
+
+    try:
+        stats = export(fetcher, slices, sink, checkpoint, args.concurrency)
+    except httpx.HTTPError as exc:
+        print(f"\nError: export stopped: {exc}")
+        print(f"Progress is saved in {checkpoint_path}; rerun the same command to resume.")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Rerun the same command to resume from {checkpoint_path.name}.")
+        sys.exit(130)
+    finally:
+        sink.close()
+        ctx.close()
+
+    checkpoint_path.unlink(missing_ok=True)
+    print("")
+    print(f"Rows:          {stats['rows']:,}")
+    print(f"Size:          {_human_bytes(stats['bytes'])}")
+    print(f"Throughput:    {stats['rows_per_second']:,.0f} rows/s, "
+          f"{_human_bytes(stats['bytes_per_second'])}/s over {stats['elapsed_seconds']}s")
+    print(f"Queries:       {stats['queries']} ({stats['slice_splits']} dense-slice splits)")
+    print(f"Saved to:      {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@
 # Usage:
 #   ./scripts/export_parseable_data.sh --stream otel-logs --minutes 30
 #   ./scripts/export_parseable_data.sh --stream otel-logs --minutes 60 --limit 500 --output data/export.json
+#   ./scripts/export_parseable_data.sh --stream otel-logs --minutes 60 --limit 200 --stratified
 #
 # Environment variables:
 #   PARSEABLE_URL   - Parseable base URL (default: http://localhost:8000)
@@ -26,6 +27,8 @@ STREAM=""
 MINUTES=30
 LIMIT=200
 OUTPUT=""
+STRATIFIED=false
+PER_STRATUM=""
 
 # ---------------------------------------------------------------------------
 # Usage
@@ -41,6 +44,9 @@ Options:
   --minutes N       Look-back window in minutes (default: 30)
   --limit N         Maximum number of records (default: 200)
   --output FILE     Output file path (default: exports/<stream>_<timestamp>.json)
+  --stratified      Sample across level x service_name x minute instead of
+                    taking the first N records by time
+  --per-stratum N   With --stratified, max records from any one stratum
   -h, --help        Show this help message
 
 Environment:
@@ -50,6 +56,7 @@ Environment:
 Examples:
   $(basename "$0") --stream otel-logs --minutes 60
   $(basename "$0") --stream otel-logs --minutes 15 --limit 500 --output my_export.json
+  $(basename "$0") --stream otel-logs --minutes 60 --limit 200 --stratified --per-stratum 5
 EOF
     exit 0
 }
@@ -67,6 +74,10 @@ while [[ $# -gt 0 ]]; do
             LIMIT="$2"; shift 2 ;;
         --output)
             OUTPUT="$2"; shift 2 ;;
+        --stratified)
+            STRATIFIED=true; shift ;;
+        --per-stratum)
+            PER_STRATUM="$2"; shift 2 ;;
         -h|--help)
             usage ;;
         *)
@@ -100,12 +111,38 @@ mkdir -p "$(dirname "$OUTPUT")"
 # ---------------------------------------------------------------------------
 # Build SQL query (PostgreSQL-compatible)
 # ---------------------------------------------------------------------------
-SQL="SELECT * FROM \"${STREAM}\" WHERE p_timestamp > NOW() - INTERVAL '${MINUTES} minutes' ORDER BY p_timestamp ASC LIMIT ${LIMIT}"
+WHERE="p_timestamp > NOW() - INTERVAL '${MINUTES} minutes'"
+if [[ "$STRATIFIED" == true ]]; then
+    # Number rows within each level x service x minute stratum, then take
+    # row 1 of every stratum, row 2, ... up to the limit (same as
+    # integration-patterns/log_sampling.py). When a layer has more strata
+    # than rows left, each level x service first gets its busiest minute,
+    # then its next busiest, with a stable hash breaking ties, so the
+    # sample spreads across the window instead of the oldest minutes.
+    PARTITION="level, service_name, date_trunc('minute', p_timestamp)"
+    STRATUM_HASH="md5(concat_ws('|', CAST(level AS VARCHAR), CAST(service_name AS VARCHAR), CAST(_bucket AS VARCHAR)))"
+    CAP="${PER_STRATUM:-$LIMIT}"
+    # The outer query selects the stream's own columns so the helper
+    # columns (_bucket, _rn, _stratum_rows, _spread) don't end up in the export.
+    COLUMNS=$(curl -sf -u "${PARSEABLE_AUTH}" "${PARSEABLE_URL}/api/v1/logstream/${STREAM}/schema" \
+        | python3 -c 'import json, sys; print(", ".join("\"%s\"" % f["name"] for f in json.load(sys.stdin)["fields"]))' \
+        2>/dev/null) || COLUMNS=""
+    if [[ -z "$COLUMNS" ]]; then
+        echo "Error: could not read the schema of stream '${STREAM}' (needed for --stratified)."
+        exit 1
+    fi
+    SQL="SELECT ${COLUMNS} FROM (SELECT *, DENSE_RANK() OVER (PARTITION BY level, service_name ORDER BY _stratum_rows DESC, ${STRATUM_HASH}) AS _spread FROM (SELECT *, date_trunc('minute', p_timestamp) AS _bucket, ROW_NUMBER() OVER (PARTITION BY ${PARTITION} ORDER BY p_timestamp ASC) AS _rn, COUNT(*) OVER (PARTITION BY ${PARTITION}) AS _stratum_rows FROM \"${STREAM}\" WHERE ${WHERE}) WHERE _rn <= ${CAP} ORDER BY _rn ASC, _spread ASC, _stratum_rows DESC, ${STRATUM_HASH} LIMIT ${LIMIT}) ORDER BY p_timestamp ASC"
+else
+    SQL="SELECT * FROM \"${STREAM}\" WHERE ${WHERE} ORDER BY p_timestamp ASC LIMIT ${LIMIT}"
+fi
+# Escape double quotes for the JSON request body
+SQL_JSON="${SQL//\"/\\\"}"
 
 echo "Parseable URL:  $PARSEABLE_URL"
 echo "Stream:         $STREAM"
 echo "Look-back:      ${MINUTES} minutes"
 echo "Limit:          $LIMIT"
+echo "Sampling:       $([[ "$STRATIFIED" == true ]] && echo "stratified (level x service_name x minute)" || echo "first $LIMIT by time")"
 echo "Query:          $SQL"
 echo ""
 
@@ -116,7 +153,7 @@ HTTP_CODE=$(curl -s -o "$OUTPUT" -w "%{http_code}" \
     -X POST "${PARSEABLE_URL}/api/v1/query" \
     -u "${PARSEABLE_AUTH}" \
     -H "Content-Type: application/json" \
-    -d "{\"query\": \"${SQL}\", \"startTime\": \"$(date -u -v-${MINUTES}M +"%Y-%m-%dT%H:%M:%S+00:00" 2>/dev/null || date -u -d "${MINUTES} minutes ago" +"%Y-%m-%dT%H:%M:%S+00:00")\", \"endTime\": \"$(date -u +"%Y-%m-%dT%H:%M:%S+00:00")\"}")
+    -d "{\"query\": \"${SQL_JSON}\", \"startTime\": \"$(date -u -v-${MINUTES}M +"%Y-%m-%dT%H:%M:%S+00:00" 2>/dev/null || date -u -d "${MINUTES} minutes ago" +"%Y-%m-%dT%H:%M:%S+00:00")\", \"endTime\": \"$(date -u +"%Y-%m-%dT%H:%M:%S+00:00")\"}")
 
 echo "HTTP status: $HTTP_CODE"
 
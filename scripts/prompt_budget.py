@@ -0,0 +1,224 @@
+"""
+Prompt-size preflight and structure-aware downsampling of sample data.
+
+run_experiment.py pastes sample_data.json into the prompt verbatim. This
+module estimates the prompt's token count locally before anything is
+sent and, when it exceeds a budget, shrinks the sample data in stages
+that keep its structure intact, stopping as soon as the prompt fits:
+
+1. strip null / empty fields
+2. collapse schema field lists ({"name", "data_type", ...} objects) into
+   a compact name -> type mapping
+3. sample long arrays to the largest size that fits (evenly spaced, keeping first and last items and
+   every distinct level / status value that was present)
+4. truncate very long string values
+
+The token estimate is a character-count heuristic tuned to be slightly
+pessimistic for JSON; it needs no network call or tokenizer.
+"""
+
+import json
+import math
+
+# JSON-heavy prompts run ~3-3.5 characters per token; err on the high side.
+CHARS_PER_TOKEN = 3.2
+DEFAULT_TOKEN_BUDGET = 150_000
+MIN_ARRAY_ITEMS = 5
+MAX_STRING_CHARS = 400
+
+# Fields whose distinct values should survive array sampling.
+_STRATIFY_KEYS = ("level", "severity_text", "span_status_code", "status", "severity")
+_SCHEMA_TYPE_KEYS = ("data_type", "type")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def strip_empty(value):
+    """Recursively drop null, empty-string and empty-container fields."""
+    if isinstance(value, dict):
+        stripped = {k: strip_empty(v) for k, v in value.items()}
+        return {k: v for k, v in stripped.items() if not _is_empty(v)}
+    if isinstance(value, list):
+        return [strip_empty(v) for v in value]
+    return value
+
+
+def _is_schema_list(value) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) > 1
+        and all(
+            isinstance(f, dict)
+            and "name" in f
+            and any(k in f for k in _SCHEMA_TYPE_KEYS)
+            for f in value
+        )
+    )
+
+
+def collapse_schemas(value):
+    """Replace lists of schema field descriptors with {name: type} mappings."""
+    if _is_schema_list(value):
+        collapsed = {}
+        for f in value:
+            type_key = next(k for k in _SCHEMA_TYPE_KEYS if k in f)
+            collapsed[str(f["name"])] = str(f[type_key]) + ("?" if f.get("nullable") else "")
+        return collapsed
+    if isinstance(value, dict):
+        return {k: collapse_schemas(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [collapse_schemas(v) for v in value]
+    return value
+
+
+def _sample_indices(items: list, limit: int) -> list[int]:
+    n = len(items)
+    # One example of every distinct level/status first, so rare errors survive.
+    keep: set[int] = set()
+    seen = set()
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            marker = tuple(item.get(k) for k in _STRATIFY_KEYS)
+            if marker not in seen and len(keep) < limit:
+                seen.add(marker)
+                keep.add(i)
+    # Then the first, last and evenly spaced items up to the limit.
+    for i in [0, n - 1] + [int(j * n / limit) for j in range(limit)]:
+        if len(keep) >= limit:
+            break
+        keep.add(i)
+    return sorted(keep)
+
+
+def sample_arrays(value, limit: int):
+    """Evenly sample every array longer than limit; returns (value, arrays_sampled)."""
+    sampled = 0
+
+    def walk(v):
+        nonlocal sampled
+        if isinstance(v, dict):
+            return {k: walk(x) for k, x in v.items()}
+        if isinstance(v, list):
+            items = [walk(x) for x in v]
+            if len(items) > limit:
+                sampled += 1
+                return [items[i] for i in _sample_indices(items, limit)]
+            return items
+        return v
+
+    return walk(value), sampled
+
+
+def truncate_strings(value, max_chars: int = MAX_STRING_CHARS):
+    if isinstance(value, dict):
+        return {k: truncate_strings(v, max_chars) for k, v in value.items()}
+    if isinstance(value, list):
+        return [truncate_strings(v, max_chars) for v in value]
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + f"...[{len(value) - max_chars} chars truncated]"
+    return value
+
+
+def _largest_array(value) -> int:
+    if isinstance(value, dict):
+        return max((_largest_array(v) for v in value.values()), default=0)
+    if isinstance(value, list):
+        return max([len(value)] + [_largest_array(v) for v in value])
+    return 0
+
+
+def reduce_sample_data(
+    sample_data: str,
+    fits,
+) -> tuple[str, list[str]]:
+    """Apply reduction stages until fits(candidate_json) is true.
+
+    Returns (reduced_json, steps_applied). Non-JSON sample data is returned
+    unchanged. The result may still not fit if every stage is exhausted.
+    """
+    try:
+        data = json.loads(sample_data)
+    except ValueError:
+        return sample_data, []
+
+    steps: list[str] = []
+
+    def render(value) -> str:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+    for name, stage in (
+        ("stripped null/empty fields", strip_empty),
+        ("collapsed schema field lists", collapse_schemas),
+    ):
+        reduced = stage(data)
+        if reduced != data:
+            data = reduced
+            steps.append(name)
+            if fits(render(data)):
+                return render(data), steps
+
+    # Largest per-array item limit that fits, by binary search.
+    largest = _largest_array(data)
+    if largest > MIN_ARRAY_ITEMS:
+        lo, hi, best = MIN_ARRAY_ITEMS, largest - 1, None
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            candidate, _ = sample_arrays(data, mid)
+            if fits(render(candidate)):
+                best, lo = candidate, mid + 1
+            else:
+                hi = mid - 1
+        if best is not None:
+            steps.append(f"sampled arrays to <= {hi} items")
+            return render(best), steps
+        data, _ = sample_arrays(data, MIN_ARRAY_ITEMS)
+        steps.append(f"sampled arrays to <= {MIN_ARRAY_ITEMS} items")
+
+    reduced = truncate_strings(data)
+    if reduced != data:
+        data = reduced
+        steps.append(f"truncated strings over {MAX_STRING_CHARS} chars")
+    return render(data), steps
+
+
+def preflight(prompt_text: str, sample_data: str | None, build, token_budget: int) -> tuple[str, dict]:
+    """Estimate the prompt size and downsample sample data if over budget.
+
+    build(prompt_text, sample_data) must return the final user message.
+    Returns (user_message, report); the report records original and
+    reduced sizes for metadata.
+    """
+    message = build(prompt_text, sample_data)
+    report = {
+        "prompt_chars": len(message),
+        "prompt_tokens_est": estimate_tokens(message),
+    }
+    if sample_data is None or token_budget <= 0 or report["prompt_tokens_est"] <= token_budget:
+        return message, report
+
+    reduced, steps = reduce_sample_data(
+        sample_data,
+        lambda candidate: estimate_tokens(build(prompt_text, candidate)) <= token_budget,
+    )
+    reduced_message = build(prompt_text, reduced)
+    if steps:
+        reduced_message += (
+            "\n\nNote: the sample data above was reduced to fit the prompt budget ("
+            + "; ".join(steps)
+            + ")."
+        )
+    report.update({
+        "token_budget": token_budget,
+        "original_prompt_chars": report.pop("prompt_chars"),
+        "original_prompt_tokens_est": report.pop("prompt_tokens_est"),
+        "prompt_chars": len(reduced_message),
+        "prompt_tokens_est": estimate_tokens(reduced_message),
+        "reductions": steps,
+    })
+    return reduced_message, report
@@ -0,0 +1,118 @@
+"""
+Content-addressed cache of Claude responses for run_experiment.py.
+
+Entries are keyed by a hash of the request that determines the answer
+(model, max_tokens and the final user message), so rerunning after
+editing one prompt only sends that prompt; the unchanged experiments are
+served from disk along with their original token usage.
+
+Repeated runs (--repeat) add the run index to the key: each repeat is
+cached separately rather than all repeats returning the first answer.
+
+Layout:
+    results/.cache/<key[:2]>/<key>.json   {"key", "created_at", "response"}
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from anthropic.types import Message
+
+
+def cache_key(params: dict, run_index: int | None = None) -> str:
+    """sha256 over the fields that determine the response."""
+    material = {
+        "model": params["model"],
+        "max_tokens": params["max_tokens"],
+        "messages": params["messages"],
+    }
+    if run_index is not None:
+        material["run_index"] = run_index
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk response cache.
+
+    read=False skips lookups (--refresh); write=False skips stores. Use
+    both False for --no-cache.
+    """
+
+    def __init__(self, root: Path, read: bool = True, write: bool = True):
+        self.root = root
+        self.read = read
+        self.write = write
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def contains(self, key: str) -> bool:
+        """Whether a readable entry exists, without loading it (for --dry-run)."""
+        return self.read and self._path(key).exists()
+
+    def get(self, key: str) -> Message | None:
+        if not self.read:
+            return None
+        from anthropic.types import Message
+
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            message = Message.model_validate(entry["response"])
+        except (OSError, ValueError, KeyError):
+            message = None
+        with self._lock:
+            if message is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return message
+
+    def put(self, key: str, message: Message) -> None:
+        if not self.write:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "key": key,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": message.model_dump(mode="json"),
+        }
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entry) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def find_identical_response(
+    result_dir: Path,
+    text: str,
+    exclude: Path | None = None,
+) -> Path | None:
+    """An existing response_*.md in result_dir with exactly this content, if any."""
+    if not result_dir.is_dir():
+        return None
+    digest = content_hash(text)
+    size = len(text.encode("utf-8"))
+    for path in sorted(result_dir.glob("response_*.md")):
+        if path == exclude:
+            continue
+        # Size check first so most files are never read.
+        if path.stat().st_size == size and content_hash(path.read_text(encoding="utf-8")) == digest:
+            return path
+    return None
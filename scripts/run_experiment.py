@@ -2,34 +2,58 @@
 """
 Run Claude experiments against Parseable observability data.
 
-Reads prompt.md and sample_data.json from an experiment directory,
+Reads prompt.md and sample_data.json (or a compressed
+sample_data.ndjson.zst dataset) from an experiment directory,
 sends the combined prompt to the Claude API, saves the response,
-and prints token usage with estimated cost.
+and prints token usage with estimated cost. Responses are cached by
+request content, so rerunning only calls the API for prompts that changed.
 
 Usage:
     python scripts/run_experiment.py --experiment 02-log-analysis
     python scripts/run_experiment.py --all
     python scripts/run_experiment.py --experiment 02-log-analysis --model claude-sonnet-4-5-20250929
+    python scripts/run_experiment.py --all --parallel 4
+    python scripts/run_experiment.py --experiment 04-alert-correlation --repeat 5 --parallel 5
+    python scripts/run_experiment.py --all --model claude-opus-4-6,claude-sonnet-4-5-20250929 --repeat 3 --batch
+    python scripts/run_experiment.py --resume-batches
+    python scripts/run_experiment.py --all --refresh
+    python scripts/run_experiment.py --experiment 05-incident-rca --stream
+    python scripts/run_experiment.py --all --dry-run
+    python scripts/run_experiment.py --serve &      # resident daemon; later runs reuse it
+
+The anthropic SDK is imported only when a request is actually sent, so
+--help and --dry-run start quickly. While a daemon started with --serve
+is listening on .state/run_experiment.sock (RUN_EXPERIMENT_SOCKET),
+invocations are forwarded to it and reuse its warm client and
+connections; --no-daemon runs in-process regardless.
 
 Requires:
     pip install anthropic
     export ANTHROPIC_API_KEY=sk-ant-...
 """
 
+from __future__ import annotations
+
 import argparse
+import hashlib
 import json
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from api_throttle import AdaptiveThrottle, call_with_retry
+from batch_runner import BATCH_DISCOUNT, collect_results, pending_sweeps, submit_sweep, wait_for_batch
+from prompt_budget import CHARS_PER_TOKEN, DEFAULT_TOKEN_BUDGET, preflight
+from response_cache import ResponseCache, cache_key, content_hash, find_identical_response
+from stream_metrics import StreamTimer
 
-try:
+if TYPE_CHECKING:
     import anthropic
-except ImportError:
-    print("Error: anthropic package not installed.")
-    print("Install it with: pip install anthropic")
-    sys.exit(1)
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -39,6 +63,21 @@ DEFAULT_MODEL = "claude-opus-4-6"
 REPO_ROOT = Path(__file__).resolve().parent.parent
 EXPERIMENTS_DIR = REPO_ROOT / "experiments"
 RESULTS_DIR = REPO_ROOT / "results"
+BATCH_STATE_DIR = RESULTS_DIR / ".batches"
+CACHE_DIR = RESULTS_DIR / ".cache"
+MAX_TOKENS = 4096
+CONTEXT_WINDOW_TOKENS = 200_000
+DAEMON_SOCKET = os.environ.get(
+    "RUN_EXPERIMENT_SOCKET", str(REPO_ROOT / ".state" / "run_experiment.sock")
+)
+# Compressed dataset alternative to sample_data.json (see scripts/dataset.py).
+SAMPLE_DATASET = "sample_data.ndjson.zst"
+
+# Serializes multi-line console output when experiments run concurrently.
+_print_lock = threading.Lock()
+
+# Reused across invocations when running as a resident daemon.
+_clients: dict[str, anthropic.Anthropic] = {}
 
 # Approximate pricing per 1M tokens (USD) -- update as pricing changes
 MODEL_PRICING = {
@@ -56,6 +95,26 @@ def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
     return input_cost + output_cost
 
 
+def _anthropic():
+    """Import the SDK on first use so --help and --dry-run never load it."""
+    try:
+        import anthropic
+    except ImportError:
+        print("Error: anthropic package not installed.")
+        print("Install it with: pip install anthropic")
+        sys.exit(1)
+    return anthropic
+
+
+def get_client(api_key: str) -> anthropic.Anthropic:
+    """Process-wide client per API key, so a daemon keeps its connection pool warm."""
+    client = _clients.get(api_key)
+    if client is None:
+        # Retries are handled by api_throttle so they can respect rate-limit headers.
+        client = _clients[api_key] = _anthropic().Anthropic(api_key=api_key, max_retries=0)
+    return client
+
+
 def discover_experiments() -> list[str]:
     """Return sorted list of experiment directory names that contain prompt.md."""
     experiments = []
@@ -67,8 +126,30 @@ def discover_experiments() -> list[str]:
     return experiments
 
 
-def load_experiment(name: str) -> tuple[str, str | None]:
-    """Load prompt.md and optional sample_data.json for an experiment.
+def load_sample_dataset(path: Path, max_chars: int | None = None) -> str:
+    """Sample data from a dataset file, rebuilt as the original JSON document.
+
+    If the rows exceed max_chars, only an evenly spaced subset of about
+    that size is decompressed; preflight() trims further if needed.
+    """
+    try:
+        from dataset import Dataset
+    except ImportError as e:
+        print(f"Error: cannot read {path.name}: {e}")
+        sys.exit(1)
+    with Dataset(path) as ds:
+        rows = None
+        if max_chars and ds.raw_bytes > max_chars:
+            rows = ds.sample(max(1, len(ds) * max_chars // ds.raw_bytes))
+        return ds.to_json(rows)
+
+
+def load_experiment(name: str, max_sample_chars: int | None = None) -> tuple[str, str | None]:
+    """Load prompt.md and optional sample data for an experiment.
+
+    Sample data comes from sample_data.json, or from sample_data.ndjson.zst
+    when there is no JSON file; max_sample_chars caps how much of a
+    dataset file is read.
 
     Returns (prompt_text, sample_data_json_string_or_None).
     """
@@ -88,6 +169,8 @@ def load_experiment(name: str) -> tuple[str, str | None]:
     sample_data_path = exp_dir / "sample_data.json"
     if sample_data_path.exists():
         sample_data = sample_data_path.read_text(encoding="utf-8")
+    elif (exp_dir / SAMPLE_DATASET).exists():
+        sample_data = load_sample_dataset(exp_dir / SAMPLE_DATASET, max_sample_chars)
 
     return prompt_text, sample_data
 
@@ -105,30 +188,88 @@ def build_user_message(prompt_text: str, sample_data: str | None) -> str:
         return f"{prompt_text}\n\n## Data\n\n```json\n{sample_data}\n```"
 
 
-def run_experiment(
+def _print_block(lines: list[str]) -> None:
+    with _print_lock:
+        print("\n".join(lines), flush=True)
+
+
+def build_request(
     name: str,
     model: str,
-    client: anthropic.Anthropic,
-) -> dict:
-    """Run a single experiment and return the result metadata."""
-    print(f"\n{'='*60}")
-    print(f"  Experiment: {name}")
-    print(f"  Model:      {model}")
-    print(f"{'='*60}")
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> tuple[dict, dict]:
+    """Messages API parameters for one experiment run, plus the preflight report.
+
+    Sample data is downsampled when the estimated prompt exceeds
+    token_budget (0 disables reduction).
+    """
+    # Read at most ~2x the budget from dataset files; preflight does the exact fit.
+    max_sample_chars = int(token_budget * CHARS_PER_TOKEN * 2) if token_budget > 0 else None
+    prompt_text, sample_data = load_experiment(name, max_sample_chars)
+    user_message, report = preflight(prompt_text, sample_data, build_user_message, token_budget)
+    report["prompt_sha256"] = content_hash(user_message)
+    params = {
+        "model": model,
+        "max_tokens": MAX_TOKENS,
+        "messages": [{"role": "user", "content": user_message}],
+    }
+    return params, report
+
+
+def preflight_lines(report: dict) -> list[str]:
+    """Console lines describing prompt size, reductions and context-length risk."""
+    lines = [
+        f"  Prompt length: {report['prompt_chars']:,} characters "
+        f"(~{report['prompt_tokens_est']:,} tokens)"
+    ]
+    if report.get("reductions"):
+        lines.append(
+            f"  Reduced from ~{report['original_prompt_tokens_est']:,} tokens to fit the "
+            f"{report['token_budget']:,}-token budget: {'; '.join(report['reductions'])}"
+        )
+    if report.get("token_budget") and report["prompt_tokens_est"] > report["token_budget"]:
+        lines.append("  Warning: prompt is still over the token budget after reduction")
+    if report["prompt_tokens_est"] + MAX_TOKENS > CONTEXT_WINDOW_TOKENS:
+        lines.append(
+            f"  Warning: ~{report['prompt_tokens_est']:,} prompt tokens + {MAX_TOKENS:,} output "
+            f"may exceed the {CONTEXT_WINDOW_TOKENS:,}-token context window"
+        )
+    return lines
+
+
+def _reserve_result_stem(result_dir: Path, stem: str) -> str:
+    """Claim a metadata file name, adding -2, -3, ... if a run already used it."""
+    result_dir.mkdir(parents=True, exist_ok=True)
+    candidate, n = stem, 1
+    while True:
+        try:
+            (result_dir / f"metadata_{candidate}.json").open("x").close()
+            return candidate
+        except FileExistsError:
+            n += 1
+            candidate = f"{stem}-{n}"
 
-    prompt_text, sample_data = load_experiment(name)
-    user_message = build_user_message(prompt_text, sample_data)
 
-    print(f"  Prompt length: {len(user_message):,} characters")
-    print("  Sending to Claude API...")
+def save_result(
+    name: str,
+    model: str,
+    response,
+    elapsed: float | None,
+    run_index: int | None = None,
+    attempts: int = 1,
+    extra: dict | None = None,
+    cost_factor: float = 1.0,
+    cached: bool = False,
+    stem: str | None = None,
+) -> dict:
+    """Write a response and its metadata under results/<name>/ and print a summary.
 
-    start = time.time()
-    response = client.messages.create(
-        model=model,
-        max_tokens=4096,
-        messages=[{"role": "user", "content": user_message}],
-    )
-    elapsed = time.time() - start
+    Response files are deduplicated by content: if an identical response
+    is already stored, metadata points at it instead of writing a copy,
+    and a cache hit that is already on disk writes nothing at all. stem
+    names a response file that was already written while streaming.
+    """
+    label = name if run_index is None else f"{name} (run {run_index})"
 
     # Extract response text
     response_text = ""
@@ -138,25 +279,15 @@ def run_experiment(
 
     input_tokens = response.usage.input_tokens
     output_tokens = response.usage.output_tokens
-    cost = estimate_cost(model, input_tokens, output_tokens)
-
-    # Print summary
-    print(f"\n  Response received in {elapsed:.1f}s")
-    print(f"  Input tokens:  {input_tokens:>8,}")
-    print(f"  Output tokens: {output_tokens:>8,}")
-    print(f"  Total tokens:  {input_tokens + output_tokens:>8,}")
-    print(f"  Estimated cost: ${cost:.4f}")
+    cost = 0.0 if cached else estimate_cost(model, input_tokens, output_tokens) * cost_factor
 
     # Save results
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    suffix = "" if run_index is None else f"_r{run_index}"
     result_dir = RESULTS_DIR / name
-    result_dir.mkdir(parents=True, exist_ok=True)
+    streamed_file = result_dir / f"response_{stem}.md" if stem else None
+    existing = find_identical_response(result_dir, response_text, exclude=streamed_file)
 
-    result_file = result_dir / f"response_{timestamp}.md"
-    result_file.write_text(response_text, encoding="utf-8")
-    print(f"  Saved to: {result_file.relative_to(REPO_ROOT)}")
-
-    # Also save metadata alongside
     metadata = {
         "experiment": name,
         "model": model,
@@ -164,20 +295,455 @@ def run_experiment(
         "input_tokens": input_tokens,
         "output_tokens": output_tokens,
         "estimated_cost_usd": round(cost, 6),
-        "elapsed_seconds": round(elapsed, 2),
         "stop_reason": response.stop_reason,
+        "response_sha256": content_hash(response_text),
     }
-    meta_file = result_dir / f"metadata_{timestamp}.json"
+    if elapsed is not None and not cached:
+        metadata["elapsed_seconds"] = round(elapsed, 2)
+    if run_index is not None:
+        metadata["run_index"] = run_index
+    if attempts > 1:
+        metadata["attempts"] = attempts
+    if cached:
+        metadata["cached"] = True
+    metadata.update(extra or {})
+
+    if cached and existing is not None:
+        metadata["response_file"] = existing.name
+        _print_block([
+            f"\n  [{label}] Unchanged, served from cache ({model})",
+            f"  Response: {existing.relative_to(REPO_ROOT)}",
+        ])
+        return metadata
+
+    if stem is None:
+        stem = _reserve_result_stem(result_dir, f"{timestamp}{suffix}")
+    if existing is not None:
+        result_file = existing
+        if streamed_file is not None:
+            streamed_file.unlink(missing_ok=True)
+    elif streamed_file is not None:
+        result_file = streamed_file
+    else:
+        result_file = result_dir / f"response_{stem}.md"
+        result_file.write_text(response_text, encoding="utf-8")
+    metadata["response_file"] = result_file.name
+
+    # Print summary
+    if cached:
+        heading = f"\n  [{label}] Served from cache ({model})"
+    elif metadata.get("ttft_seconds") is not None:
+        heading = (
+            f"\n  [{label}] Streamed in {elapsed:.1f}s "
+            f"(first token {metadata['ttft_seconds']:.2f}s"
+            + (
+                f", {metadata['output_tokens_per_second']:.0f} tok/s)"
+                if metadata.get("output_tokens_per_second")
+                else ")"
+            )
+        )
+    elif elapsed is None:
+        heading = f"\n  [{label}] Batch result ({model})"
+    else:
+        heading = f"\n  [{label}] Response received in {elapsed:.1f}s" + (
+            f" after {attempts} attempts" if attempts > 1 else ""
+        )
+    _print_block([
+        heading,
+        f"  Input tokens:  {input_tokens:>8,}",
+        f"  Output tokens: {output_tokens:>8,}",
+        f"  Total tokens:  {input_tokens + output_tokens:>8,}",
+        f"  Estimated cost: ${cost:.4f}",
+        f"  Saved to: {result_file.relative_to(REPO_ROOT)}"
+        + (" (identical to an earlier response)" if existing else ""),
+    ])
+
+    # Also save metadata alongside
+    meta_file = result_dir / f"metadata_{stem}.json"
     meta_file.write_text(json.dumps(metadata, indent=2) + "\n", encoding="utf-8")
 
     return metadata
 
 
-def main() -> None:
+class _StreamedResponse:
+    """Adapts a finished stream to the raw-response shape call_with_retry expects."""
+
+    def __init__(self, headers, message):
+        self.headers = headers
+        self._message = message
+
+    def parse(self):
+        return self._message
+
+
+def stream_response(
+    client: anthropic.Anthropic,
+    request: dict,
+    result_file: Path,
+    timer_box: dict,
+    throttle: AdaptiveThrottle | None = None,
+):
+    """Stream a response into result_file as text arrives; returns (message, attempts).
+
+    The file is flushed per chunk so partial output survives an
+    interruption. The StreamTimer for the final attempt is left in
+    timer_box["timer"].
+    """
+    def send() -> _StreamedResponse:
+        timer = timer_box["timer"] = StreamTimer()
+        with client.messages.stream(**request) as stream, result_file.open(
+            "w", encoding="utf-8"
+        ) as out:
+            for text in stream.text_stream:
+                timer.chunk()
+                out.write(text)
+                out.flush()
+            message = stream.get_final_message()
+        return _StreamedResponse(stream.response.headers, message)
+
+    if throttle is None:
+        return send().parse(), 1
+    return call_with_retry(send, throttle)
+
+
+def run_experiment(
+    name: str,
+    model: str,
+    client: anthropic.Anthropic,
+    throttle: AdaptiveThrottle | None = None,
+    run_index: int | None = None,
+    cache: ResponseCache | None = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    extra_metadata: dict | None = None,
+    stream: bool = False,
+) -> dict:
+    """Run a single experiment and return the result metadata.
+
+    With a throttle, the request goes through adaptive concurrency control
+    and 429/529 responses are retried with backoff. run_index tags repeated
+    runs of the same experiment so their result files don't collide. With
+    a cache, an unchanged request is answered from disk without an API call.
+    extra_metadata is merged into the saved metadata (e.g. a benchmark revision).
+    With stream, the response is written to its results file as it arrives
+    and time-to-first-token / inter-chunk latency are recorded.
+    """
+    label = name if run_index is None else f"{name} (run {run_index})"
+    request, report = build_request(name, model, token_budget)
+    report.update(extra_metadata or {})
+    key = cache_key(request, run_index)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return save_result(name, model, cached, None, run_index, extra=report, cached=True)
+
+    _print_block([
+        f"\n{'='*60}",
+        f"  Experiment: {label}",
+        f"  Model:      {model}",
+        f"{'='*60}",
+        *preflight_lines(report),
+        "  Sending to Claude API...",
+    ])
+
+    if stream:
+        return _run_streaming(name, model, client, request, report, key, throttle, run_index, cache)
+
+    start = time.time()
+    if throttle is None:
+        response = client.messages.create(**request)
+        attempts = 1
+    else:
+        response, attempts = call_with_retry(
+            lambda: client.messages.with_raw_response.create(**request),
+            throttle,
+        )
+    elapsed = time.time() - start
+
+    if cache is not None:
+        cache.put(key, response)
+    return save_result(name, model, response, elapsed, run_index, attempts, extra=report)
+
+
+def _run_streaming(
+    name: str,
+    model: str,
+    client: anthropic.Anthropic,
+    request: dict,
+    report: dict,
+    key: str,
+    throttle: AdaptiveThrottle | None,
+    run_index: int | None,
+    cache: ResponseCache | None,
+) -> dict:
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    suffix = "" if run_index is None else f"_r{run_index}"
+    result_dir = RESULTS_DIR / name
+    stem = _reserve_result_stem(result_dir, f"{timestamp}{suffix}")
+    result_file = result_dir / f"response_{stem}.md"
+    timer_box: dict = {}
+
+    start = time.time()
+    try:
+        response, attempts = stream_response(client, request, result_file, timer_box, throttle)
+    except BaseException as e:
+        # Keep what arrived and say why it stopped.
+        timer = timer_box.get("timer")
+        partial = {
+            "experiment": name,
+            "model": model,
+            "timestamp": timestamp,
+            "interrupted": True,
+            "error": f"{e.__class__.__name__}: {e}",
+            "elapsed_seconds": round(time.time() - start, 2),
+            "response_file": result_file.name,
+            **(timer.metrics() if timer else {}),
+            **report,
+        }
+        if run_index is not None:
+            partial["run_index"] = run_index
+        (result_dir / f"metadata_{stem}.json").write_text(
+            json.dumps(partial, indent=2) + "\n", encoding="utf-8"
+        )
+        raise
+    elapsed = time.time() - start
+
+    if cache is not None:
+        cache.put(key, response)
+    report = {**report, **timer_box["timer"].metrics(response.usage.output_tokens)}
+    return save_result(
+        name, model, response, elapsed, run_index, attempts, extra=report, stem=stem
+    )
+
+
+def run_many(
+    jobs: list[tuple[str, str, int | None]],
+    client: anthropic.Anthropic,
+    parallel: int,
+    cache: ResponseCache | None = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    extra_metadata: dict | None = None,
+    stream: bool = False,
+) -> list[dict]:
+    """Run (experiment, model, run_index) jobs with up to `parallel` requests in flight."""
+    throttle = AdaptiveThrottle(parallel)
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        futures = {
+            pool.submit(
+                run_experiment,
+                name,
+                model,
+                client,
+                throttle,
+                run_index,
+                cache,
+                token_budget,
+                extra_metadata,
+                stream,
+            ): name
+            for name, model, run_index in jobs
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results.append(future.result())
+            except _anthropic().APIError as e:
+                _print_block([f"\n  API Error for {name}: {e}"])
+    if throttle.rate_limited:
+        print(
+            f"\n  Throttle: {throttle.rate_limited} rate-limit/overload responses, "
+            f"{throttle.wait_seconds:.1f}s total queueing"
+        )
+    order = {job: i for i, job in enumerate(jobs)}
+    return sorted(
+        results,
+        key=lambda r: order.get((r["experiment"], r["model"], r.get("run_index")), 0),
+    )
+
+
+def _custom_id(index: int, name: str, model: str, run_index: int | None) -> str:
+    """Batch custom_id: unique, and within the API's 64-char [A-Za-z0-9_-] limit."""
+    digest = hashlib.sha256(f"{name}|{model}|{run_index}".encode("utf-8")).hexdigest()[:12]
+    return f"run{index:04d}-{digest}"
+
+
+def _handle_batch_result(
+    batch_id: str,
+    job: dict,
+    result,
+    cache: ResponseCache | None = None,
+) -> dict | None:
+    name, model, run_index = job["experiment"], job["model"], job.get("run_index")
+    if result.type != "succeeded":
+        detail = getattr(getattr(result, "error", None), "error", None)
+        _print_block([f"\n  Batch request for {name} ({model}) {result.type}: {detail or ''}"])
+        return None
+    if cache is not None and job.get("cache_key"):
+        cache.put(job["cache_key"], result.message)
+    return save_result(
+        name,
+        model,
+        result.message,
+        elapsed=None,
+        run_index=run_index,
+        extra={**job.get("preflight", {}), "batch_id": batch_id},
+        cost_factor=BATCH_DISCOUNT,
+    )
+
+
+def _finish_sweep(
+    client: anthropic.Anthropic,
+    sweep,
+    cache: ResponseCache | None = None,
+) -> list[dict]:
+    wait_for_batch(client, sweep)
+    results = []
+
+    def handle(job: dict, result) -> None:
+        metadata = _handle_batch_result(sweep.batch_id, job, result, cache)
+        if metadata:
+            results.append(metadata)
+
+    collect_results(client, sweep, handle)
+    return results
+
+
+def run_batch(
+    jobs: list[tuple[str, str, int | None]],
+    client: anthropic.Anthropic,
+    cache: ResponseCache | None = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> list[dict]:
+    """Run all jobs as one Message Batch; resumes a pending batch for the same sweep.
+
+    Jobs answered by the cache are not submitted.
+    """
+    results = []
+    requests = []
+    for i, (name, model, run_index) in enumerate(jobs):
+        params, report = build_request(name, model, token_budget)
+        key = cache_key(params, run_index)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results.append(
+                save_result(name, model, cached, None, run_index, extra=report, cached=True)
+            )
+            continue
+        lines = preflight_lines(report)
+        if len(lines) > 1:
+            _print_block([f"\n  {name} ({model}):", *lines])
+        requests.append({
+            "custom_id": _custom_id(i, name, model, run_index),
+            "params": params,
+            "job": {
+                "experiment": name,
+                "model": model,
+                "run_index": run_index,
+                "cache_key": key,
+                "preflight": report,
+            },
+        })
+    if not requests:
+        return results
+    sweep = submit_sweep(client, BATCH_STATE_DIR, requests)
+    return results + _finish_sweep(client, sweep, cache)
+
+
+def resume_batches(
+    client: anthropic.Anthropic,
+    cache: ResponseCache | None = None,
+) -> list[dict]:
+    """Finish polling and write out results for every interrupted batch."""
+    sweeps = pending_sweeps(BATCH_STATE_DIR)
+    if not sweeps:
+        print(f"No pending batches in {BATCH_STATE_DIR.relative_to(REPO_ROOT)}")
+    results = []
+    for sweep in sweeps:
+        print(f"  Resuming batch {sweep.batch_id} submitted {sweep.state['submitted_at']}")
+        results.extend(_finish_sweep(client, sweep, cache))
+    return results
+
+
+def print_timings(results: list[dict], wall_clock: float) -> None:
+    """Per-experiment latency table plus wall-clock vs summed request time."""
+    results = [r for r in results if "elapsed_seconds" in r]
+    if not results:
+        return
+    multi_model = len({r["model"] for r in results}) > 1
+    streamed = any(r.get("ttft_seconds") is not None for r in results)
+    by_experiment: dict[str, list[dict]] = {}
+    for r in results:
+        key = f"{r['experiment']} [{r['model']}]" if multi_model else r["experiment"]
+        by_experiment.setdefault(key, []).append(r)
+    print(
+        f"\n  {'Experiment':<28} {'Runs':>4} {'Min s':>7} {'Mean s':>7} {'Max s':>7}"
+        + (f" {'TTFT s':>7} {'tok/s':>6}" if streamed else "")
+    )
+    for name, runs in by_experiment.items():
+        times = [r["elapsed_seconds"] for r in runs]
+        line = (
+            f"  {name:<28} {len(times):>4} {min(times):>7.1f} "
+            f"{sum(times) / len(times):>7.1f} {max(times):>7.1f}"
+        )
+        if streamed:
+            ttfts = [r["ttft_seconds"] for r in runs if r.get("ttft_seconds") is not None]
+            rates = [r["output_tokens_per_second"] for r in runs if r.get("output_tokens_per_second")]
+            line += f" {sum(ttfts) / len(ttfts):>7.2f}" if ttfts else f" {'-':>7}"
+            line += f" {sum(rates) / len(rates):>6.0f}" if rates else f" {'-':>6}"
+        print(line)
+    total = sum(r["elapsed_seconds"] for r in results)
+    print(f"\n  Wall clock:       {wall_clock:.1f}s")
+    if wall_clock > 0:
+        print(f"  Sum of requests:  {total:.1f}s ({total / wall_clock:.1f}x concurrency)")
+
+
+def print_summary(all_results: list[dict], wall_clock: float | None = None) -> None:
+    """Token and cost totals across runs, plus timings for synchronous runs."""
+    if len(all_results) > 1:
+        print(f"\n{'='*60}")
+        print("  Summary")
+        print(f"{'='*60}")
+        total_input = sum(r["input_tokens"] for r in all_results)
+        total_output = sum(r["output_tokens"] for r in all_results)
+        total_cost = sum(r["estimated_cost_usd"] for r in all_results)
+        print(f"  Experiments run:  {len(all_results)}")
+        cached = sum(1 for r in all_results if r.get("cached"))
+        if cached:
+            print(f"  Served by cache:  {cached}")
+        print(f"  Total input:      {total_input:>8,} tokens")
+        print(f"  Total output:     {total_output:>8,} tokens")
+        print(f"  Total cost:       ${total_cost:.4f}")
+        if wall_clock is not None:
+            print_timings(all_results, wall_clock)
+
+
+def dry_run(jobs: list[tuple[str, str, int | None]], cache: ResponseCache, token_budget: int) -> None:
+    """Show each request's size, cache status and input cost; sends nothing."""
+    to_send = 0
+    input_cost = 0.0
+    for name, model, run_index in jobs:
+        label = name if run_index is None else f"{name} (run {run_index})"
+        params, report = build_request(name, model, token_budget)
+        cached = cache.contains(cache_key(params, run_index))
+        lines = [
+            f"\n  {label} [{model}]",
+            *preflight_lines(report),
+            "  Cached response: yes" if cached else "  Cached response: no (would call the API)",
+        ]
+        if not cached:
+            to_send += 1
+            input_cost += estimate_cost(model, report["prompt_tokens_est"], 0)
+        print("\n".join(lines))
+    print(f"\n  {len(jobs)} run(s), {to_send} would be sent")
+    if to_send:
+        print(f"  Estimated input cost: ${input_cost:.4f} (plus output tokens)")
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Run Claude experiments against Parseable observability data.",
     )
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument(
         "--experiment",
         type=str,
@@ -188,23 +754,153 @@ def main() -> None:
         action="store_true",
         help="Run all experiments that have a prompt.md",
     )
+    group.add_argument(
+        "--resume-batches",
+        action="store_true",
+        help="Finish interrupted --batch runs and write out their results",
+    )
     parser.add_argument(
         "--model",
         type=str,
         default=DEFAULT_MODEL,
-        help=f"Claude model to use (default: {DEFAULT_MODEL})",
+        help=f"Claude model(s) to use, comma-separated (default: {DEFAULT_MODEL})",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Max concurrent API requests; adapts down on rate limits (default: 1)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Run each experiment N times, e.g. for variance measurement (default: 1)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all runs as one Message Batch (half price, results within 24h)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream responses to their results files and record time-to-first-token",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help="Estimated prompt tokens above which sample data is downsampled; "
+        f"0 sends it verbatim (default: {DEFAULT_TOKEN_BUDGET:,})",
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the response cache",
+    )
+    cache_group.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached responses but store the new ones",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show prompt sizes, cache hits and estimated input cost without calling the API",
+    )
+    daemon_group = parser.add_mutually_exclusive_group()
+    daemon_group.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a resident daemon that later invocations are forwarded to",
+    )
+    daemon_group.add_argument(
+        "--stop-daemon",
+        action="store_true",
+        help="Stop a running --serve daemon",
+    )
+    daemon_group.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run in this process even if a daemon is listening",
+    )
+    return parser
+
+
+def _validate(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if not (args.experiment or args.all or args.resume_batches):
+        parser.error("one of the arguments --experiment --all --resume-batches is required")
+    if args.stream and args.batch:
+        parser.error("--stream and --batch cannot be combined")
+
+
+def serve(parser: argparse.ArgumentParser) -> None:
+    """Resident daemon: run forwarded invocations in this warm process."""
+    from resident_daemon import ResidentDaemon
+
+    def handle(argv: list[str]) -> None:
+        args = parser.parse_args(argv)
+        if args.serve or args.stop_daemon:
+            parser.error("--serve / --stop-daemon cannot be forwarded to a daemon")
+        _validate(parser, args)
+        run(args)
+
+    # Import the SDK up front; that is the cost the daemon exists to pay once.
+    _anthropic()
+    print(f"Serving on {DAEMON_SOCKET} (pid {os.getpid()}); Ctrl+C or --stop-daemon to stop")
+    try:
+        ResidentDaemon(DAEMON_SOCKET, handle).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    sys.path.insert(0, str(REPO_ROOT / "integration-patterns"))
+    import resident_daemon
+
+    if args.serve:
+        serve(parser)
+        return
+
+    if args.stop_daemon:
+        print("Daemon stopped" if resident_daemon.stop(DAEMON_SOCKET) else "No daemon running")
+        return
+    _validate(parser, args)
+    if not args.no_daemon:
+        code = resident_daemon.forward(DAEMON_SOCKET, sys.argv[1:] if argv is None else argv)
+        if code is not None:
+            sys.exit(code)
+    run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    cache = ResponseCache(
+        CACHE_DIR,
+        read=not (args.no_cache or args.refresh),
+        write=not args.no_cache,
     )
 
-    args = parser.parse_args()
+    if args.dry_run and args.resume_batches:
+        for sweep in pending_sweeps(BATCH_STATE_DIR):
+            print(f"  Pending batch {sweep.batch_id}: {len(sweep.jobs)} request(s)")
+        return
 
     # Validate API key
     api_key = os.environ.get("ANTHROPIC_API_KEY")
-    if not api_key:
+    if not api_key and not args.dry_run:
         print("Error: ANTHROPIC_API_KEY environment variable is not set.")
         print("Export it with: export ANTHROPIC_API_KEY=sk-ant-...")
         sys.exit(1)
 
-    client = anthropic.Anthropic(api_key=api_key)
+    if args.resume_batches:
+        client = get_client(api_key)
+        all_results = resume_batches(client, cache)
+        print_summary(all_results)
+        return
 
     # Determine which experiments to run
     if args.all:
@@ -217,27 +913,27 @@ def main() -> None:
         experiments = [args.experiment]
 
     # Run experiments
-    all_results = []
-    for exp_name in experiments:
-        try:
-            result = run_experiment(exp_name, args.model, client)
-            all_results.append(result)
-        except anthropic.APIError as e:
-            print(f"\n  API Error for {exp_name}: {e}")
-            continue
-
-    # Print summary
-    if len(all_results) > 1:
-        print(f"\n{'='*60}")
-        print("  Summary")
-        print(f"{'='*60}")
-        total_input = sum(r["input_tokens"] for r in all_results)
-        total_output = sum(r["output_tokens"] for r in all_results)
-        total_cost = sum(r["estimated_cost_usd"] for r in all_results)
-        print(f"  Experiments run:  {len(all_results)}")
-        print(f"  Total input:      {total_input:>8,} tokens")
-        print(f"  Total output:     {total_output:>8,} tokens")
-        print(f"  Total cost:       ${total_cost:.4f}")
+    models = [m.strip() for m in args.model.split(",") if m.strip()]
+    jobs = [
+        (exp_name, model, run if args.repeat > 1 else None)
+        for exp_name in experiments
+        for model in models
+        for run in range(1, args.repeat + 1)
+    ]
+    if args.dry_run:
+        dry_run(jobs, cache, args.token_budget)
+        return
+
+    client = get_client(api_key)
+    if args.batch:
+        print_summary(run_batch(jobs, client, cache, args.token_budget))
+        return
+
+    wall_start = time.time()
+    all_results = run_many(
+        jobs, client, args.parallel, cache, args.token_budget, stream=args.stream
+    )
+    print_summary(all_results, wall_clock=time.time() - wall_start)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the CLI entry points.
+
+Runs each command N times as a fresh process and reports wall-clock
+min / median / max, plus (from one `python -X importtime` run) total
+import time and which heavy SDKs were loaded. Commands that don't need
+the network (--help, --dry-run) should not load anthropic, httpx or
+numpy at all.
+
+With --daemon, resident daemons for run_experiment.py and
+health_summary.py are started on temporary sockets and the dry-run
+commands are timed again through them, showing the per-invocation cost
+once imports and clients are warm.
+
+Usage:
+    python scripts/startup_benchmark.py
+    python scripts/startup_benchmark.py --repeat 10 --daemon
+    python scripts/startup_benchmark.py --command "scripts/export_parseable.py --help"
+"""
+
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("anthropic", "httpx", "numpy", "flask", "zstandard")
+
+DEFAULT_COMMANDS = [
+    "-c pass",
+    "scripts/run_experiment.py --help",
+    "scripts/run_experiment.py --all --dry-run --no-daemon",
+    "scripts/benchmark.py --help",
+    "integration-patterns/health_summary.py --help",
+    "integration-patterns/health_summary.py --once --dry-run --no-daemon",
+]
+
+# Commands re-timed through a daemon with --daemon: (socket env var, serve argv, command).
+DAEMON_COMMANDS = [
+    (
+        "RUN_EXPERIMENT_SOCKET",
+        "scripts/run_experiment.py --serve",
+        "scripts/run_experiment.py --all --dry-run",
+    ),
+    (
+        "HEALTH_SUMMARY_SOCKET",
+        "integration-patterns/health_summary.py --serve",
+        "integration-patterns/health_summary.py --once --dry-run",
+    ),
+]
+
+
+def time_command(argv: list[str], repeat: int, env: dict) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, *argv],
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        times.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} exited {proc.returncode}:\n{proc.stderr[-2000:]}")
+    return times
+
+
+def import_profile(argv: list[str], env: dict) -> tuple[float, list[str]]:
+    """(total import ms, heavy top-level modules imported) from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    total_us = 0
+    heavy = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        # Top-level imports are the ones not indented under another module.
+        if not line.rsplit("|", 1)[1].startswith("  "):
+            total_us += int(cumulative)
+        if name in HEAVY_MODULES:
+            heavy.append(name)
+    return total_us / 1000, heavy
+
+
+def report_row(label: str, times: list[float], imports_ms: float | None, heavy: list[str] | None) -> str:
+    row = (
+        f"  {label:<70} {min(times):>7.0f} {statistics.median(times):>9.0f} {max(times):>7.0f}"
+    )
+    if imports_ms is not None:
+        row += f" {imports_ms:>10.0f}  {', '.join(heavy) or '-'}"
+    return row
+
+
+def start_daemon(serve: str, socket_path: str, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, *shlex.split(serve)],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError(f"daemon '{serve}' did not start")
+        time.sleep(0.05)
+    return proc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure startup time of the CLI entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command (default: 5)")
+    parser.add_argument(
+        "--command",
+        action="append",
+        default=[],
+        help="Extra command to time, relative to the repo root (repeatable)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Also time the dry-run commands through resident daemons",
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    print(f"Python {sys.version.split()[0]}, {args.repeat} runs per command\n")
+    print(
+        f"  {'Command':<70} {'min ms':>7} {'median ms':>9} {'max ms':>7} {'imports ms':>10}  heavy modules"
+    )
+    for command in DEFAULT_COMMANDS + args.command:
+        argv = shlex.split(command)
+        times = time_command(argv, args.repeat, env)
+        imports_ms, heavy = import_profile(argv, env)
+        print(report_row(command, times, imports_ms, heavy))
+
+    if not args.daemon:
+        return
+
+    print("\n  Through a resident daemon (imports and clients already warm):")
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as tmp:
+        daemon_env = dict(env)
+        for var, _, _ in DAEMON_COMMANDS:
+            daemon_env[var] = os.path.join(tmp, var.lower() + ".sock")
+        daemons = []
+        try:
+            for var, serve, command in DAEMON_COMMANDS:
+                daemons.append(start_daemon(serve, daemon_env[var], daemon_env))
+                times = time_command(shlex.split(command), args.repeat, daemon_env)
+                print(report_row(command + "  [daemon]", times, None, None))
+        finally:
+            for _, serve, _ in DAEMON_COMMANDS:
+                subprocess.run(
+                    [sys.executable, *shlex.split(serve.replace("--serve", "--stop-daemon"))],
+                    cwd=REPO_ROOT,
+                    env=daemon_env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            for proc in daemons:
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+
+if __name__ == "__main__":
+    main()
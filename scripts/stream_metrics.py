@@ -0,0 +1,64 @@
+"""
+Latency profile of a streamed Claude response.
+
+Separates queueing/prefill latency (time to first token) from generation
+speed (gaps between text chunks and output tokens per second once output
+has started). Chunk gaps are measured per streamed text delta, which is
+usually one or a few tokens.
+
+Usage:
+    timer = StreamTimer()
+    for text in stream.text_stream:
+        timer.chunk()
+        ...
+    metadata.update(timer.metrics(output_tokens))
+"""
+
+import time
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Linear-interpolated percentile (pct in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+class StreamTimer:
+    """Records arrival times of streamed text chunks."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        self.first: float | None = None
+        self.last: float | None = None
+        self.gaps: list[float] = []
+
+    def chunk(self) -> None:
+        now = self.clock()
+        if self.first is None:
+            self.first = now
+        else:
+            self.gaps.append(now - self.last)
+        self.last = now
+
+    def metrics(self, output_tokens: int | None = None) -> dict:
+        """TTFT, inter-chunk latency percentiles (ms) and generation tokens/sec."""
+        if self.first is None:
+            return {"ttft_seconds": None, "stream_chunks": 0}
+        generation = self.last - self.first
+        metrics = {
+            "ttft_seconds": round(self.first - self.start, 3),
+            "stream_chunks": len(self.gaps) + 1,
+            "inter_chunk_ms": {
+                f"p{p}": round(percentile(self.gaps, p) * 1000, 1) if self.gaps else None
+                for p in (50, 90, 99)
+            },
+        }
+        if output_tokens and generation > 0:
+            metrics["output_tokens_per_second"] = round(output_tokens / generation, 1)
+        return metrics
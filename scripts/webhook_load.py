@@ -0,0 +1,715 @@
+#!/usr/bin/env python3
+"""
+Alert replay and load generator for the alert webhook (Pattern 1).
+
+Sends alert sequences to /webhook on an open-loop schedule and measures
+how alert_webhook_claude keeps up. Parseable, the Anthropic API and Slack
+are replaced by local stand-ins with configurable latency, so a storm
+costs nothing and is repeatable:
+
+- replay: experiment 04's alert_storm.alerts with their fired_at spacing
+- poisson: alerts at a mean rate, drawn from the same alert templates
+- burst: groups of alerts every N seconds (optionally over a Poisson base)
+
+--speedup compresses the schedule (60 replays a 4.5-minute storm in 4.5s).
+By default the tool starts the webhook itself (Flask dev server, or
+Gunicorn with --workers/--threads) pointed at the stand-ins and a
+throwaway state directory; --url targets a service that is already
+running (the required environment is printed).
+
+The report covers outcomes (processed / duplicate / rate_limited),
+offered vs sustained throughput, queue growth (requests outstanding at
+the generator, in-flight jobs and Slack outbox depth from /metrics),
+webhook-response and end-to-end (alert sent -> message at Slack)
+latency percentiles, stand-in call counts (context cache effectiveness)
+and the service's resident memory.
+
+Usage:
+    python scripts/webhook_load.py --speedup 60
+    python scripts/webhook_load.py --profile poisson --rate 2 --duration 120 --claude-latency 8:0.3
+    python scripts/webhook_load.py --profile burst --burst-size 20 --burst-every 30 --duration 300 --speedup 10
+    python scripts/webhook_load.py --repeat 5 --unique --workers 4 --threads 8 --env CONTEXT_CACHE_SECONDS=60
+    python scripts/webhook_load.py --url http://127.0.0.1:5001 --output results/webhook_load.json
+
+Requires:
+    pip install flask anthropic httpx   # gunicorn for --workers
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from stream_metrics import percentile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_REPLAY = REPO_ROOT / "experiments" / "04-alert-correlation" / "sample_data.json"
+DEFAULT_STREAM = "otel-logs"
+MARKER = re.compile(r"\[load:([^\]]+)\]")
+SAMPLE_INTERVAL = 0.5
+TIMELINE_BUCKETS = 12
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ---------------------------------------------------------------------------
+# Stand-ins
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Latency:
+    """Response delay: mean seconds, uniformly jittered by +/- jitter (fraction)."""
+
+    mean: float
+    jitter: float = 0.0
+
+    @classmethod
+    def parse(cls, text: str) -> "Latency":
+        mean, _, jitter = text.partition(":")
+        return cls(float(mean), float(jitter or 0))
+
+    def sample(self) -> float:
+        return max(0.0, self.mean * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def __str__(self) -> str:
+        return f"{self.mean:g}s" + (f" +/-{self.jitter:.0%}" if self.jitter else "")
+
+
+class StandIns:
+    """Parseable, Anthropic Messages and Slack webhook stand-ins on local ports."""
+
+    def __init__(self, parseable: Latency, claude: Latency, slack: Latency, rows: int = 50):
+        self.latency = {"parseable": parseable, "claude": claude, "slack": slack}
+        self.rows = [
+            {"p_timestamp": "2025-01-15T14:30:00.000", "level": "error", "message": f"stand-in log line {i}"}
+            for i in range(rows)
+        ]
+        self.calls: Counter = Counter()
+        # marker -> monotonic time its analysis reached Slack
+        self.delivered: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._servers: list[ThreadingHTTPServer] = []
+        self.urls: dict[str, str] = {}
+
+    def _handler(self, name: str):
+        stand_ins = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                time.sleep(stand_ins.latency[name].sample())
+                with stand_ins._lock:
+                    stand_ins.calls[name] += 1
+                self._reply(200, stand_ins.respond(name, body))
+
+        return Handler
+
+    def respond(self, name: str, body: bytes) -> bytes:
+        if name == "parseable":
+            return json.dumps(self.rows).encode()
+        if name == "slack":
+            now = time.monotonic()
+            with self._lock:
+                for marker in MARKER.findall(body.decode("utf-8", "replace")):
+                    self.delivered.setdefault(marker, now)
+            return b"ok"
+        request = json.loads(body)
+        prompt = "".join(
+            message["content"] if isinstance(message["content"], str) else json.dumps(message["content"])
+            for message in request.get("messages", [])
+        )
+        match = re.search(r'"timestamp": "([^"]+)"', prompt)
+        text = f"[load:{match.group(1) if match else '-'}] Stand-in analysis. " + "Root cause: stand-in. " * 40
+        return json.dumps(
+            {
+                "id": "msg_stand_in",
+                "type": "message",
+                "role": "assistant",
+                "model": request.get("model", "stand-in"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+            }
+        ).encode()
+
+    def start(self) -> None:
+        for name in ("parseable", "claude", "slack"):
+            server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler(name))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name=f"stand-in-{name}", daemon=True).start()
+            self._servers.append(server)
+            self.urls[name] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def env(self) -> dict[str, str]:
+        """Environment that points the webhook at the stand-ins."""
+        return {
+            "PARSEABLE_URL": self.urls["parseable"],
+            "ANTHROPIC_BASE_URL": self.urls["claude"],
+            "ANTHROPIC_API_KEY": "stand-in",
+            "SLACK_WEBHOOK_URL": self.urls["slack"] + "/services/stand-in",
+        }
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return {name: self.calls[name] for name in ("parseable", "claude", "slack")}
+
+
+# ---------------------------------------------------------------------------
+# Schedules
+# ---------------------------------------------------------------------------
+
+
+def load_templates(path: Path, stream: str | None, stream_per_service: bool) -> tuple[list[dict], list[float]]:
+    """Webhook payloads for experiment-format alerts, and their fired_at offsets in seconds."""
+    with open(path) as f:
+        data = json.load(f)
+    alerts = data["alert_storm"]["alerts"] if "alert_storm" in data else data["alerts"]
+    fired = [datetime.fromisoformat(a["fired_at"].replace("Z", "+00:00")) for a in alerts]
+    templates = []
+    for alert in alerts:
+        payload = {
+            "alert_name": alert["alert_name"],
+            "stream": stream
+            or alert.get("stream")
+            or (alert.get("service") if stream_per_service else None)
+            or DEFAULT_STREAM,
+            "message": alert.get("description", ""),
+            "severity": alert.get("severity", "warning"),
+            "labels": alert.get("labels", {}),
+        }
+        if "value" in alert:
+            payload["value"] = alert["value"]
+        templates.append(payload)
+    return templates, [(t - fired[0]).total_seconds() for t in fired]
+
+
+def replay_schedule(templates: list[dict], offsets: list[float], repeat: int) -> list[tuple[float, dict]]:
+    """The storm repeat times back to back, keeping its spacing."""
+    span = offsets[-1] + (offsets[-1] / max(len(offsets) - 1, 1))
+    return [
+        (round_index * span + offset, template)
+        for round_index in range(repeat)
+        for offset, template in zip(offsets, templates)
+    ]
+
+
+def poisson_schedule(templates: list[dict], rate: float, duration: float, rng: random.Random) -> list[tuple[float, dict]]:
+    schedule, t = [], 0.0
+    while rate > 0:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            break
+        schedule.append((t, rng.choice(templates)))
+    return schedule
+
+
+def burst_schedule(
+    templates: list[dict], size: int, every: float, spread: float, duration: float, rng: random.Random
+) -> list[tuple[float, dict]]:
+    schedule, start = [], 0.0
+    while start < duration:
+        schedule.extend((start + rng.uniform(0, spread), rng.choice(templates)) for _ in range(size))
+        start += every
+    return schedule
+
+
+# ---------------------------------------------------------------------------
+# Service under test
+# ---------------------------------------------------------------------------
+
+
+def launch_service(port: int, env: dict, workers: int | None, threads: int, log_path: str) -> subprocess.Popen:
+    env = dict(env, PORT=str(port), PYTHONUNBUFFERED="1")
+    if workers:
+        argv = [sys.executable, "-m", "gunicorn", "-c", "integration-patterns/gunicorn.conf.py"]
+        env.update(WEB_CONCURRENCY=str(workers), WEBHOOK_THREADS=str(threads))
+    else:
+        argv = [sys.executable, "integration-patterns/alert_webhook_claude.py"]
+    log = open(log_path, "w")
+    return subprocess.Popen(argv, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_healthy(client, url: str, proc: subprocess.Popen | None, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"webhook exited with {proc.returncode} during startup")
+        try:
+            if client.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"webhook at {url} did not become healthy within {timeout:.0f}s")
+
+
+def tree_rss_mb(pid: int) -> float | None:
+    """Resident memory of pid and all its descendants (via ps), in MB."""
+    try:
+        out = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss="], capture_output=True, text=True).stdout
+    except OSError:
+        return None
+    children: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    for line in out.splitlines():
+        parts = line.split()
+        if len(parts) == 3:
+            child, parent, kb = map(int, parts)
+            children.setdefault(parent, []).append(child)
+            rss[child] = kb
+    if pid not in rss:
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total / 1024
+
+
+# ---------------------------------------------------------------------------
+# Load run
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Send:
+    scheduled: float
+    alert: dict
+    marker: str
+    sent: float | None = None
+    done: float | None = None
+    outcome: str | None = None
+
+
+@dataclass
+class Sample:
+    t: float
+    sent: int
+    completed: int
+    outstanding: int
+    in_flight_jobs: int | None
+    slack_queue: int | None
+    rss_mb: float | None
+    calls: dict = field(default_factory=dict)
+
+
+class LoadRun:
+    def __init__(self, client, url: str, stand_ins: StandIns, pid: int | None, max_in_flight: int):
+        self.client = client
+        self.url = url
+        self.stand_ins = stand_ins
+        self.pid = pid
+        self.max_in_flight = max_in_flight
+        self.sends: list[Send] = []
+        self.samples: list[Sample] = []
+        self.t0 = 0.0
+        self.load_end = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _post(self, send: Send) -> None:
+        send.sent = time.monotonic()
+        try:
+            resp = self.client.post(f"{self.url}/webhook", json=send.alert, timeout=600)
+            try:
+                send.outcome = resp.json().get("status") or f"http_{resp.status_code}"
+            except ValueError:
+                send.outcome = f"http_{resp.status_code}"
+        except Exception as exc:
+            send.outcome = f"error: {type(exc).__name__}"
+        send.done = time.monotonic()
+
+    def _metrics(self) -> dict:
+        try:
+            return self.client.get(f"{self.url}/metrics", timeout=2).json()
+        except Exception:
+            return {}
+
+    def _sample(self) -> None:
+        metrics = self._metrics()
+        sent = sum(1 for s in self.sends if s.sent is not None)
+        completed = sum(1 for s in self.sends if s.done is not None)
+        self.samples.append(
+            Sample(
+                t=time.monotonic() - self.t0,
+                sent=sent,
+                completed=completed,
+                outstanding=sent - completed,
+                in_flight_jobs=metrics.get("in_flight_jobs"),
+                slack_queue=(metrics.get("slack") or {}).get("queue_depth"),
+                rss_mb=tree_rss_mb(self.pid) if self.pid else None,
+                calls=self.stand_ins.counts(),
+            )
+        )
+
+    def _sampler(self) -> None:
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self._sample()
+
+    def run(self, schedule: list[tuple[float, dict]], speedup: float, unique: bool, drain_timeout: float) -> None:
+        now = datetime.now(timezone.utc)
+        for index, (offset, alert) in enumerate(sorted(schedule, key=lambda item: item[0])):
+            alert = json.loads(json.dumps(alert))
+            # Unique per send; alert_fingerprint ignores timestamp, so dedup still applies.
+            marker = now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{index:06d}Z"
+            alert["timestamp"] = marker
+            if unique:
+                alert["labels"] = dict(alert.get("labels", {}), load_seq=str(index))
+            self.sends.append(Send(offset / speedup, alert, marker))
+
+        self.t0 = time.monotonic()
+        self._sample()
+        sampler = threading.Thread(target=self._sampler, name="load-sampler", daemon=True)
+        sampler.start()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            futures = []
+            for send in self.sends:
+                delay = self.t0 + send.scheduled - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(self._post, send))
+            self.load_end = time.monotonic() - self.t0
+            wait(futures, timeout=drain_timeout)
+        self._drain_slack(drain_timeout)
+        self._stop.set()
+        sampler.join()
+        self._sample()
+
+    def _drain_slack(self, timeout: float) -> None:
+        """Wait until every processed alert reached Slack, or the outbox is empty and idle."""
+        expected = {s.marker for s in self.sends if s.outcome == "processed"}
+        deadline = time.monotonic() + timeout
+        idle_polls = 0
+        while time.monotonic() < deadline and not expected <= set(self.stand_ins.delivered):
+            depth = (self._metrics().get("slack") or {}).get("queue_depth")
+            # Merged or dropped messages may never carry every marker.
+            idle_polls = idle_polls + 1 if not depth else 0
+            if idle_polls >= 4:
+                break
+            time.sleep(SAMPLE_INTERVAL)
+
+    # -----------------------------------------------------------------
+    # Report
+    # -----------------------------------------------------------------
+
+    def summary(self) -> dict:
+        outcomes = Counter(s.outcome or "not_sent" for s in self.sends)
+        processed = [s for s in self.sends if s.outcome == "processed"]
+        response = [s.done - s.sent for s in self.sends if s.done is not None and s.sent is not None]
+        processed_response = [s.done - s.sent for s in processed]
+        end_to_end = [
+            self.stand_ins.delivered[s.marker] - s.sent for s in processed if s.marker in self.stand_ins.delivered
+        ]
+        send_lag = [s.sent - (self.t0 + s.scheduled) for s in self.sends if s.sent is not None]
+        finished = [s.done - self.t0 for s in self.sends if s.done is not None]
+        load = [x for x in self.samples if x.t <= self.load_end] or self.samples[:1]
+        duration = max(self.load_end, 1e-9)
+
+        def growth(attr: str) -> float | None:
+            points = [(x.t, getattr(x, attr)) for x in load if getattr(x, attr) is not None]
+            if len(points) < 2:
+                return None
+            mean_t = sum(t for t, _ in points) / len(points)
+            mean_v = sum(v for _, v in points) / len(points)
+            var = sum((t - mean_t) ** 2 for t, _ in points)
+            return sum((t - mean_t) * (v - mean_v) for t, v in points) / var if var else 0.0
+
+        def peak(attr: str):
+            values = [getattr(x, attr) for x in self.samples if getattr(x, attr) is not None]
+            return max(values) if values else None
+
+        def pcts(values: list[float]) -> dict:
+            return {
+                **{f"p{p}": round(percentile(values, p), 3) if values else None for p in (50, 90, 99)},
+                "max": round(max(values), 3) if values else None,
+                "count": len(values),
+            }
+
+        rates = []
+        for previous, current in zip(load, load[1:]):
+            if current.t > previous.t:
+                rates.append((current.completed - previous.completed) / (current.t - previous.t))
+        rss = [x.rss_mb for x in self.samples if x.rss_mb is not None]
+        calls = self.samples[-1].calls if self.samples else {}
+        return {
+            "alerts": len(self.sends),
+            "outcomes": dict(outcomes),
+            "load_seconds": round(self.load_end, 2),
+            "total_seconds": round(max(finished, default=self.load_end), 2),
+            "offered_per_second": round(len(self.sends) / duration, 3),
+            "completed_per_second": round(len(finished) / max(max(finished, default=duration), 1e-9), 3),
+            "sustained_per_second": round(percentile(rates, 50), 3) if rates else None,
+            "processed_per_second": round(len(processed) / max(max(finished, default=duration), 1e-9), 3),
+            "latency_seconds": {
+                "webhook_response": pcts(response),
+                "processed_response": pcts(processed_response),
+                "end_to_end_slack": pcts(end_to_end),
+                "generator_send_lag": pcts(send_lag),
+            },
+            "queues": {
+                "peak_outstanding_requests": peak("outstanding"),
+                "outstanding_growth_per_second": _round(growth("outstanding")),
+                "peak_in_flight_jobs": peak("in_flight_jobs"),
+                "peak_slack_queue": peak("slack_queue"),
+                "slack_queue_growth_per_second": _round(growth("slack_queue")),
+            },
+            "memory_mb": {
+                "start": _round(rss[0] if rss else None),
+                "peak": _round(max(rss) if rss else None),
+                "end": _round(rss[-1] if rss else None),
+            },
+            "stand_in_calls": calls,
+            "undelivered_to_slack": len(processed) - len(end_to_end),
+            "timeline": self.timeline(),
+        }
+
+    def timeline(self) -> list[dict]:
+        if not self.samples:
+            return []
+        step = max(self.samples[-1].t / TIMELINE_BUCKETS, SAMPLE_INTERVAL)
+        rows, next_t = [], 0.0
+        for sample in self.samples:
+            if sample.t + 1e-9 >= next_t or sample is self.samples[-1]:
+                rows.append(
+                    {
+                        "t": round(sample.t, 1),
+                        "sent": sample.sent,
+                        "completed": sample.completed,
+                        "outstanding": sample.outstanding,
+                        "in_flight_jobs": sample.in_flight_jobs,
+                        "slack_queue": sample.slack_queue,
+                        "rss_mb": _round(sample.rss_mb),
+                    }
+                )
+                next_t = sample.t + step
+        return rows
+
+
+def _round(value: float | None, digits: int = 1) -> float | None:
+    # + 0.0 turns -0.0 into 0.0
+    return round(value, digits) + 0.0 if value is not None else None
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:g}" if isinstance(value, (int, float)) else str(value)
+
+
+def print_report(summary: dict, description: str) -> None:
+    print(f"\n{description}\n")
+    outcomes = ", ".join(f"{name} {count}" for name, count in sorted(summary["outcomes"].items()))
+    print(f"Alerts: {summary['alerts']} ({outcomes})")
+    print(
+        f"Throughput: offered {summary['offered_per_second']}/s over {summary['load_seconds']}s; "
+        f"completed {summary['completed_per_second']}/s, sustained (median) {_fmt(summary['sustained_per_second'])}/s, "
+        f"processed {summary['processed_per_second']}/s; all done after {summary['total_seconds']}s"
+    )
+    queues = summary["queues"]
+    growth = queues["outstanding_growth_per_second"]
+    print(
+        f"Queues: peak outstanding requests {_fmt(queues['peak_outstanding_requests'])} "
+        f"(growth {_fmt(growth)}/s during load), peak in-flight jobs {_fmt(queues['peak_in_flight_jobs'])}, "
+        f"peak Slack outbox {_fmt(queues['peak_slack_queue'])} "
+        f"(growth {_fmt(queues['slack_queue_growth_per_second'])}/s)"
+    )
+    if growth is not None and growth > 0.1 * summary["offered_per_second"]:
+        print("  -> saturated: requests pile up faster than the service completes them")
+    memory = summary["memory_mb"]
+    print(f"Memory (service RSS, MB): start {_fmt(memory['start'])}, peak {_fmt(memory['peak'])}, end {_fmt(memory['end'])}")
+    calls = summary["stand_in_calls"]
+    processed = summary["outcomes"].get("processed", 0)
+    print(
+        f"Stand-in calls: Parseable {calls.get('parseable', 0)} "
+        f"({calls.get('parseable', 0) / max(processed, 1):.2f} per processed alert), "
+        f"Claude {calls.get('claude', 0)}, Slack {calls.get('slack', 0)}; "
+        f"{summary['undelivered_to_slack']} processed alerts not seen at Slack"
+    )
+    print(f"\n  {'Latency (s)':<24} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'n':>6}")
+    for name, stats in summary["latency_seconds"].items():
+        print(
+            f"  {name:<24} {_fmt(stats['p50']):>8} {_fmt(stats['p90']):>8} {_fmt(stats['p99']):>8} "
+            f"{_fmt(stats['max']):>8} {stats['count']:>6}"
+        )
+    print(f"\n  {'t (s)':>7} {'sent':>6} {'done':>6} {'outstanding':>11} {'in-flight':>9} {'slack q':>7} {'RSS MB':>7}")
+    for row in summary["timeline"]:
+        print(
+            f"  {row['t']:>7} {row['sent']:>6} {row['completed']:>6} {row['outstanding']:>11} "
+            f"{_fmt(row['in_flight_jobs']):>9} {_fmt(row['slack_queue']):>7} {_fmt(row['rss_mb']):>7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay alert storms and synthetic load against /webhook.")
+    parser.add_argument("--profile", choices=["replay", "poisson", "burst"], default="replay")
+    parser.add_argument(
+        "--alerts",
+        default=str(DEFAULT_REPLAY),
+        help="Experiment-format alert file for replay and as templates (default: experiment 04)",
+    )
+    parser.add_argument("--speedup", type=float, default=1.0, help="Compress the schedule by this factor")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the storm this many times back to back")
+    parser.add_argument("--rate", type=float, default=1.0, help="poisson: mean alerts per second (default: 1)")
+    parser.add_argument("--duration", type=float, default=60, help="poisson/burst: scenario seconds (default: 60)")
+    parser.add_argument("--burst-size", type=int, default=20, help="burst: alerts per burst (default: 20)")
+    parser.add_argument("--burst-every", type=float, default=30, help="burst: seconds between bursts (default: 30)")
+    parser.add_argument("--burst-spread", type=float, default=2, help="burst: seconds each burst is spread over")
+    parser.add_argument("--base-rate", type=float, default=0, help="burst: Poisson alerts/s between bursts")
+    parser.add_argument("--stream", help=f"Stream for every alert (default: the alert's own, else {DEFAULT_STREAM})")
+    parser.add_argument(
+        "--stream-per-service", action="store_true", help="Use each alert's service as its stream"
+    )
+    parser.add_argument("--unique", action="store_true", help="Label every send uniquely so dedup never drops one")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--parseable-latency", default="0.05", help="Stand-in delay SECONDS[:JITTER] (default: 0.05)")
+    parser.add_argument("--claude-latency", default="8:0.25", help="Stand-in delay SECONDS[:JITTER] (default: 8:0.25)")
+    parser.add_argument("--slack-latency", default="0.2", help="Stand-in delay SECONDS[:JITTER] (default: 0.2)")
+    parser.add_argument("--parseable-rows", type=int, default=50, help="Rows each stand-in query returns")
+    parser.add_argument("--url", help="Target an already running webhook instead of starting one")
+    parser.add_argument("--pid", type=int, help="With --url: process to measure memory of")
+    parser.add_argument("--workers", type=int, help="Start the webhook under Gunicorn with this many workers")
+    parser.add_argument("--threads", type=int, default=4, help="Gunicorn threads per worker (default: 4)")
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the started webhook"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=512, help="Concurrent requests the generator may hold open")
+    parser.add_argument("--drain-timeout", type=float, default=300, help="Seconds to wait for stragglers after the load")
+    parser.add_argument("--server-log", help="Write the started webhook's output here (default: temp dir)")
+    parser.add_argument("--output", help="Also write the full results as JSON to this path")
+    args = parser.parse_args()
+
+    try:
+        import httpx
+    except ImportError:
+        print("httpx is required: pip install httpx", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    templates, offsets = load_templates(Path(args.alerts), args.stream, args.stream_per_service)
+    if args.profile == "replay":
+        schedule = replay_schedule(templates, offsets, args.repeat)
+        shape = f"replay of {len(templates)} alerts x{args.repeat}"
+    elif args.profile == "poisson":
+        schedule = poisson_schedule(templates, args.rate, args.duration, rng)
+        shape = f"poisson {args.rate}/s for {args.duration:g}s"
+    else:
+        schedule = burst_schedule(templates, args.burst_size, args.burst_every, args.burst_spread, args.duration, rng)
+        schedule += poisson_schedule(templates, args.base_rate, args.duration, rng)
+        shape = f"bursts of {args.burst_size} every {args.burst_every:g}s for {args.duration:g}s"
+
+    stand_ins = StandIns(
+        Latency.parse(args.parseable_latency),
+        Latency.parse(args.claude_latency),
+        Latency.parse(args.slack_latency),
+        rows=args.parseable_rows,
+    )
+    stand_ins.start()
+    proc = None
+    tmp = tempfile.TemporaryDirectory(prefix="webhook-load-")
+    log_path = args.server_log or os.path.join(tmp.name, "webhook.log")
+    client = httpx.Client(
+        limits=httpx.Limits(max_connections=args.max_in_flight + 8, max_keepalive_connections=args.max_in_flight)
+    )
+    try:
+        if args.url:
+            url = args.url.rstrip("/")
+            print("Point the running webhook at the stand-ins with:", file=sys.stderr)
+            for key, value in stand_ins.env().items():
+                print(f"  export {key}={shlex.quote(value)}", file=sys.stderr)
+            pid = args.pid
+            service = f"external service at {url}"
+        else:
+            port = _free_port()
+            url = f"http://127.0.0.1:{port}"
+            env = dict(
+                os.environ,
+                **stand_ins.env(),
+                WEBHOOK_STATE_DB=os.path.join(tmp.name, "webhook_state.db"),
+                SLACK_OUTBOX_DB=os.path.join(tmp.name, "slack_outbox.db"),
+            )
+            for item in args.env:
+                key, _, value = item.partition("=")
+                env[key] = value
+            proc = launch_service(port, env, args.workers, args.threads, log_path)
+            pid = proc.pid
+            service = (
+                f"gunicorn {args.workers} workers x {args.threads} threads" if args.workers else "Flask dev server"
+            )
+        wait_healthy(client, url, proc)
+
+        description = (
+            f"Profile: {shape}, speed-up {args.speedup:g}x -> {len(schedule)} alerts over "
+            f"{max((o for o, _ in schedule), default=0) / args.speedup:.1f}s\n"
+            f"Service: {service}; stand-ins: Parseable {stand_ins.latency['parseable']}, "
+            f"Claude {stand_ins.latency['claude']}, Slack {stand_ins.latency['slack']}"
+        )
+        print("Running " + description.replace("\n", "; "), file=sys.stderr)
+        run = LoadRun(client, url, stand_ins, pid, args.max_in_flight)
+        run.run(schedule, args.speedup, args.unique, args.drain_timeout)
+        summary = run.summary()
+        print_report(summary, description)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump({"description": description, "args": vars(args), **summary}, f, indent=2)
+            print(f"\nResults written to {args.output}")
+    except RuntimeError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        if proc is not None and os.path.exists(log_path):
+            with open(log_path) as f:
+                print("".join(f.readlines()[-20:]), file=sys.stderr)
+        sys.exit(1)
+    finally:
+        client.close()
+        if proc is not None:
+            proc.send_signal(signal.SIGTERM)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        stand_ins.stop()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()